@@ -0,0 +1,190 @@
+import importlib
+import logging
+import time
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+# One entry per action the UI offers, in menu order
+CATALOG = [
+    ("Media", ["media_play_pause", "media_stop", "media_next", "media_prev",
+               "volume_mute", "volume_up", "volume_down"]),
+    ("Browser Control", ["browser_new_tab", "browser_close_tab", "browser_reopen_tab",
+                         "browser_next_tab", "browser_prev_tab", "browser_focus_address",
+                         "browser_refresh", "browser_history", "browser_downloads"]),
+    ("Productivity", ["copy", "paste", "cut", "undo", "redo",
+                      "select_all", "save", "print", "zoom_in", "zoom_out"]),
+    ("Presentation", ["ppt_next", "ppt_prev", "ppt_start", "ppt_stop",
+                      "ppt_black_screen", "ppt_white_screen", "ppt_laser_pointer", "ppt_pen"]),
+    ("Document", ["word_bold", "word_italic", "word_underline",
+                  "word_align_center", "word_align_left", "word_align_right"]),
+    ("Navigation", ["dynamic_scroll", "scroll_up", "scroll_down", "page_up", "page_down",
+                    "arrow_up", "arrow_down", "arrow_left", "arrow_right"]),
+    ("Window Management", ["snap_window_left", "snap_window_right",
+                           "minimize_window", "maximize_window", "restore_window", "close_current_window",
+                           "alt_tab", "win_tab", "show_desktop",
+                           "desktop_next", "desktop_prev", "desktop_new", "desktop_close"]),
+    ("Mouse", ["track_cursor", "left_click", "right_click", "double_click", "middle_click"]),
+    ("System", ["open_start_menu", "emoji_panel", "clipboard_history", "run_dialog",
+                "screenshot", "lock_screen", "task_manager", "file_explorer", "settings",
+                "enter", "space", "esc", "backspace", "tab"]),
+    ("Power & Apps", ["shutdown", "restart", "sleep",
+                      "open_calculator", "open_notepad", "open_cmd"]),
+    ("Advanced", ["custom_command", "type_text"]),
+    ("PDF", ["split_pdf"]),
+    ("Voice", ["voice_type"]),
+]
+
+# Run every frame while the gesture is held (no cooldown / single-trigger)
+CONTINUOUS = {"track_cursor", "smart_mouse", "scroll_up", "scroll_down", "volume_up", "volume_down", "dynamic_scroll"}
+# Called with the hand's landmarks
+NEEDS_LANDMARKS = {"track_cursor", "smart_mouse", "dynamic_scroll"}
+# Seconds between triggers, where the global cooldown is too short
+COOLDOWNS = {"shutdown": 5.0, "restart": 5.0, "sleep": 5.0, "lock_screen": 2.0}
+# Heavy action groups: module imported on first use instead of at startup
+PLUGINS = {"voice_type": "voice_engine"}
+# Do more than inject input through owner.input (lock, shell, launch, threads, UI):
+# macros run them on their own, never inside an input batch
+SIDE_EFFECTS = {"lock_screen", "shutdown", "restart", "sleep", "open_calculator", "open_notepad", "open_cmd",
+                "split_pdf", "voice_type", "custom_command", "macro"}
+# Old names still found in saved mappings
+ALIASES = {"play_pause": "media_play_pause"}
+
+ActionSpec = namedtuple('ActionSpec', ['name', 'category', 'continuous', 'needs_landmarks', 'cooldown', 'plugin',
+                                       'input_only'])
+# A mapping value resolved to what runs: fn(arg) / fn(landmarks) / fn(), reported as `label`
+ActionBinding = namedtuple('ActionBinding', ['action', 'spec', 'fn', 'arg', 'label'])
+
+
+class ActionRegistry:
+    """
+    Resolves action strings to callables once, instead of on every trigger.
+
+    Specs (category, continuous, needs_landmarks, cooldown, plugin, input_only) come from
+    the tables above plus every `_action_*` method on the owner. compile()
+    turns a whole gesture -> action mapping into bindings; the owner calls it
+    again only when the mapping changes, so dispatch is one dict lookup.
+    run() times every call (stats: count, total_ms, max_ms, errors per action).
+    """
+    def __init__(self, owner):
+        self.owner = owner
+        self.specs = {}
+        for category, names in CATALOG:
+            for name in names:
+                self.specs[name] = self._spec(name, category)
+        # Prefix actions ("macro:...") the menu doesn't offer as a plain name
+        self.specs["macro"] = self._spec("macro", "Advanced")
+        # Handlers the menu doesn't list (smart_mouse, ...) are still callable
+        for attr in dir(type(owner)):
+            if attr.startswith("_action_") and attr[8:] not in self.specs:
+                self.specs[attr[8:]] = self._spec(attr[8:], "Other")
+        self._plugins = {}
+        self._adhoc = {} # action string -> binding, for perform_action() outside the mapping
+        self.stats = {}
+
+    @staticmethod
+    def _spec(name, category):
+        return ActionSpec(name, category, name in CONTINUOUS, name in NEEDS_LANDMARKS,
+                          COOLDOWNS.get(name), PLUGINS.get(name), name not in SIDE_EFFECTS)
+
+    def available(self):
+        """Action names for the UI, in menu order."""
+        return [name for _, names in CATALOG for name in names]
+
+    # --- Resolution ---
+    def bind(self, action):
+        """ActionBinding for one action string, or None if nothing handles it."""
+        if not action:
+            return None
+        if action.startswith("type:"):
+            text = action[5:]
+            return ActionBinding("type_text", self.specs["type_text"], self.owner._execute_type_text, text, f"Typed: {text}")
+        if action.startswith("macro:"):
+            try:
+                macro = self.owner._compile_macro(action[6:])
+            except ValueError as e:
+                logger.warning(f"Invalid macro '{action}': {e}")
+                return None
+            return ActionBinding("macro", self.specs["macro"], self.owner._execute_macro, macro,
+                                 f"Macro: {macro.steps} steps")
+        if action.startswith("cmd:"):
+            command = action[4:]
+            return ActionBinding("custom_command", self.specs["custom_command"], self.owner._execute_custom_cmd,
+                                 command, f"CMD: {command}")
+
+        name = ALIASES.get(action, action)
+        spec = self.specs.get(name)
+        fn = getattr(self.owner, f"_action_{name}", None)
+        if spec is None or fn is None:
+            return None
+        return ActionBinding(name, spec, fn, None, name)
+
+    def compile(self, mapping):
+        """gesture -> ActionBinding for every mapped gesture that has a handler."""
+        bindings = {}
+        for gesture, action in mapping.items():
+            binding = self.bind(action)
+            if binding is None:
+                logger.warning(f"No handler for action '{action}' (gesture '{gesture}')")
+                continue
+            bindings[gesture] = binding
+        self._adhoc.clear()
+        return bindings
+
+    def bind_cached(self, action):
+        binding = self._adhoc.get(action)
+        if binding is None:
+            binding = self.bind(action)
+            if binding is not None:
+                if len(self._adhoc) >= 256:
+                    self._adhoc.clear()
+                self._adhoc[action] = binding
+        return binding
+
+    # --- Execution ---
+    def load_plugin(self, module_name):
+        module = self._plugins.get(module_name)
+        if module is None:
+            start = time.perf_counter()
+            module = self._plugins[module_name] = importlib.import_module(module_name)
+            logger.info(f"Loaded action plugin '{module_name}' in {(time.perf_counter() - start) * 1000:.0f}ms")
+        return module
+
+    def run(self, binding, landmarks=None):
+        """Executes a binding. Returns its label, or None if it failed or lacked landmarks."""
+        spec = binding.spec
+        if spec.needs_landmarks and not landmarks:
+            return None
+        start = time.perf_counter()
+        try:
+            if spec.plugin:
+                self.load_plugin(spec.plugin)
+            if spec.needs_landmarks:
+                binding.fn(landmarks)
+            elif binding.arg is not None:
+                binding.fn(binding.arg)
+            else:
+                binding.fn()
+            ok = True
+        except Exception as e:
+            logger.error(f"Execution failed for {binding.action}: {e}")
+            ok = False
+        self._record(binding.action, (time.perf_counter() - start) * 1000.0, ok)
+        return binding.label if ok else None
+
+    def _record(self, action, elapsed_ms, ok):
+        entry = self.stats.get(action)
+        if entry is None:
+            entry = self.stats[action] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "errors": 0}
+        entry["count"] += 1
+        entry["total_ms"] += elapsed_ms
+        entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+        if not ok:
+            entry["errors"] += 1
+
+    def timing(self):
+        """Per-action execution time summary, slowest mean first."""
+        rows = [{"action": action, "count": s["count"], "errors": s["errors"],
+                 "mean_ms": round(s["total_ms"] / s["count"], 3), "max_ms": round(s["max_ms"], 3)}
+                for action, s in self.stats.items() if s["count"]]
+        return sorted(rows, key=lambda r: r["mean_ms"], reverse=True)
@@ -0,0 +1,257 @@
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import threading
+from collections import namedtuple
+
+from config import Config
+from json_store import JsonStore
+
+logger = logging.getLogger(__name__)
+
+# The foreground application: window title and process image name ("POWERPNT.EXE", "firefox")
+WindowInfo = namedtuple('WindowInfo', ['title', 'process'])
+# mapping: overrides on top of the base mapping; gestures: names the matcher scores (None = all)
+Profile = namedtuple('Profile', ['name', 'match', 'mapping', 'gestures'])
+# What the gesture path runs against right now (name None = base mapping), swapped as one reference
+ActiveProfile = namedtuple('ActiveProfile', ['name', 'mapping', 'bindings', 'gestures'])
+
+NO_WINDOW = WindowInfo("", "")
+
+
+# --- Foreground window providers ---
+class WindowProvider:
+    name = "base"
+
+    def foreground(self):
+        """WindowInfo of the focused window (NO_WINDOW if unknown)."""
+        raise NotImplementedError
+
+
+class StubWindowProvider(WindowProvider):
+    """Returns whatever was set last. For tests and benchmarks."""
+    name = "stub"
+
+    def __init__(self, title="", process=""):
+        self.window = WindowInfo(title, process)
+
+    def set(self, title="", process=""):
+        self.window = WindowInfo(title, process)
+
+    def foreground(self):
+        return self.window
+
+
+class Win32WindowProvider(WindowProvider):
+    """GetForegroundWindow through ctypes (no pywin32 needed)."""
+    name = "win32"
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+        self._ctypes = ctypes
+        self._user32 = ctypes.windll.user32
+        self._kernel32 = ctypes.windll.kernel32
+        self._pid = wintypes.DWORD()
+
+    def foreground(self):
+        ctypes = self._ctypes
+        hwnd = self._user32.GetForegroundWindow()
+        if not hwnd:
+            return NO_WINDOW
+        length = self._user32.GetWindowTextLengthW(hwnd)
+        buf = ctypes.create_unicode_buffer(length + 1)
+        self._user32.GetWindowTextW(hwnd, buf, length + 1)
+
+        process = ""
+        self._user32.GetWindowThreadProcessId(hwnd, ctypes.byref(self._pid))
+        handle = self._kernel32.OpenProcess(self.PROCESS_QUERY_LIMITED_INFORMATION, False, self._pid.value)
+        if handle:
+            try:
+                path = ctypes.create_unicode_buffer(1024)
+                size = ctypes.c_ulong(1024)
+                if self._kernel32.QueryFullProcessImageNameW(handle, 0, path, ctypes.byref(size)):
+                    process = os.path.basename(path.value)
+            finally:
+                self._kernel32.CloseHandle(handle)
+        return WindowInfo(buf.value, process)
+
+
+class XdotoolWindowProvider(WindowProvider):
+    """X11: xdotool for the active window, /proc for its process name."""
+    name = "xdotool"
+
+    def foreground(self):
+        try:
+            out = subprocess.run(["xdotool", "getactivewindow", "getwindowname", "getwindowpid"],
+                                 capture_output=True, text=True, timeout=1).stdout.splitlines()
+        except (OSError, subprocess.SubprocessError):
+            return NO_WINDOW
+        if not out:
+            return NO_WINDOW
+        process = ""
+        if len(out) > 1 and out[-1].strip().isdigit():
+            try:
+                with open(f"/proc/{out[-1].strip()}/comm") as f:
+                    process = f.read().strip()
+            except OSError:
+                pass
+        return WindowInfo(out[0], process)
+
+
+def create_window_provider(name=None):
+    """Config.CONTEXT_PROVIDER: auto (win32 on Windows, xdotool on X11) / win32 / xdotool / stub."""
+    name = name or Config.CONTEXT_PROVIDER
+    if name == "auto":
+        if platform.system() == "Windows":
+            name = "win32"
+        elif os.environ.get("DISPLAY") and shutil.which("xdotool"):
+            name = "xdotool"
+        else:
+            name = "stub"
+    try:
+        if name == "win32":
+            return Win32WindowProvider()
+        if name == "xdotool" and shutil.which("xdotool"):
+            return XdotoolWindowProvider()
+    except Exception as e:
+        logger.warning(f"Window provider '{name}' failed to start: {e}")
+    if name != "stub":
+        logger.warning(f"Window provider '{name}' not available, profiles won't follow the focused app")
+    return StubWindowProvider()
+
+
+class ForegroundPoller:
+    """
+    Samples the focused window every Config.CONTEXT_POLL_INTERVAL_S on a
+    background thread and caches it, so the frame path reads `current`
+    instead of asking the OS. on_change(WindowInfo) fires only when the
+    window actually changes.
+    """
+    def __init__(self, provider, on_change=None, interval=None, enabled=None):
+        self.provider = provider
+        self.on_change = on_change
+        self.enabled = enabled # () -> bool; polling is skipped while False (e.g. no profiles defined)
+        self.interval = Config.CONTEXT_POLL_INTERVAL_S if interval is None else interval
+        self.current = NO_WINDOW
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {"polls": 0, "changes": 0, "errors": 0}
+
+    def poll(self):
+        """One sample. Returns True if the foreground window changed."""
+        self.stats["polls"] += 1
+        try:
+            window = self.provider.foreground()
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.debug(f"Foreground window lookup failed: {e}")
+            return False
+        if window == self.current:
+            return False
+        self.current = window
+        self.stats["changes"] += 1
+        if self.on_change:
+            self.on_change(window)
+        return True
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="foreground-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self.enabled is None or self.enabled():
+                self.poll()
+            self._stop.wait(self.interval)
+
+
+# --- Profiles ---
+class ProfileSet:
+    """
+    Per-application profiles from Config.PROFILES_FILE:
+
+        {"powerpoint": {"match": ["powerpnt.exe", "PowerPoint"],
+                        "mapping": {"peace": "ppt_next", "fist": "ppt_prev"},
+                        "gestures": ["peace", "fist", "open_palm"]}}
+
+    A profile is active when any "match" string occurs (case-insensitive) in
+    the focused window's process name or title; the first match in file
+    order wins. Its mapping is layered over the base one, and "gestures"
+    (optional) limits which gestures are scored at all. Lookups are cached
+    per window; the file hot-reloads like action_config.json.
+    """
+    def __init__(self, path=None, on_change=None):
+        self.path = path or Config.PROFILES_FILE
+        self.profiles = {}
+        self._cache = {}
+        self.on_change = on_change # Called after the profiles were reloaded or edited
+        self.store = JsonStore(self.path, self.to_json, on_reload=self._reload)
+        self._set(self.store.load() or {})
+        self.store.watch()
+
+    @staticmethod
+    def _parse(name, entry):
+        match = entry.get("match", [])
+        match = [match] if isinstance(match, str) else list(match)
+        gestures = entry.get("gestures")
+        return Profile(name, tuple(m.lower() for m in match if m), dict(entry.get("mapping", {})),
+                       frozenset(gestures) if gestures else None)
+
+    def _set(self, data):
+        profiles = {}
+        for name, entry in data.items():
+            if not isinstance(entry, dict):
+                logger.warning(f"Profile '{name}' ignored: expected an object")
+                continue
+            profiles[name] = self._parse(name, entry)
+        self.profiles = profiles
+        self._cache = {}
+
+    def _reload(self, data):
+        if isinstance(data, dict):
+            self._set(data)
+            if self.on_change:
+                self.on_change()
+
+    def to_json(self):
+        return {p.name: {"match": list(p.match), "mapping": p.mapping,
+                         **({"gestures": sorted(p.gestures)} if p.gestures else {})}
+                for p in self.profiles.values()}
+
+    def put(self, name, entry):
+        """Adds or replaces one profile (None removes it) and saves."""
+        profiles = dict(self.profiles)
+        if entry is None:
+            profiles.pop(name, None)
+        else:
+            profiles[name] = self._parse(name, entry)
+        self.profiles = profiles
+        self._cache = {}
+        self.store.save()
+        if self.on_change:
+            self.on_change()
+
+    def match(self, window):
+        """The Profile for a WindowInfo, or None (base mapping, all gestures)."""
+        if window in self._cache:
+            return self._cache[window]
+        haystack = f"{window.process}\n{window.title}".lower()
+        found = None
+        for profile in self.profiles.values():
+            if any(m in haystack for m in profile.match):
+                found = profile
+                break
+        if len(self._cache) >= 256:
+            self._cache.clear()
+        self._cache[window] = found
+        return found
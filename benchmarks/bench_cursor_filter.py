@@ -0,0 +1,153 @@
+"""
+Cursor smoothing benchmark: lag vs jitter.
+
+Replays an index-tip stream through each cursor filter and reports:
+  - jitter_px: RMS frame-to-frame cursor movement while the hand is still
+  - err_px:    RMS distance to the true position while the hand moves
+  - lag_ms:    time shift that best aligns the output with the true path
+
+Positions are normalized (0-1) and reported as pixels on a 1920 px wide screen.
+The default stream is synthetic (holds, fast flicks and slow drags, with
+Gaussian landmark noise and --latency-ms of pipeline delay), so the true path
+is known. --stream replays a recorded JSON list of [t_ms, x, y] instead; the
+true path is then approximated by a centred moving average of the samples.
+
+Usage:
+    python benchmarks/bench_cursor_filter.py [--fps 15 30] [--noise 0.0015] [--latency-ms 60]
+                                             [--beta 5 10 20] [--lead-ms 0 40 80] [--stream rec.json]
+"""
+import argparse
+import json
+
+from bench_utils import print_table
+
+import numpy as np
+
+from config import Config
+from cursor_filter import OneEuroFilter
+
+SCREEN_PX = 1920
+COLUMNS = ["stream", "filter", "jitter_px", "err_px", "lag_ms"]
+
+
+def min_jerk(t):
+    return 10 * t ** 3 - 15 * t ** 4 + 6 * t ** 5
+
+
+def synthetic_path(fps, duration_s=12.0):
+    """True index-tip path: alternating holds, fast flicks and slow drags."""
+    # (seconds, dx, dy): moves are min-jerk, (dx, dy) == 0 is a hold
+    script = [(1.0, 0, 0), (0.25, 0.45, 0.1), (1.0, 0, 0), (1.5, -0.2, 0.05), (0.8, 0, 0),
+              (0.3, -0.3, -0.25), (1.2, 0, 0), (2.0, 0.15, 0.2), (1.0, 0, 0), (0.2, -0.1, -0.1)]
+    t = np.arange(0.0, duration_s, 1.0 / fps)
+    x, y = np.full(len(t), 0.4), np.full(len(t), 0.5)
+    start, ox, oy = 0.0, 0.4, 0.5
+    for dur, dx, dy in script:
+        seg = (t >= start) & (t < start + dur)
+        p = min_jerk((t[seg] - start) / dur)
+        x[seg], y[seg] = ox + dx * p, oy + dy * p
+        ox, oy, start = ox + dx, oy + dy, start + dur
+    after = t >= start
+    x[after], y[after] = ox, oy
+    return t, x, y
+
+
+def load_stream(path):
+    data = np.array(json.load(open(path)), dtype=np.float64)
+    t = (data[:, 0] - data[0, 0]) / 1000.0
+    # No ground truth for recordings: centred moving average of the samples
+    k = 5
+    pad = lambda v: np.pad(v, k // 2, mode='edge')
+    kernel = np.ones(k) / k
+    return t, data[:, 1], data[:, 2], np.convolve(pad(data[:, 1]), kernel, 'valid'), np.convolve(pad(data[:, 2]), kernel, 'valid')
+
+
+def run_filter(make_filter, t, mx, my):
+    if make_filter is None:
+        return mx.copy(), my.copy()
+    filt = make_filter()
+    out = np.array([filt.filter(x, y, ts) for ts, x, y in zip(t, mx, my)])
+    return out[:, 0], out[:, 1]
+
+
+def legacy_ema(smooth_factor=0.2):
+    """The previous fixed EMA from ActionMap._action_track_cursor."""
+    class Ema:
+        def __init__(self):
+            self.p = None
+
+        def filter(self, x, y, t):
+            if self.p is None:
+                self.p = (x, y)
+            self.p = (self.p[0] * smooth_factor + x * (1 - smooth_factor),
+                      self.p[1] * smooth_factor + y * (1 - smooth_factor))
+            return self.p
+    return Ema
+
+
+def metrics(t, ox, oy, tx, ty):
+    speed = np.hypot(np.gradient(tx, t), np.gradient(ty, t))
+    still = speed < 0.01
+    moving = speed > 0.05
+
+    steps = np.hypot(np.diff(ox), np.diff(oy))
+    jitter = np.sqrt(np.mean(steps[still[1:] & still[:-1]] ** 2)) if np.any(still[1:] & still[:-1]) else 0.0
+    err = np.sqrt(np.mean((ox - tx)[moving] ** 2 + (oy - ty)[moving] ** 2)) if moving.any() else 0.0
+
+    # Lag: shift of the true path that best explains the output
+    best_lag, best_rms = 0.0, np.inf
+    for lag in np.arange(-0.1, 0.3, 0.005):
+        sx = np.interp(t - lag, t, tx)
+        sy = np.interp(t - lag, t, ty)
+        rms = np.mean((ox - sx)[moving] ** 2 + (oy - sy)[moving] ** 2) if moving.any() else 0.0
+        if rms < best_rms:
+            best_lag, best_rms = lag, rms
+    return jitter * SCREEN_PX, err * SCREEN_PX, best_lag * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cursor filter lag vs jitter")
+    parser.add_argument("--fps", type=int, nargs="+", default=[15, 30], help="Synthetic stream frame rates")
+    parser.add_argument("--noise", type=float, default=0.0015, help="Landmark noise (std, normalized units)")
+    parser.add_argument("--latency-ms", type=float, default=60.0, help="Camera + inference delay of the samples")
+    parser.add_argument("--beta", type=float, nargs="+", default=[Config.CURSOR_BETA], help="One Euro beta values")
+    parser.add_argument("--min-cutoff", type=float, nargs="+", default=[Config.CURSOR_MIN_CUTOFF])
+    parser.add_argument("--lead-ms", type=float, nargs="+", default=[0.0, 60.0], help="Prediction lead values")
+    parser.add_argument("--stream", help="Recorded JSON [[t_ms, x, y], ...] instead of synthetic streams")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.RandomState(args.seed)
+    streams = []
+    if args.stream:
+        t, mx, my, tx, ty = load_stream(args.stream)
+        streams.append((args.stream, t, mx, my, tx, ty))
+    else:
+        for fps in args.fps:
+            t, tx, ty = synthetic_path(fps)
+            # What the pipeline sees: the path `latency` ago, plus landmark noise
+            delay = args.latency_ms / 1000.0
+            mx = np.interp(t - delay, t, tx) + rng.normal(0, args.noise, len(t))
+            my = np.interp(t - delay, t, ty) + rng.normal(0, args.noise, len(t))
+            streams.append((f"synthetic {fps}fps +{args.latency_ms:g}ms", t, mx, my, tx, ty))
+
+    filters = [("raw", None), ("ema 0.2 (legacy)", legacy_ema())]
+    for min_cutoff in args.min_cutoff:
+        for beta in args.beta:
+            for lead in args.lead_ms:
+                name = f"1euro mc={min_cutoff:g} b={beta:g}" + (f" lead={lead:g}ms" if lead else "")
+                filters.append((name, lambda mc=min_cutoff, b=beta, ld=lead: OneEuroFilter(min_cutoff=mc, beta=b, lead_ms=ld)))
+
+    rows = []
+    for stream_name, t, mx, my, tx, ty in streams:
+        for filter_name, make_filter in filters:
+            ox, oy = run_filter(make_filter, t, mx, my)
+            jitter, err, lag = metrics(t, ox, oy, tx, ty)
+            rows.append({"stream": stream_name, "filter": filter_name,
+                         "jitter_px": jitter, "err_px": err, "lag_ms": lag})
+
+    print_table("Cursor filter: jitter (still) vs error / lag (moving)", rows, COLUMNS)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+End-to-end gesture-to-action latency benchmark.
+
+Drives the real server.camera_loop with:
+  - ReplayCapture (paced frame source) instead of the webcam
+  - ScriptedLandmarker (scripted poses) instead of MediaPipe
+  - the recording "null" input backend instead of pyautogui inside ActionMap
+
+Each trial is: no hand (long enough to clear cooldown / single-trigger state),
+then a pose held for a while. Latency = time from the capture of the first
+frame showing the pose until the mapped keystroke reaches the input stub.
+This includes the confirmation window, inference, classification and dispatch.
+
+Usage:
+    python benchmarks/bench_gesture_latency.py [--window-ms 150 250] [--agreement 0.7] [--fps 15 30 60]
+                                               [--infer-ms 10] [--trials 5] [--glitch 0.0]
+                                               [--mode VIDEO LIVE_STREAM]
+"""
+import argparse
+import math
+import os
+import tempfile
+import threading
+
+from bench_utils import ROOT_DIR, percentile, print_table
+from stand_ins import POSES, ReplayCapture, ScriptedLandmarker, synth_hand
+
+import numpy as np
+
+# Null input backend before ActionMap is constructed (server builds it at import)
+from config import Config
+Config.INPUT_BACKEND = "null"
+
+import cv2
+import server
+from gesture_engine import GestureEngine
+from gesture_stabilizer import HandStabilizers
+
+input_stub = server.state.action_map.input
+
+# One-shot actions with distinct keystrokes, so each dispatch can be attributed
+GESTURE_ACTIONS = {
+    "open_palm": "copy",
+    "fist": "paste",
+    "peace": "screenshot",
+    "point": "ppt_next",
+    "three": "undo",
+    "thumb": "redo",
+}
+
+COLUMNS = ["setting", "gesture", "trials", "hits", "missed", "wrong", "mean_ms", "p50_ms", "p95_ms", "max_ms"]
+
+
+def build_engine(gestures, samples_per_gesture, rng):
+    """Trains a throwaway GestureEngine on synthetic poses."""
+    tmp = tempfile.NamedTemporaryFile(suffix=".json", delete=False)
+    tmp.close()
+    os.remove(tmp.name)
+    engine = GestureEngine(gestures_file=tmp.name)
+    for name in gestures:
+        for _ in range(samples_per_gesture):
+            engine.save_gesture(name, synth_hand(POSES[name], jitter=0.003, rng=rng))
+    return engine, tmp.name
+
+
+def action_signature(action):
+    """The (name, args) the input stub sees when `action` fires."""
+    input_stub.clear()
+    server.state.action_map.perform_action(action)
+    _, kind, events = input_stub.events[-1]
+    input_stub.clear()
+    return kind, events
+
+
+def build_script(gestures, trials, hold_frames, idle_frames, glitch, rng):
+    """
+    Returns (script, segments). script is one entry per frame (landmarks or None),
+    segments is [(gesture, first_frame, last_frame)] for each pose hold.
+    """
+    script, segments = [], []
+    others = list(POSES)
+    for _ in range(trials):
+        for name in gestures:
+            script.extend([None] * idle_frames)
+            start = len(script)
+            for _ in range(hold_frames):
+                pose = POSES[name]
+                # Single-frame misclassification glitches
+                if glitch and rng.random_sample() < glitch:
+                    pose = POSES[others[rng.randint(len(others))]]
+                wrist = (0.5 + rng.uniform(-0.05, 0.05), 0.8 + rng.uniform(-0.03, 0.03))
+                script.append(synth_hand(pose, wrist=wrist, jitter=0.004, rng=rng))
+            segments.append((name, start, len(script) - 1))
+    script.extend([None] * idle_frames)
+    return script, segments
+
+
+def run_setting(engine, gestures, signatures, mode, window_ms, agreement, fps, infer_ms, trials, glitch, frame, rng):
+    hold_frames = int(math.ceil(window_ms / 1000.0 * fps)) + max(8, int(0.4 * fps))
+    idle_frames = int(math.ceil((Config.ACTION_COOLDOWN + 0.2) * fps))
+    script, segments = build_script(gestures, trials, hold_frames, idle_frames, glitch, rng)
+
+    capture = ReplayCapture(frame, fps, len(script))
+    current_frame = lambda: len(capture.capture_times) - 1
+    loop_kwargs = {"capture_factory": capture, "max_frames": len(script)}
+    if mode == "LIVE_STREAM":
+        loop_kwargs["live_landmarker_factory"] = lambda cb: ScriptedLandmarker(
+            script, infer_ms=infer_ms, result_callback=cb, frame_index=current_frame)
+    else:
+        loop_kwargs["landmarker"] = ScriptedLandmarker(script, infer_ms=infer_ms, frame_index=current_frame)
+
+    # Fresh pipeline state for this run
+    Config.INFERENCE_MODE = mode
+    Config.FPS = fps
+    st = server.state
+    st.engine = engine
+    st.mode = "DETECT"
+    st.camera_active = True
+    st.last_action_time = 0
+    st.last_triggered = {}
+    st.stabilizers = HandStabilizers(window_ms=window_ms, agreement=agreement)
+    st.camera_needs_update = False
+    input_stub.clear()
+
+    t = threading.Thread(target=server.camera_loop, kwargs=loop_kwargs)
+    t.start()
+    t.join()
+
+    events = list(input_stub.events)
+    times = capture.capture_times
+    per_gesture = {g: {"lat": [], "missed": 0, "wrong": 0} for g in gestures}
+
+    for idx, (name, first, last) in enumerate(segments):
+        onset = times[first]
+        # Window ends when the next pose starts (keystroke may land during the idle gap)
+        end = times[segments[idx + 1][1]] if idx + 1 < len(segments) else float("inf")
+        hits = [(ev_t, kind, ev) for ev_t, kind, ev in events if onset <= ev_t < end]
+        expected = signatures[name]
+        good = [ev_t for ev_t, kind, ev in hits if (kind, ev) == expected]
+        per_gesture[name]["wrong"] += len(hits) - len(good)
+        if good:
+            per_gesture[name]["lat"].append((good[0] - onset) * 1000)
+        else:
+            per_gesture[name]["missed"] += 1
+
+    return per_gesture
+
+
+def summarize(setting, per_gesture, trials):
+    rows = []
+    all_lat = []
+    for name, data in per_gesture.items():
+        lat = data["lat"]
+        all_lat.extend(lat)
+        rows.append(_row(setting, name, trials, lat, data["missed"], data["wrong"]))
+    rows.append(_row(setting, "ALL", trials * len(per_gesture), all_lat,
+                     sum(d["missed"] for d in per_gesture.values()),
+                     sum(d["wrong"] for d in per_gesture.values())))
+    return rows
+
+
+def _row(setting, name, trials, lat, missed, wrong):
+    return {
+        "setting": setting, "gesture": name, "trials": trials, "hits": len(lat),
+        "missed": missed, "wrong": wrong,
+        "mean_ms": float(np.mean(lat)) if lat else 0.0,
+        "p50_ms": float(percentile(lat, 50)), "p95_ms": float(percentile(lat, 95)),
+        "max_ms": float(max(lat)) if lat else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gesture onset -> keystroke latency")
+    parser.add_argument("--window-ms", type=float, nargs="+", default=[150.0, 250.0], help="GESTURE_CONFIRM_WINDOW_MS values")
+    parser.add_argument("--agreement", type=float, nargs="+", default=[0.7], help="GESTURE_CONFIRM_AGREEMENT values")
+    parser.add_argument("--fps", type=int, nargs="+", default=[15, 30, 60], help="Camera frame rates")
+    parser.add_argument("--infer-ms", type=float, nargs="+", default=[10.0], help="Simulated inference time")
+    parser.add_argument("--mode", nargs="+", default=["VIDEO"], choices=["VIDEO", "LIVE_STREAM"], help="Config.INFERENCE_MODE")
+    parser.add_argument("--gestures", nargs="+", default=["open_palm", "fist", "peace", "point"], choices=list(POSES))
+    parser.add_argument("--trials", type=int, default=5, help="Holds per gesture per setting")
+    parser.add_argument("--glitch", type=float, default=0.0, help="Per-frame probability of a wrong pose")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.RandomState(args.seed)
+    engine, lib_path = build_engine(args.gestures, samples_per_gesture=5, rng=rng)
+
+    # Map only the benchmark gestures (in memory: the real config file is never written)
+    am = server.state.action_map
+    am.mapping = {g: GESTURE_ACTIONS[g] for g in args.gestures}
+    signatures = {g: action_signature(GESTURE_ACTIONS[g]) for g in args.gestures}
+
+    sample = cv2.imread(os.path.join(ROOT_DIR, "samples", "Two finger", "1768115062724.jpg"))
+    if sample is None:
+        sample = np.zeros((Config.CAMERA_HEIGHT, Config.CAMERA_WIDTH, 3), dtype=np.uint8)
+    frame = cv2.resize(sample, (Config.CAMERA_WIDTH, Config.CAMERA_HEIGHT))
+
+    # The scripted landmarker ignores its input image, so it can't honour ROI crops
+    Config.ROI_TRACKING = False
+    original = (Config.FPS, Config.INFERENCE_MODE)
+    rows = []
+    try:
+        for mode in args.mode:
+            for infer_ms in args.infer_ms:
+                for fps in args.fps:
+                    for window_ms in args.window_ms:
+                        for agreement in args.agreement:
+                            setting = f"{mode} win={window_ms:g}ms agr={agreement:g} fps={fps} inf={infer_ms:g}ms"
+                            print(f"Running {setting} ...")
+                            per_gesture = run_setting(engine, args.gestures, signatures, mode, window_ms, agreement,
+                                                      fps, infer_ms, args.trials, args.glitch, frame, rng)
+                            rows.extend(summarize(setting, per_gesture, args.trials))
+    finally:
+        Config.FPS, Config.INFERENCE_MODE = original
+        engine.store.flush() # Pending background write, so it can't recreate the file afterwards
+        for path in (lib_path, engine.model_file):
+            if os.path.exists(path):
+                os.remove(path)
+
+    print_table("Onset -> dispatch latency", rows, COLUMNS)
+
+
+if __name__ == "__main__":
+    main()
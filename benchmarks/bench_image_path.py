@@ -0,0 +1,184 @@
+"""
+Image-path microbenchmarks.
+
+Covers the heaviest per-request / per-frame image operations:
+  - augmentation_utils.augment_image (fast vs full)
+  - augmentation_utils.generate_augmentation_sprite (10..400 tiles)
+  - draw_utils.draw_styled_landmarks / draw_ui
+  - cv2.imencode as used by server.py (stream frames + API responses)
+  - the camera_loop capture path: per-frame allocations vs FrameBufferPool
+
+Inputs are the images in samples/, rescaled to 480p / 720p / 1080p.
+
+Usage:
+    python benchmarks/bench_image_path.py [--repeat N] [--quick]
+"""
+import argparse
+import glob
+import os
+from types import SimpleNamespace
+
+from bench_utils import ROOT_DIR, measure, print_table
+
+import cv2
+import numpy as np
+
+from augmentation_utils import augment_image, generate_augmentation_sprite
+from draw_utils import draw_styled_landmarks, draw_ui
+from frame_buffers import FrameBufferPool
+from hand_roi import HandROITracker
+from stand_ins import ReplayCapture
+
+RESOLUTIONS = {
+    "480p": (640, 480),
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+}
+SPRITE_COUNTS = [10, 50, 100, 200, 400]
+JPEG_QUALITIES = [50, 80, 85, 95]
+THEMES = ["DEFAULT", "CYBERPUNK", "MATRIX", "GOLD"]
+
+COLUMNS = ["case", "res", "mean_ms", "p50_ms", "p95_ms", "net_allocs", "net_kb", "peak_kb"]
+
+
+def load_sample_image():
+    """Returns the first readable image from samples/ (synthetic noise if none)."""
+    for path in sorted(glob.glob(os.path.join(ROOT_DIR, "samples", "*", "*.jpg"))):
+        img = cv2.imread(path)
+        if img is not None:
+            return img
+    print("[WARN] No sample images found, using synthetic frame")
+    return np.random.RandomState(0).randint(0, 255, (720, 1280, 3), dtype=np.uint8)
+
+
+def make_detection_result(num_hands=1):
+    """Mimics a HandLandmarkerResult with a plausible open-hand pose."""
+    rng = np.random.RandomState(1)
+    hands = []
+    for h in range(num_hands):
+        base_x = 0.35 + 0.3 * h
+        pts = [SimpleNamespace(x=base_x + rng.uniform(-0.15, 0.15),
+                               y=0.5 + rng.uniform(-0.25, 0.25),
+                               z=0.0) for _ in range(21)]
+        hands.append(pts)
+    return SimpleNamespace(hand_landmarks=hands)
+
+
+def bench_augment(frames, repeat):
+    rows = []
+    for res, frame in frames.items():
+        for fast in (True, False):
+            stats = measure(lambda: augment_image(frame, seed=0, fast=fast), repeat=repeat)
+            rows.append({"case": f"augment fast={fast}", "res": res, **stats})
+        # Thumbnail path used by /augment_raw?w=...
+        stats = measure(lambda: augment_image(frame, thumb_w=128, seed=0, fast=True), repeat=repeat)
+        rows.append({"case": "augment thumb_w=128", "res": res, **stats})
+    print_table("augment_image", rows, COLUMNS)
+
+
+def bench_sprite(image, repeat, counts):
+    rows = []
+    for count in counts:
+        # Sprites are slow at high counts, scale repeats down accordingly
+        reps = max(3, repeat * 10 // count)
+        stats = measure(lambda: generate_augmentation_sprite(image, count=count), repeat=reps, warmup=1)
+        rows.append({"case": f"sprite count={count}", "res": f"{image.shape[1]}x{image.shape[0]}", **stats})
+    print_table("generate_augmentation_sprite", rows, COLUMNS)
+
+
+def bench_draw(frames, repeat):
+    rows = []
+    result = make_detection_result()
+    rec_data = {
+        'typing_mode': False,
+        'name_input': "",
+        'last_saved': "Unknown",
+        'available_actions': ["volume_up", "volume_down", "screenshot"],
+        'stability_progress': 0.5,
+        'pending_gesture': "peace",
+    }
+    for res, frame in frames.items():
+        for theme in THEMES:
+            # Draw functions mutate in place, so work on a copy per call (copy cost is
+            # reported separately below)
+            stats = measure(lambda: draw_styled_landmarks(frame.copy(), result, theme), repeat=repeat)
+            rows.append({"case": f"landmarks {theme}", "res": res, **stats})
+        stats = measure(lambda: frame.copy(), repeat=repeat)
+        rows.append({"case": "frame.copy (baseline)", "res": res, **stats})
+        for mode in ("DETECT", "RECORD", "SELECT_ACTION"):
+            data = dict(rec_data, typing_mode=(mode == "RECORD"))
+            stats = measure(lambda: draw_ui(frame.copy(), mode, None, "volume_up", data), repeat=repeat)
+            rows.append({"case": f"draw_ui {mode}", "res": res, **stats})
+    print_table("draw_utils", rows, COLUMNS)
+
+
+def bench_encode(frames, repeat):
+    rows = []
+    for res, frame in frames.items():
+        # Default quality, as in camera_loop -> /video_feed
+        stats = measure(lambda: cv2.imencode('.jpg', frame)[1].tobytes(), repeat=repeat)
+        rows.append({"case": "imencode default+tobytes", "res": res, **stats})
+        for q in JPEG_QUALITIES:
+            params = [int(cv2.IMWRITE_JPEG_QUALITY), q]
+            stats = measure(lambda: cv2.imencode('.jpg', frame, params), repeat=repeat)
+            rows.append({"case": f"imencode q={q}", "res": res, **stats})
+    print_table("cv2.imencode", rows, COLUMNS)
+
+
+def bench_capture(frames, repeat):
+    """read -> flip -> BGR2RGB -> JPEG, allocating per frame vs reusing buffers."""
+    rows = []
+    for res, frame in frames.items():
+        # fps is irrelevant here, a huge value disables pacing
+        cap = ReplayCapture(frame, fps=1e9, num_frames=10 ** 9)
+
+        def legacy():
+            _, f = cap.read()
+            f = cv2.flip(f, 1)
+            cv2.cvtColor(f, cv2.COLOR_BGR2RGB)
+            return cv2.imencode('.jpg', f)[1].tobytes()
+
+        pool = FrameBufferPool(slots=2)
+        tracker = HandROITracker(enabled=False, inference_width=0)
+
+        def pooled():
+            _, f = pool.read(cap)
+            tracker.prepare(f)
+            return memoryview(cv2.imencode('.jpg', f)[1].reshape(-1))
+
+        stats = measure(legacy, repeat=repeat)
+        rows.append({"case": "capture legacy", "res": res, **stats, "allocs/frame": 5.0})
+        stats = measure(pooled, repeat=repeat)
+        per_frame = pool.allocs_per_frame(tracker.stats["allocs"]) + 1
+        rows.append({"case": "capture pooled", "res": res, **stats, "allocs/frame": per_frame})
+    print_table("camera_loop capture path", rows, COLUMNS + ["allocs/frame"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Image path microbenchmarks")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed iterations per case")
+    parser.add_argument("--quick", action="store_true", help="480p only, small sprite counts")
+    parser.add_argument("--only", choices=["augment", "sprite", "draw", "encode", "capture"], help="Run a single group")
+    args = parser.parse_args()
+
+    image = load_sample_image()
+    resolutions = {"480p": RESOLUTIONS["480p"]} if args.quick else RESOLUTIONS
+    frames = {res: cv2.resize(image, size, interpolation=cv2.INTER_LINEAR) for res, size in resolutions.items()}
+    counts = SPRITE_COUNTS[:2] if args.quick else SPRITE_COUNTS
+
+    print(f"OpenCV {cv2.__version__} | NumPy {np.__version__} | threads={cv2.getNumThreads()}")
+
+    if args.only in (None, "augment"):
+        bench_augment(frames, args.repeat)
+    if args.only in (None, "sprite"):
+        bench_sprite(image, args.repeat, counts)
+    if args.only in (None, "draw"):
+        bench_draw(frames, args.repeat)
+    if args.only in (None, "encode"):
+        bench_encode(frames, args.repeat)
+    if args.only in (None, "capture"):
+        bench_capture(frames, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
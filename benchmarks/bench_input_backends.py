@@ -0,0 +1,82 @@
+"""
+Input backend benchmark: per-event injection latency on one recorded action stream.
+
+Records the input produced by a fixed set of ActionMap actions (hotkeys,
+key presses, clicks, scrolls, typing and a run of cursor moves) with the
+null backend, then replays that exact stream through each requested backend
+and reports the cost per injection and per low-level event.
+
+Only the null backend is run by default: the others send real keystrokes
+and move the real cursor, so only enable them on a machine you don't mind
+poking (e.g. an empty desktop or a nested X server).
+
+Usage:
+    python benchmarks/bench_input_backends.py [--backends null pyautogui xdotool uinput] [--repeat 3]
+                                              [--moves 120]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+
+from bench_utils import print_table
+
+from config import Config
+Config.INPUT_BACKEND = "null"
+Config.CURSOR_DRIVER_HZ = 0 # Moves straight from track_cursor, so they are recorded in order
+
+from action_map import ActionMap
+from input_backend import BACKENDS
+from stand_ins import POSES, synth_hand
+
+# Harmless actions only (no launchers / power / window management)
+ACTIONS = ["copy", "paste", "undo", "redo", "select_all", "zoom_in", "zoom_out", "arrow_left", "arrow_right",
+           "page_down", "page_up", "esc", "scroll_up", "scroll_down", "left_click", "double_click", "type:hello world"]
+
+COLUMNS = ["backend", "kind", "count", "events", "mean_ms", "per_event_us", "max_ms"]
+
+
+def record_stream(moves):
+    """The low-level input of ACTIONS plus a cursor sweep, as [(t, kind, events), ...]."""
+    config_dir = tempfile.mkdtemp()
+    action_map = ActionMap(config_file=os.path.join(config_dir, "action_config.json"))
+    recorder = action_map.input
+    for action in ACTIONS:
+        action_map.perform_action(action)
+    for i in range(moves):
+        # Sweep the hand across the screen
+        hand = synth_hand(POSES["point"], wrist=(0.3 + 0.4 * i / moves, 0.8))
+        action_map.perform_action("track_cursor", hand)
+    # The default mapping is written in the background: flush it so nothing lands in the removed directory
+    action_map.store.flush()
+    shutil.rmtree(config_dir, ignore_errors=True)
+    return list(recorder.events)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Input backend injection latency")
+    parser.add_argument("--backends", nargs="+", default=["null"], choices=sorted(BACKENDS))
+    parser.add_argument("--repeat", type=int, default=3, help="Replays of the stream per backend")
+    parser.add_argument("--moves", type=int, default=120, help="Cursor moves in the stream")
+    args = parser.parse_args()
+
+    stream = record_stream(args.moves)
+    print(f"Recorded stream: {len(stream)} injections, {sum(len(ev) for _, _, ev in stream)} events")
+
+    rows = []
+    for name in args.backends:
+        cls = BACKENDS[name]
+        if not cls.available():
+            print(f"Skipping {name}: not available here")
+            continue
+        backend = cls()
+        for _ in range(args.repeat):
+            backend.replay(stream)
+        for row in backend.latency():
+            rows.append(dict(row, backend=name))
+
+    print_table("Injection latency per kind", rows, COLUMNS)
+
+
+if __name__ == "__main__":
+    main()
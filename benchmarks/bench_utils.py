@@ -0,0 +1,74 @@
+import os
+import sys
+import time
+import tracemalloc
+
+# Benchmarks live one level below the app modules
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+
+def measure(fn, repeat=20, warmup=2):
+    """
+    Runs fn() `repeat` times and returns timing + memory stats.
+    Time is measured without tracemalloc (it slows allocation-heavy code a lot),
+    then a second traced pass records peak memory and the allocations still
+    alive after the call (net_allocs / net_kb).
+    """
+    for _ in range(warmup):
+        fn()
+
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+
+    # Allocation pass (single call is enough, allocations are deterministic per call)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    diff = after.compare_to(before, 'filename')
+    allocs = sum(max(d.count_diff, 0) for d in diff)
+    alloc_bytes = sum(max(d.size_diff, 0) for d in diff)
+
+    times.sort()
+    return {
+        "mean_ms": sum(times) / len(times) * 1000,
+        "p50_ms": times[len(times) // 2] * 1000,
+        "p95_ms": times[min(len(times) - 1, int(len(times) * 0.95))] * 1000,
+        "net_allocs": allocs,
+        "net_kb": alloc_bytes / 1024,
+        "peak_kb": peak / 1024,
+    }
+
+
+def percentile(values, q):
+    """Nearest-rank percentile, q in [0, 100]."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(q / 100.0 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+def print_table(title, rows, columns):
+    """Prints rows (list of dicts) as a fixed-width table."""
+    print(f"\n=== {title} ===")
+    widths = {c: max([len(c)] + [len(_fmt(r.get(c))) for r in rows]) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    print("  ".join("-" * widths[c] for c in columns))
+    for r in rows:
+        print("  ".join(_fmt(r.get(c)).ljust(widths[c]) for c in columns))
+
+
+def _fmt(value):
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
@@ -0,0 +1,109 @@
+"""
+Voice command matching benchmark: phrase trie vs linear scan.
+
+Builds grammars of --phrases sizes (the built-in phrases plus random 2-4 word
+phrases, a tenth of them ending in a <slot>) and times, per utterance:
+  - hit:  an utterance that is one of the phrases
+  - slot: a slot phrase followed by free text ("open <app>" -> "open spotify")
+  - miss: ordinary dictation, which falls through to typing
+for the compiled trie (voice_commands.CommandGrammar) and for a linear scan
+over every phrase (what matching without compilation costs). compile_ms is
+the one-off trie build at load time.
+
+Usage:
+    python benchmarks/bench_voice_commands.py [--phrases 100 1000 10000] [--queries 2000]
+"""
+import argparse
+import random
+import time
+
+from bench_utils import print_table
+
+from voice_commands import DEFAULT_GRAMMAR, SLOT_RE, CommandGrammar, tokenize
+
+COLUMNS = ["phrases", "matcher", "compile_ms", "hit_us", "slot_us", "miss_us"]
+WORDS = ("alpha bravo charlie delta echo foxtrot golf hotel india juliet kilo lima mike november oscar "
+         "papa quebec romeo sierra tango uniform victor whiskey xray yankee zulu slide tab window song").split()
+DICTATION = ["please send the report to the team by friday",
+             "i think we should meet tomorrow morning",
+             "the quick brown fox jumps over the lazy dog"]
+
+
+def build_grammar(size, rng):
+    grammar = dict(DEFAULT_GRAMMAR)
+    while len(grammar) < size:
+        words = rng.sample(WORDS, rng.randint(2, 4))
+        if rng.random() < 0.1:
+            words[-1] = "<target>"
+        grammar[" ".join(words)] = "cmd:{target}" if words[-1] == "<target>" else "copy"
+    return grammar
+
+
+class LinearMatcher:
+    """Reference: compare the utterance against every phrase in turn."""
+    def __init__(self, grammar):
+        self.phrases = []
+        for phrase, action in grammar.items():
+            words = phrase.split()
+            slot = SLOT_RE.match(words[-1])
+            self.phrases.append((words[:-1] if slot else words, bool(slot), action))
+
+    def match(self, text):
+        tokens = tokenize(text)
+        best = None
+        for words, slot, action in self.phrases:
+            if slot:
+                if len(tokens) > len(words) and tokens[:len(words)] == words:
+                    best = best or action
+            elif tokens == words:
+                return action
+        return best
+
+
+def per_call_us(fn, queries):
+    start = time.perf_counter()
+    for q in queries:
+        fn(q)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Voice command matching: trie vs linear scan")
+    parser.add_argument("--phrases", type=int, nargs="+", default=[100, 1000, 10000], help="Grammar sizes")
+    parser.add_argument("--queries", type=int, default=2000, help="Utterances timed per kind")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rows = []
+    for size in args.phrases:
+        grammar = build_grammar(size, rng)
+        literal = [p for p in grammar if "<" not in p]
+        slots = [p for p in grammar if "<" in p]
+        queries = {
+            "hit": [rng.choice(literal) for _ in range(args.queries)],
+            "slot": [rng.choice(slots).rsplit(" ", 1)[0] + " spotify music" for _ in range(args.queries)],
+            "miss": [rng.choice(DICTATION) for _ in range(args.queries)],
+        }
+
+        start = time.perf_counter()
+        trie = CommandGrammar(grammar)
+        compile_ms = (time.perf_counter() - start) * 1000.0
+        linear = LinearMatcher(grammar)
+
+        # Same answers on plain phrases and dictation, or the timing comparison is meaningless
+        for q in queries["hit"][:200] + queries["miss"][:200]:
+            found = trie.match(q)
+            assert (found.action if found else None) == linear.match(q), q
+
+        for name, fn, compile_cost in (("trie", trie.match, compile_ms), ("linear", linear.match, None)):
+            row = {"phrases": len(grammar), "matcher": name, "compile_ms": compile_cost}
+            for kind, items in queries.items():
+                row[f"{kind}_us"] = per_call_us(fn, items)
+            rows.append(row)
+
+    print_table("Voice command matching (per utterance)", rows, COLUMNS)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Stand-ins for the hardware/OS edges of the pipeline, so the real camera_loop
+can be replayed deterministically:
+  - ReplayCapture:       cv2.VideoCapture replacement paced at a fixed FPS
+  - ScriptedLandmarker:  HandLandmarker replacement returning scripted landmarks
+  - synth_hand:          builds 21 plausible landmarks from per-finger curl
+"""
+import math
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+# Finger direction from wrist (degrees, image coords: -90 = straight up)
+_FINGER_DIRS = [-150, -105, -90, -75, -60]  # thumb, index, middle, ring, pinky
+_BASE_LEN = [0.06, 0.12, 0.125, 0.12, 0.11]
+_SEG_LEN = [0.05, 0.035, 0.03]
+
+# Curl per finger (degrees per joint). 0 = straight, ~70 = folded
+POSES = {
+    "open_palm": [0, 0, 0, 0, 0],
+    "fist":      [60, 75, 75, 75, 75],
+    "peace":     [60, 0, 0, 75, 75],
+    "point":     [60, 0, 75, 75, 75],
+    "three":     [60, 0, 0, 0, 75],
+    "thumb":     [0, 75, 75, 75, 75],
+}
+
+
+def synth_hand(curls, wrist=(0.5, 0.8), scale=1.0, jitter=0.0, rng=None):
+    """Returns 21 landmark objects (.x/.y/.z) in MediaPipe order."""
+    rng = rng or np.random
+    pts = [None] * 21
+    pts[0] = (wrist[0], wrist[1])
+    for f, (direction, curl) in enumerate(zip(_FINGER_DIRS, curls)):
+        base = 1 + f * 4
+        theta = math.radians(direction)
+        x = wrist[0] + math.cos(theta) * _BASE_LEN[f] * scale
+        y = wrist[1] + math.sin(theta) * _BASE_LEN[f] * scale
+        pts[base] = (x, y)
+        # Thumb folds the other way across the palm
+        bend = math.radians(curl) * (-1 if f == 0 else 1)
+        for j, seg in enumerate(_SEG_LEN):
+            theta += bend
+            x += math.cos(theta) * seg * scale
+            y += math.sin(theta) * seg * scale
+            pts[base + 1 + j] = (x, y)
+
+    out = []
+    for x, y in pts:
+        if jitter:
+            x += rng.uniform(-jitter, jitter)
+            y += rng.uniform(-jitter, jitter)
+        out.append(SimpleNamespace(x=float(x), y=float(y), z=0.0))
+    return out
+
+
+class ReplayCapture:
+    """
+    Mimics cv2.VideoCapture. Emits `frame` every 1/fps seconds (wall clock)
+    and records the capture time of every frame index in `capture_times`.
+    """
+    def __init__(self, frame, fps, num_frames):
+        self.frame = frame
+        self.interval = 1.0 / fps
+        self.num_frames = num_frames
+        self.capture_times = []
+        self._next_due = None
+
+    def __call__(self, index=0):
+        # Used as capture_factory: camera_loop calls it with the camera index
+        return self
+
+    def isOpened(self):
+        return True
+
+    def set(self, prop, value):
+        return True
+
+    def release(self):
+        pass
+
+    def read(self, image=None):
+        if len(self.capture_times) >= self.num_frames:
+            return False, None
+        now = time.perf_counter()
+        if self._next_due is None:
+            self._next_due = now
+        # A real camera delivers at its own cadence, regardless of how slow we are
+        if now < self._next_due:
+            time.sleep(self._next_due - now)
+        self._next_due += self.interval
+        if self._next_due < time.perf_counter():
+            self._next_due = time.perf_counter()
+        self.capture_times.append(time.perf_counter())
+        # Like OpenCV: fill the caller's buffer when it fits, else allocate
+        if image is not None and image.shape == self.frame.shape:
+            np.copyto(image, self.frame)
+            return True, image
+        return True, self.frame.copy()
+
+
+class ScriptedLandmarker:
+    """
+    Mimics HandLandmarker. Each call returns the scripted entry for the current
+    frame: a landmark list, or None for "no hand".
+
+    frame_index() tells which script entry is "on camera" (defaults to the call
+    count, which matches VIDEO mode). In LIVE_STREAM mode (result_callback set)
+    detect_async runs on a helper thread and, like MediaPipe, drops frames that
+    arrive while the previous one is still being processed.
+    """
+    def __init__(self, script, infer_ms=0.0, result_callback=None, frame_index=None):
+        self.script = script
+        self.infer_s = infer_ms / 1000.0
+        self.result_callback = result_callback
+        self.frame_index = frame_index
+        self.calls = 0
+        self._busy = False
+        self._lock = threading.Lock()
+
+    def _next_result(self):
+        idx = self.frame_index() if self.frame_index else self.calls
+        self.calls += 1
+        entry = self.script[idx] if 0 <= idx < len(self.script) else None
+        return SimpleNamespace(hand_landmarks=[entry] if entry else [],
+                               handedness=[] if not entry else [[SimpleNamespace(category_name="Right", score=1.0)]])
+
+    def detect_for_video(self, image, timestamp_ms):
+        if self.infer_s:
+            time.sleep(self.infer_s)
+        return self._next_result()
+
+    def detect_async(self, image, timestamp_ms):
+        with self._lock:
+            if self._busy:
+                return
+            self._busy = True
+            result = self._next_result()
+        threading.Thread(target=self._run_async, args=(result, image, timestamp_ms), daemon=True).start()
+
+    def _run_async(self, result, image, timestamp_ms):
+        if self.infer_s:
+            time.sleep(self.infer_s)
+        with self._lock:
+            self._busy = False
+        self.result_callback(result, image, timestamp_ms)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,327 @@
+import logging
+import os
+import re
+import shutil
+import subprocess
+import time
+import webbrowser
+from collections import namedtuple
+from urllib.parse import quote
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+URL_RE = re.compile(r'^(http|www\.|[a-z0-9]+\.[a-z]{2,})')
+BROWSER_SUFFIX_RE = re.compile(r'\s+in\s+((google\s+)?chrome|firefox|(microsoft\s+)?edge|browser)')
+CLOSE_PREFIXES = ("close ", "exit ", "kill ")
+
+# Browser named in "... in chrome" -> webbrowser controller name
+BROWSERS = [
+    (("in google chrome", "in chrome"), "google-chrome"),
+    (("in firefox",), "firefox"),
+    (("in edge",), "windows-default"),
+]
+
+# Friendly name -> process image, for "close <app>"
+# Use 'tasklist' manually to find these if unsure
+PROC_MAP = {
+    "chrome": "chrome.exe",
+    "google chrome": "chrome.exe",
+    "browser": "chrome.exe",
+    "firefox": "firefox.exe",
+    "edge": "msedge.exe",
+    "microsoft edge": "msedge.exe",
+    "notepad": "notepad.exe",
+    "calculator": "CalculatorApp.exe",
+    "calc": "CalculatorApp.exe",
+    "whatsapp": "WhatsApp.exe",
+    "spotify": "Spotify.exe",
+    "vlc": "vlc.exe",
+    "media player": "vlc.exe",
+    "word": "WINWORD.EXE",
+    "winword": "WINWORD.EXE",
+    "microsoft word": "WINWORD.EXE",
+    "excel": "EXCEL.EXE",
+    "microsoft excel": "EXCEL.EXE",
+    "powerpoint": "POWERPNT.EXE",
+    "ppt": "POWERPNT.EXE",
+    "microsoft powerpoint": "POWERPNT.EXE",
+    "vs code": "Code.exe",
+    "vscode": "Code.exe",
+    "code": "Code.exe",
+    "teams": "Teams.exe",
+    "microsoft teams": "Teams.exe",
+    "slack": "slack.exe",
+    "discord": "Discord.exe",
+    "zoom": "Zoom.exe",
+    "paint": "mspaint.exe",
+    "settings": "SystemSettings.exe",
+    "explorer": "explorer.exe",
+    "file explorer": "explorer.exe",
+    "cmd": "cmd.exe",
+    "command prompt": "cmd.exe",
+    "powershell": "powershell.exe",
+    "task manager": "Taskmgr.exe",
+    # UWP Apps (Tricky, sometimes hosted in ApplicationFrameHost, but often have specific exe)
+    "store": "WinStore.App.exe",
+    "microsoft store": "WinStore.App.exe",
+    "photos": "Microsoft.Photos.exe",
+    "camera": "WindowsCamera.exe",
+    "snipping tool": "SnippingTool.exe"
+}
+
+# Shortcuts (Mixed Web/App)
+# For apps that have a web version, we list the LOCAL protocol first or just the name.
+SHORTCUTS = {
+    "youtube": "https://youtube.com",
+    "google": "https://google.com",
+    "facebook": "https://facebook.com",
+    "instagram": "https://instagram.com",
+    "whatsapp": "whatsapp:",
+    "whatsapp web": "https://web.whatsapp.com",
+    "whatsweb": "https://web.whatsapp.com",
+    "spotify": "spotify:",
+    "gmail": "https://mail.google.com",
+    "chatgpt": "https://chatgpt.com",
+
+    # Dev Tools
+    "vs code": "code",
+    "vscode": "code",
+    "code": "code",
+    "cmd": "cmd",
+    "command prompt": "cmd",
+    "powershell": "powershell",
+
+    # Office
+    "word": "winword",
+    "microsoft word": "winword",
+    "excel": "excel",
+    "microsoft excel": "excel",
+    "powerpoint": "powerpnt",
+    "ppt": "powerpnt",
+    "microsoft powerpoint": "powerpnt",
+
+    # Utilities
+    "calculator": "calc",
+    "calc": "calc",
+    "notepad": "notepad",
+    "paint": "mspaint",
+    "explorer": "explorer",
+    "file explorer": "explorer",
+    "task manager": "taskmgr",
+    "snipping tool": "snippingtool",
+
+    # Windows Settings / UWP using Protocols (Safest way to launch)
+    "settings": "ms-settings:",
+    "store": "ms-windows-store:",
+    "app store": "ms-windows-store:",
+    "microsoft store": "ms-windows-store:",
+    "ms store": "ms-windows-store:",
+    "camera": "microsoft.windows.camera:",
+    "photos": "ms-photos:",
+    "clock": "ms-clock:",
+    "alarm": "ms-clock:",
+    "todo": "ms-todo:",
+    "weather": "bingweather:",
+    "maps": "bingmaps:"
+}
+
+# App asked for but missing locally -> web version
+WEB_FALLBACKS = {
+    "whatsapp": "https://web.whatsapp.com",
+    "spotify": "https://open.spotify.com",
+}
+
+# One step of a plan. kind: url (target = URL, browser = controller name or None),
+# kill (target = process image), launch (target = exe path / protocol / app name)
+LaunchStep = namedtuple('LaunchStep', ['kind', 'target', 'browser'])
+# Steps are tried in order until one succeeds
+LaunchPlan = namedtuple('LaunchPlan', ['command', 'steps', 'resolved_at', 'path_env'])
+
+
+class CommandRouter:
+    """
+    Turns "cmd:" mapping text into launch plans once, instead of re-parsing on every trigger.
+
+    resolve() walks the same rules as before (explicit URL, close <app>,
+    "... in <browser>", shortcut table, executable on PATH, URL-like, generic
+    launch, web fallback, search) and records the outcome as a list of steps.
+    compile() resolves every cmd: entry of a mapping up front; run() looks
+    the plan up and executes it.
+
+    shutil.which results are cached. A plan (and the cache) goes stale when
+    PATH changes or after Config.CMD_WHICH_TTL_S, so newly installed apps are
+    picked up; invalidate() drops everything at once.
+    """
+    def __init__(self, launch_local=None):
+        self.launch_local = launch_local or self._launch_local
+        self.plans = {}
+        self._which = {}
+        self._browsers = {}
+        self.stats = {"resolved": 0, "runs": 0, "plan_hits": 0, "which_hits": 0, "which_misses": 0}
+
+    # --- Caches ---
+    def invalidate(self):
+        self._which.clear()
+        self._browsers.clear()
+        self.plans.clear()
+
+    def which(self, name):
+        now = time.monotonic()
+        entry = self._which.get(name)
+        if entry is not None and now - entry[1] < Config.CMD_WHICH_TTL_S and entry[2] == os.environ.get("PATH"):
+            self.stats["which_hits"] += 1
+            return entry[0]
+        self.stats["which_misses"] += 1
+        path = shutil.which(name)
+        self._which[name] = (path, now, os.environ.get("PATH"))
+        return path
+
+    def _browser(self, name):
+        """webbrowser controller name if it is registered here, else None."""
+        if name not in self._browsers:
+            try:
+                webbrowser.get(name)
+                self._browsers[name] = name
+            except Exception:
+                self._browsers[name] = None
+        return self._browsers[name]
+
+    def _stale(self, plan):
+        return (plan.path_env != os.environ.get("PATH")
+                or time.monotonic() - plan.resolved_at >= Config.CMD_WHICH_TTL_S)
+
+    # --- Resolution ---
+    def resolve(self, cmd):
+        """LaunchPlan for one command text. Pure: nothing is launched."""
+        cmd = cmd.strip()
+        lower_cmd = cmd.lower()
+        self.stats["resolved"] += 1
+        plan = lambda *steps: LaunchPlan(cmd, list(steps), time.monotonic(), os.environ.get("PATH"))
+
+        # 1. URL Detection (Prioritize explicit URLs)
+        if URL_RE.match(lower_cmd):
+            return plan(LaunchStep("url", cmd if lower_cmd.startswith('http') else 'https://' + cmd, None))
+
+        # 2. "Close [target]"
+        for prefix in CLOSE_PREFIXES:
+            if lower_cmd.startswith(prefix):
+                target = lower_cmd[len(prefix):].strip()
+                proc_name = PROC_MAP.get(target)
+                # Not in the map: try the target as the process name directly (heuristic)
+                if not proc_name and " " not in target:
+                    proc_name = f"{target}.exe"
+                # Unknown multi-word app: do nothing rather than fall back to Search
+                return plan(LaunchStep("kill", proc_name, None)) if proc_name else plan()
+
+        # 3. "Open [target] in [browser]"
+        browser = None
+        for phrases, name in BROWSERS:
+            if any(p in lower_cmd for p in phrases):
+                browser = self._browser(name)
+                break
+        target = BROWSER_SUFFIX_RE.sub('', lower_cmd).strip()
+        if target.startswith("open "):
+            target = target[5:].strip()
+        matched = SHORTCUTS.get(target)
+        url_like = '.' in target and ' ' not in target
+
+        # PATH A: a browser was named -> strictly web (URL or search)
+        if browser:
+            if matched and matched.startswith("http"):
+                url = matched
+            elif url_like:
+                url = 'https://' + target
+            else:
+                url = f"https://www.google.com/search?q={quote(target)}"
+            return plan(LaunchStep("url", url, browser))
+
+        # PATH B: local app preferred
+        steps = []
+        if matched:
+            if matched.startswith("http"):
+                return plan(LaunchStep("url", matched, None))
+            steps.append(LaunchStep("launch", self.which(matched) or matched, None))
+        executable = self.which(target)
+        if executable:
+            steps.append(LaunchStep("launch", executable, None))
+        if url_like:
+            steps.append(LaunchStep("url", 'https://' + target, None))
+        else:
+            # Not on PATH, but may still be registered ("open figma")
+            steps.append(LaunchStep("launch", target, None))
+            if target in WEB_FALLBACKS:
+                steps.append(LaunchStep("url", WEB_FALLBACKS[target], None))
+            # Last resort: search
+            steps.append(LaunchStep("url", f"https://www.google.com/search?q={quote(cmd)}", None))
+        return plan(*steps)
+
+    def compile(self, *mappings):
+        """Resolves every "cmd:" action in one or more gesture -> action mappings."""
+        self.plans = {}
+        for mapping in mappings:
+            for action in mapping.values():
+                if isinstance(action, str) and action.startswith("cmd:"):
+                    command = action[4:].strip()
+                    if command not in self.plans:
+                        self.plans[command] = self.resolve(command)
+        return self.plans
+
+    def plan_for(self, cmd):
+        cmd = cmd.strip()
+        plan = self.plans.get(cmd)
+        if plan is None or self._stale(plan):
+            plan = self.plans[cmd] = self.resolve(cmd)
+        else:
+            self.stats["plan_hits"] += 1
+        return plan
+
+    def dry_run(self, cmd):
+        """What run() would do for `cmd`, as JSON-friendly data (nothing is launched)."""
+        plan = self.resolve(cmd)
+        return {"command": plan.command,
+                "steps": [{"kind": s.kind, "target": s.target, "browser": s.browser} for s in plan.steps]}
+
+    # --- Execution ---
+    def run(self, cmd):
+        """Executes the plan for `cmd`. Returns True if a step succeeded (or there was nothing to do)."""
+        plan = self.plan_for(cmd)
+        self.stats["runs"] += 1
+        for step in plan.steps:
+            if self._run_step(step):
+                return True
+        return not plan.steps
+
+    def _run_step(self, step):
+        try:
+            if step.kind == "url":
+                if step.browser:
+                    webbrowser.get(step.browser).open(step.target)
+                else:
+                    webbrowser.open(step.target)
+                return True
+            if step.kind == "kill":
+                logger.info(f"Closing process: {step.target}")
+                # /IM = Image Name, /F = Force
+                subprocess.Popen(f"taskkill /IM {step.target} /F", shell=True)
+                return True
+            if step.kind == "launch":
+                return self.launch_local(step.target)
+        except Exception as e:
+            logger.error(f"Command step {step.kind} {step.target} failed: {e}")
+        return False
+
+    @staticmethod
+    def _launch_local(target):
+        """PowerShell Start-Process (brings the window to the front), os.startfile as fallback."""
+        try:
+            safe_cmd = target.replace("'", "''") # Escape for PS
+            subprocess.Popen(["powershell", "-Command", f"Start-Process '{safe_cmd}' -WindowStyle Normal"], shell=True)
+            return True
+        except Exception:
+            try:
+                os.startfile(target)
+                return True
+            except Exception:
+                return False
@@ -9,15 +9,92 @@ class Config:
 
     # Model Settings
     MODEL_ASSET_PATH = 'hand_landmarker.task'
-    NUM_HANDS = 1
+    NUM_HANDS = 1 # > 1: every hand is classified (batched) and confirmed separately
     MIN_HAND_DETECTION_CONFIDENCE = 0.5
     MIN_HAND_PRESENCE_CONFIDENCE = 0.5
     MIN_TRACKING_CONFIDENCE = 0.5
     MODEL_COMPLEXITY = 0 # 0=Lite, 1=Full. Lite is much faster for older CPUs.
 
+    # Pipeline
+    INFERENCE_MODE = "VIDEO" # VIDEO = blocking per frame, LIVE_STREAM = detect_async (capture keeps going)
+    ASYNC_MAX_IN_FLIGHT = 2 # LIVE_STREAM: frames allowed to wait for a result
+    INFERENCE_PROCESS = False # Run capture + HandLandmarker in a worker process (multi-core)
+    SHM_RING_SLOTS = 4 # Shared-memory frame slots between worker and server
+    SHM_MAX_WIDTH = 1920 # Slot size caps the capture resolution in worker mode
+    SHM_MAX_HEIGHT = 1080
+
+    FRAME_BUFFER_SLOTS = 2 # Preallocated capture buffers reused every frame
+
+    # Inference Input
+    INFERENCE_WIDTH = 640 # Wider captures are downscaled before inference (0 = native)
+    ROI_TRACKING = True # Run detection on a crop around the last known hand (NUM_HANDS == 1)
+    ROI_PADDING = 0.5 # Crop padding, as a fraction of hand size per side
+    ROI_MIN_SIZE = 0.3 # Smallest crop, as a fraction of the shorter frame side
+    ROI_INFERENCE_SIZE = 256 # Crops are downscaled to at most this many pixels per side
+
     # Gesture Logic
-    GESTURE_STABILITY_FRAMES = 3  # Frames gesture must be held to confirm
+    GESTURE_CONFIRM_WINDOW_MS = 250 # Vote window for confirming a gesture (frame-rate independent)
+    GESTURE_CONFIRM_AGREEMENT = 0.7 # Share of votes in the window that must agree
+    GESTURE_CONFIRM_MIN_VOTES = 2 # Never confirm on a single frame
+    GESTURE_CONFIDENCE_SPEEDUP = 0.5 # Confident matches need up to this much less hold, borderline ones more
+    GESTURE_SCORES_TOP_K = 3 # Scored candidates pushed to the status stream
+    GESTURE_RADIUS_QUANTILE = 0.95 # Per-gesture radius from this quantile of intra-class NN distances
+    GESTURE_RADIUS_SCALE = 1.5 # Head-room on top of that quantile
+    GESTURE_RADIUS_MIN = 0.15 # Floor, so very tight gestures still tolerate some noise
+    GESTURE_RADIUS_MAX_SCALE = 1.5 # Ceiling, as a multiple of the global match threshold (spread-out gestures)
+    GESTURE_MARGIN_FRACTION = 0.25 # Pairwise ambiguity margin, as a fraction of the typical gap between two gestures
+    GESTURE_MARGIN_MIN = 0.02
+    GESTURE_CLASSIFIER = "knn" # knn = nearest stored sample, centroid = compiled LDA model (O(classes x d) per frame)
+    GESTURE_MODEL_SHRINKAGE = 0.2 # Covariance shrinkage toward identity (few samples per gesture)
+    GESTURE_MODEL_MIN_POSTERIOR = 0.8 # Centroid mode: below this the match counts as ambiguous
+    GESTURE_MODEL_CV_FOLDS = 5 # k-fold accuracy reported next to KNN's LOOCV
     ACTION_COOLDOWN = 0.5  # Seconds between actions
+    CMD_WHICH_TTL_S = 300 # cmd: launch plans / PATH lookups are re-resolved after this (or when PATH changes)
+    LAUNCHER = "auto" # auto (direct os.startfile on Windows, warm /bin/sh elsewhere) | direct | powershell (warm, opt-in) | shell | stub
+    LAUNCH_ACK_TIMEOUT_S = 0.5 # Warm helpers: how long launch() waits for the spawn ack before assuming success
+    LAUNCH_WORKERS = 2 # Background threads for app launches / shell commands
+    LAUNCH_MAX_PENDING = 8 # Launches queued beyond this are dropped
+    MACRO_MAX_QUEUED = 4 # macro: actions waiting behind the running one
+    MACRO_TYPE_INTERVAL = 0.01 # Seconds between characters of a macro's "type" step
+    INPUT_BACKEND = "auto" # auto (uinput where available, else pyautogui) | native (uinput or xdotool) | pyautogui | xdotool | uinput | null
+    STORE_WRITE_DELAY_S = 0.5 # action_config.json / gestures.json: edits within this window are written once
+    STORE_POLL_INTERVAL_S = 1.0 # How often the files are checked for outside edits (hot reload), 0 = never
+    CONTEXT_PROVIDER = "auto" # Foreground window for profiles: auto (win32 / xdotool) | win32 | xdotool | stub
+    CONTEXT_POLL_INTERVAL_S = 0.5 # How often the focused app is checked (only while profiles exist)
+    VOICE_RECOGNIZER = "google" # google (Google Web Speech) | stub (local stand-in for tests)
+    VOICE_LANGUAGE = "en-IN"
+    VOICE_WORKERS = 2 # Phrases recognized concurrently (results are still typed in spoken order)
+    VOICE_MAX_QUEUED = 4 # Captured phrases waiting for recognition; the oldest is dropped beyond this
+    VOICE_COMMANDS_ENABLED = True # Spoken commands ("next slide", "open <app>") run actions instead of being typed
+    VOICE_COMMANDS = {} # Extra phrase -> action entries over voice_commands.DEFAULT_GRAMMAR (None removes one)
+    VOICE_KEEP_MIC_OPEN = True # Keep the microphone stream warm between voice_type triggers (mic stays in use)
+    VOICE_CALIBRATION_S = 0.5 # Ambient-noise calibration when the stream opens (not repeated per trigger)
+    VOICE_VAD = True # Drop silence / noise segments and trim them before recognition (voice_activity.py)
+    VOICE_VAD_FRAME_MS = 20
+    VOICE_VAD_ENERGY_DB = 12.0 # Speech frames are this far above the segment's noise floor
+    VOICE_VAD_MIN_DBFS = -50.0 # ... and at least this loud
+    VOICE_VAD_MAX_FLATNESS = 0.35 # Spectral flatness: ~0.5+ for broadband noise, well below for voiced speech
+    VOICE_VAD_MAX_ZCR = 0.35 # Zero crossings per sample: hiss / static is above
+    VOICE_VAD_MIN_SPEECH_MS = 120 # Less speech than this = not worth recognizing
+    VOICE_VAD_PAD_MS = 200 # Kept around the detected speech when trimming
+
+    # Cursor (One Euro filter on the index tip, normalized 0-1 coords)
+    CURSOR_MIN_CUTOFF = 1.0 # Hz. Lower = steadier cursor when the hand is still
+    CURSOR_BETA = 20.0 # How fast smoothing backs off with speed. Higher = less lag on fast moves
+    CURSOR_D_CUTOFF = 1.0 # Hz, for the speed estimate
+    CURSOR_PREDICTION_MS = 0 # Constant-velocity lead to hide camera/inference latency (0 = off)
+    CURSOR_MAX_PREDICTION = 0.05 # Cap on the lead, as a fraction of the screen
+    CURSOR_DRIVER_HZ = 60 # Cursor updates per second between camera frames (match the display; 0 = move per frame)
+    CURSOR_INTERPOLATION_DELAY = 1.0 # Frames the driver trails the newest target: 1 = interpolate, 0 = extrapolate
+    CURSOR_MAX_EXTRAPOLATION_MS = 50 # How far past the newest target the driver may run when frames are late
+    CURSOR_DRIVER_IDLE_MS = 300 # No target for this long -> driver sleeps until the next one
+
+    # Motion Gestures (swipes etc., see motion_engine.py)
+    MOTION_BUFFER_SIZE = 64 # Frames of palm trajectory kept (ring buffer)
+    MOTION_TEMPLATE_POINTS = 16 # Trajectories are resampled to this many points
+    MOTION_WINDOWS_MS = (250, 350, 500, 700, 900) # Window lengths tried every frame (fast ... slow motions)
+    MOTION_MIN_TRAVEL = 1.0 # Palm must move at least this many hand sizes to count as a motion
+    MOTION_MATCH_THRESHOLD = 0.25 # Mean point distance to a template, both scaled to unit extent
     
     # UI Settings
     DRAW_LANDMARKS = True
@@ -26,6 +103,8 @@ class Config:
     # Paths
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
     GESTURES_FILE = os.path.join(BASE_DIR, 'gestures.json')
+    MOTIONS_FILE = os.path.join(BASE_DIR, 'motions.json')
+    PROFILES_FILE = os.path.join(BASE_DIR, 'profiles.json')
     FRONTEND_DIR = os.path.join(BASE_DIR, 'frontend')
 
     # Logging
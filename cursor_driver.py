@@ -0,0 +1,143 @@
+import logging
+import threading
+import time
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class CursorDriver:
+    """
+    Moves the cursor at display rate between camera frames.
+
+    The frame path only hands over targets (set_target, normalized 0-1 coords,
+    ~15 per second). A daemon thread wakes `rate_hz` times per second, renders
+    the position `delay` frames behind the newest target - interpolating
+    between the last two targets, or extrapolating along their velocity for at
+    most `max_extrapolation_ms` when a frame is late - and calls `move_fn`
+    with screen pixels. Moves that would land on the pixel already sent are
+    skipped, and any targets arriving between two ticks collapse into one move.
+
+    The thread sleeps when no target arrived for Config.CURSOR_DRIVER_IDLE_MS
+    (hand lost, mode changed), so it costs nothing outside cursor tracking.
+    """
+    def __init__(self, move_fn, screen_size, rate_hz=None, delay=None, max_extrapolation_ms=None, lock=None):
+        self.move_fn = move_fn
+        self.screen_w, self.screen_h = screen_size
+        self.rate_hz = Config.CURSOR_DRIVER_HZ if rate_hz is None else rate_hz
+        self.delay = Config.CURSOR_INTERPOLATION_DELAY if delay is None else delay
+        self.max_extrapolation_ms = Config.CURSOR_MAX_EXTRAPOLATION_MS if max_extrapolation_ms is None else max_extrapolation_ms
+        self.idle_s = Config.CURSOR_DRIVER_IDLE_MS / 1000.0
+        self.lock = lock or threading.Lock() # Shared with other input calls (clicks) on the frame path
+
+        self._state_lock = threading.Lock()
+        self._prev = None # (t, x, y) of the previous target
+        self._last = None # (t, x, y) of the newest target
+        self._sent = None # Last pixel passed to move_fn
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {"targets": 0, "ticks": 0, "moves": 0, "skipped": 0, "extrapolated": 0}
+
+    # --- Frame path ---
+    def set_target(self, x, y, t=None):
+        """New landmark-derived target (normalized coords, t = monotonic seconds)."""
+        t = time.monotonic() if t is None else t
+        with self._state_lock:
+            last = self._last
+            if last is not None and t - last[0] > self.idle_s:
+                last = None # Stale: don't interpolate across a gap
+            if last is not None and t <= last[0]:
+                self._last = (last[0], x, y)
+            else:
+                self._prev = last
+                self._last = (t, x, y)
+            self.stats["targets"] += 1
+        self.start()
+        self._wake.set()
+
+    def hold(self):
+        """Freezes the cursor at the newest target (e.g. while a click is held)."""
+        with self._state_lock:
+            if self._last is not None:
+                t, x, y = self._last
+                self._prev = (t, x, y)
+
+    def reset(self):
+        with self._state_lock:
+            self._prev = self._last = None
+
+    # --- Driver thread ---
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cursor-driver", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def position(self, now):
+        """Normalized point to show at `now`, or None when there is no fresh target."""
+        with self._state_lock:
+            prev, last = self._prev, self._last
+        if last is None or now - last[0] > self.idle_s:
+            return None
+        if prev is None or last[0] <= prev[0]:
+            return last[1], last[2]
+
+        interval = last[0] - prev[0]
+        render_t = now - self.delay * interval
+        if render_t > last[0]:
+            self.stats["extrapolated"] += 1
+            render_t = min(render_t, last[0] + self.max_extrapolation_ms / 1000.0)
+        u = max((render_t - prev[0]) / interval, 0.0)
+        return prev[1] + (last[1] - prev[1]) * u, prev[2] + (last[2] - prev[2]) * u
+
+    def tick(self, now=None):
+        """Renders and sends one move. Returns True if the cursor moved."""
+        now = time.monotonic() if now is None else now
+        self.stats["ticks"] += 1
+        point = self.position(now)
+        if point is None:
+            return False
+        px = int(round(min(max(point[0], 0.0), 1.0) * (self.screen_w - 1)))
+        py = int(round(min(max(point[1], 0.0), 1.0) * (self.screen_h - 1)))
+        if (px, py) == self._sent:
+            self.stats["skipped"] += 1
+            return False
+        with self.lock:
+            self.move_fn(px, py)
+        self._sent = (px, py)
+        self.stats["moves"] += 1
+        return True
+
+    def _run(self):
+        period = 1.0 / max(self.rate_hz, 1)
+        next_tick = time.monotonic()
+        while not self._stop.is_set():
+            self._wake.clear() # Before the check, so a target set right after it still wakes us
+            now = time.monotonic()
+            with self._state_lock:
+                last = self._last
+            if last is None or now - last[0] > self.idle_s:
+                # Nothing to draw: sleep until the frame path sends a target
+                self._wake.wait()
+                next_tick = time.monotonic()
+                continue
+            try:
+                self.tick(now)
+            except Exception as e:
+                logger.error(f"Cursor move failed: {e}")
+            next_tick += period
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.monotonic() # Fell behind: don't burst to catch up
@@ -0,0 +1,81 @@
+import math
+import time
+
+from config import Config
+
+
+def _alpha(cutoff, dt):
+    """Smoothing factor of a first-order low-pass with this cutoff (Hz) at this sample interval (s)."""
+    tau = 1.0 / (2.0 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class OneEuroFilter:
+    """
+    One Euro filter (Casiez et al., CHI 2012) for a 2D point.
+
+    A low-pass whose cutoff rises with speed: min_cutoff (Hz) sets how much a
+    still hand is smoothed (jitter), beta how quickly the cutoff opens up when
+    the hand moves (lag). Both axes share the speed estimate so the cursor
+    doesn't change direction on diagonal moves.
+
+    lead_ms > 0 adds constant-velocity prediction on top, to make up for the
+    camera + inference latency (capped at max_lead so a lost hand can't fling
+    the cursor).
+    """
+    MAX_GAP_S = 0.5
+    def __init__(self, min_cutoff=None, beta=None, d_cutoff=None, lead_ms=None, max_lead=None):
+        self.min_cutoff = Config.CURSOR_MIN_CUTOFF if min_cutoff is None else min_cutoff
+        self.beta = Config.CURSOR_BETA if beta is None else beta
+        self.d_cutoff = Config.CURSOR_D_CUTOFF if d_cutoff is None else d_cutoff
+        self.lead_ms = Config.CURSOR_PREDICTION_MS if lead_ms is None else lead_ms
+        self.max_lead = Config.CURSOR_MAX_PREDICTION if max_lead is None else max_lead
+        self.reset()
+
+    def reset(self):
+        self.x = None # Filtered position
+        self.dx = (0.0, 0.0) # Filtered velocity (units / s)
+        self.t = None
+
+    def configure(self, **params):
+        """Updates min_cutoff / beta / d_cutoff / lead_ms / max_lead in place (settings API)."""
+        for name, value in params.items():
+            if value is not None and hasattr(self, name):
+                setattr(self, name, float(value))
+
+    def filter(self, x, y, t=None):
+        """Feeds one raw sample (t in seconds, default now). Returns the filtered (and predicted) point."""
+        t = time.monotonic() if t is None else t
+        if self.t is not None and t - self.t > self.MAX_GAP_S:
+            self.reset() # Hand was lost: don't carry the old velocity over
+        if self.x is None or t <= self.t:
+            if self.x is None:
+                self.x, self.t = (x, y), t
+                return x, y
+            return self._output()
+
+        dt = t - self.t
+        self.t = t
+        px, py = self.x
+
+        # Velocity, smoothed with a fixed cutoff
+        a_d = _alpha(self.d_cutoff, dt)
+        vx = a_d * (x - px) / dt + (1 - a_d) * self.dx[0]
+        vy = a_d * (y - py) / dt + (1 - a_d) * self.dx[1]
+        self.dx = (vx, vy)
+
+        # Position, with a cutoff that opens up with speed
+        cutoff = self.min_cutoff + self.beta * math.hypot(vx, vy)
+        a = _alpha(cutoff, dt)
+        self.x = (a * x + (1 - a) * px, a * y + (1 - a) * py)
+        return self._output()
+
+    def _output(self):
+        if self.lead_ms <= 0:
+            return self.x
+        lead = self.lead_ms / 1000.0
+        ox, oy = self.dx[0] * lead, self.dx[1] * lead
+        norm = math.hypot(ox, oy)
+        if norm > self.max_lead:
+            ox, oy = ox * self.max_lead / norm, oy * self.max_lead / norm
+        return self.x[0] + ox, self.x[1] + oy
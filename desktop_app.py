@@ -1,8 +1,12 @@
-import webview
 import threading
 import time
 import sys
-from server import app, logger, camera_loop, state
+from inference_worker import in_worker_process
+
+# The spawned inference worker re-runs this script: it needs neither the window nor the server
+if not in_worker_process():
+    import webview
+    from server import app, logger, camera_loop, state
 
 class DesktopApi:
     def __init__(self):
@@ -0,0 +1,68 @@
+import logging
+
+import cv2
+import numpy as np
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class FrameBufferPool:
+    """
+    Preallocated ring of capture buffers for the camera loop.
+
+    read() captures straight into the next slot (cap.read(image=...)) and
+    flips into a second preallocated buffer (cv2.flip(dst=...)), so a frame
+    costs no new pixel arrays once the ring is warm. Slots are recycled
+    round-robin; keep slots > number of frames held at once (e.g. LIVE_STREAM
+    in-flight frames + the one being drawn).
+
+    stats["allocs"] counts every pixel buffer we had to allocate, including
+    when a backend ignores image= and hands back its own array.
+    """
+    def __init__(self, slots=None):
+        self.slots = slots or Config.FRAME_BUFFER_SLOTS
+        self.shape = None
+        self.raw = []
+        self.flipped = []
+        self.index = -1
+        self.stats = {"frames": 0, "allocs": 0}
+
+    def _allocate(self, shape):
+        self.raw = [np.empty(shape, dtype=np.uint8) for _ in range(self.slots)]
+        self.flipped = [np.empty(shape, dtype=np.uint8) for _ in range(self.slots)]
+        self.shape = shape
+        self.stats["allocs"] += 2 * self.slots
+        logger.info(f"Frame buffers allocated: {self.slots} x {shape}")
+
+    def reset(self):
+        """Drop buffers (e.g. after a resolution change); reallocated on next read."""
+        self.shape = None
+        self.raw = []
+        self.flipped = []
+
+    def read(self, cap):
+        """Returns (success, mirrored_frame). The frame is only valid until its slot comes round again."""
+        self.index = (self.index + 1) % self.slots
+        raw = self.raw[self.index] if self.shape else None
+
+        success, frame = cap.read(raw) if raw is not None else cap.read()
+        if not success or frame is None:
+            return False, None
+
+        if frame is not raw:
+            # First frame, resolution change, or backend that allocates its own image
+            self.stats["allocs"] += 1
+            if frame.shape != self.shape:
+                self._allocate(frame.shape)
+            raw = frame
+
+        out = self.flipped[self.index]
+        cv2.flip(raw, 1, dst=out)
+        self.stats["frames"] += 1
+        return True, out
+
+    def allocs_per_frame(self, extra=0):
+        frames = self.stats["frames"]
+        return (self.stats["allocs"] + extra) / float(frames) if frames else 0.0
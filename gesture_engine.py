@@ -1,32 +1,64 @@
 import numpy as np
-import json
 import os
 import logging
 import shutil
+import threading
+import time
 from config import Config
+from gesture_model import CentroidClassifier, library_fingerprint
+from json_store import JsonStore
 
 logger = logging.getLogger(__name__)
 
+
+def _finite(value):
+    """float(value), or None when there is no runner-up (inf is not valid JSON)."""
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+
 class GestureEngine:
+    FEATURE_SIZE = 19 # 15 finger curl angles + 4 spread angles
+
     def __init__(self, gestures_file=None):
         self.gestures_file = gestures_file or Config.GESTURES_FILE
+        # Coalesced background writes; outside edits hot-reload (see json_store.py).
+        # The centroid model is retrained and written next to the library after each write.
+        self.store = JsonStore(self.gestures_file, lambda: {k: list(v) for k, v in self.gestures.items()},
+                               on_reload=self._reload_gestures, on_write=self.train_model)
         self.gestures = self.load_gestures()
-        # Threshold for matching a gesture
+        # Fallback threshold / ambiguity margin, for gestures with too few samples to learn their own
         self.match_threshold = 0.85
+        self.ambiguity_margin = 0.10
+        # Sample matrix + calibration, rebuilt lazily after the library changes.
+        # Readers take one snapshot per call; edits (Flask / store watcher) swap it under the lock.
+        self._compiled = None
+        self._compile_lock = threading.Lock()
+        self._train_lock = threading.Lock() # One model write at a time (store timer, reload, API)
+        # "knn" = nearest sample, "centroid" = compiled LDA model (see gesture_model.py)
+        self.classifier = Config.GESTURE_CLASSIFIER
+        self.model_file = os.path.splitext(self.gestures_file)[0] + '.model.npz'
+        self.store.watch()
 
     def load_gestures(self):
         if os.path.exists(self.gestures_file):
-            try:
-                with open(self.gestures_file, 'r') as f:
-                    data = json.load(f)
-                    logger.info(f"Loaded {len(data)} gestures: {list(data.keys())}")
-                    return data
-            except Exception as e:
-                logger.error(f"Failed to load gestures: {e}")
+            data = self.store.load()
+            if isinstance(data, dict):
+                logger.info(f"Loaded {len(data)} gestures: {list(data.keys())}")
+                return data
+            logger.error(f"Failed to load gestures, starting empty (the file is kept as {self.gestures_file}.broken)")
         else:
             logger.warning(f"Gestures file not found at {self.gestures_file}. Starting fresh.")
         return {}
 
+    def _reload_gestures(self, data):
+        """Store watcher: gestures.json was edited outside the app."""
+        if isinstance(data, dict):
+            self.gestures = data
+            self._invalidate()
+            logger.info(f"Reloaded {len(data)} gestures")
+            self.train_model()
+
     def save_gesture(self, name: str, landmarks):
         """
         Saves a gesture sample. Appends to the list of samples for 'name'.
@@ -40,10 +72,9 @@ class GestureEngine:
             
             # Append new sample (convert np array to list for JSON serialization)
             self.gestures[name].append(normalized.tolist() if isinstance(normalized, np.ndarray) else normalized)
+            self._invalidate()
             
-            os.makedirs(os.path.dirname(self.gestures_file), exist_ok=True)
-            with open(self.gestures_file, 'w') as f:
-                json.dump(self.gestures, f, indent=4)
+            self.store.save()
             
             logger.info(f"Gesture '{name}' sample saved. Total samples: {len(self.gestures[name])}")
             return True
@@ -60,12 +91,12 @@ class GestureEngine:
                 samples = self.gestures[name]
                 if 0 <= index < len(samples):
                     samples.pop(index)
+                    self._invalidate()
                     
                     # If empty, keep the key? Or delete? 
                     # Let's keep the key so the gesture still "exists" even if empty, until explicitly deleted.
                     
-                    with open(self.gestures_file, 'w') as f:
-                        json.dump(self.gestures, f, indent=4)
+                    self.store.save()
                     return True
             except Exception as e:
                 logger.error(f"Error deleting sample: {e}")
@@ -87,10 +118,10 @@ class GestureEngine:
         try:
             # 1. Update Memory
             self.gestures[new_name] = self.gestures.pop(old_name)
+            self._invalidate()
             
-            # 2. Update JSON File
-            with open(self.gestures_file, 'w') as f:
-                json.dump(self.gestures, f, indent=4)
+            # 2. Update JSON File (written in the background)
+            self.store.save()
                 
             # 3. Rename Folder (if exists)
             old_dir = os.path.join("samples", old_name)
@@ -116,8 +147,8 @@ class GestureEngine:
         if name in self.gestures:
             try:
                 del self.gestures[name]
-                with open(self.gestures_file, 'w') as f:
-                    json.dump(self.gestures, f, indent=4)
+                self._invalidate()
+                self.store.save()
                 
                 # Cleanup samples
                 sample_dir = os.path.join("samples", name)
@@ -194,154 +225,412 @@ class GestureEngine:
 
         # 2. Calc Accuracy (LOOCV)
         # For each sample, treat it as "test" and others as "train"
-        # Find nearest neighbor in "others". If label matches, Correct.
+        # Nearest neighbour comes from the compiled distance matrix.
         
         if len(all_samples) < 2:
             stats["accuracy"] = 0.0 if not all_samples else 1.0 # Trivial
             return stats
 
-        correct = 0
-        total = len(all_samples)
-        
-        # Optimize: Compute full distance matrix once? Or simple loop for clarity.
-        # Simple loop is fine for < 1000 samples.
-        for i in range(total):
-            test_sample = all_samples[i]
-            true_label = labels[i]
-            
-            best_dist = float('inf')
-            predicted_label = None
-            
-            for j in range(total):
-                if i == j: continue # Skip self
-                
-                dist = np.linalg.norm(test_sample - all_samples[j])
-                if dist < best_dist:
-                    best_dist = dist
-                    predicted_label = labels[j]
-            
-            if predicted_label == true_label:
-                correct += 1
-                
-        stats["accuracy"] = (correct / total) * 100.0 if total > 0 else 0.0
+        compiled = self._get_compiled()
+        loocv = compiled["loocv"]
+        stats["accuracy"] = (loocv["correct"] / loocv["total"]) * 100.0 if loocv["total"] > 0 else 0.0
+
+        # Learned acceptance radius per gesture
+        for idx, name in enumerate(compiled["names"]):
+            if name in stats["breakdown"]:
+                stats["breakdown"][name]["radius"] = float(compiled["radius"][idx])
+
+        # 3. Compiled model vs KNN (same samples, pick the faster one when accuracy is equal)
+        if not compiled["names"]:
+            return stats
+        # Read-only: uses the model trained on save (train_model), never fits or writes one here
+        matrix = compiled["matrix"]
+        model = self._get_model(compiled, fit=False)
+        stats["active_model"] = self.classifier
+        stats["models"] = {
+            "knn": {
+                "accuracy": stats["accuracy"],
+                "validation": "LOOCV",
+                # The per-frame path: one Gram-form pass over the compiled samples
+                "predict_us": self._time_per_call(lambda f: self._class_distances(f[None, :], compiled), matrix),
+            },
+            "centroid": {
+                "accuracy": self._cross_validate_model(compiled),
+                "validation": f"{Config.GESTURE_MODEL_CV_FOLDS}-fold",
+                "trained": model is not None,
+                "predict_us": self._time_per_call(model.distances, matrix) if model is not None else None,
+            },
+        }
         
         return stats
 
-    def find_gesture(self, landmarks):
+    # --- Compiled Library ---
+    def _get_compiled(self):
+        """The current compiled library; callers keep the returned snapshot for the whole call."""
+        with self._compile_lock:
+            if self._compiled is None:
+                self._compiled = self._compile()
+            return self._compiled
+
+    def _invalidate(self):
+        with self._compile_lock:
+            self._compiled = None
+
+    def _get_view(self, gestures=None):
         """
-        Compares input against all samples.
-        Returns name if match is found and is not ambiguous.
+        The compiled library restricted to `gestures` (a frozenset of names, e.g.
+        the active profile's subset), cached per subset until the library changes.
+        Learned radii / margins / calibration come from the full library.
         """
-        if not self.gestures:
-            return None
+        compiled = self._get_compiled()
+        if gestures is None:
+            return compiled
+        views = compiled.setdefault("views", {})
+        view = views.get(gestures)
+        if view is None:
+            view = views[gestures] = self._subset(compiled, gestures)
+        return view
 
-        current_feat = self._normalize_landmarks(landmarks)
-        
-        # Track top 2 matches for ambiguity check
-        best_match = None
-        min_dist = float('inf')
-        
-        second_best_dist = float('inf')
-        second_best_match = None
+    def _subset(self, compiled, gestures):
+        classes = np.array([c for c, name in enumerate(compiled["names"]) if name in gestures], dtype=np.intp)
+        if len(classes) == len(compiled["names"]):
+            return compiled
+        starts = compiled["starts"]
+        ends = np.append(starts[1:], len(compiled["labels"]))
+        counts = ends[classes] - starts[classes]
+        rows = np.concatenate([np.arange(starts[c], ends[c]) for c in classes]) if len(classes) else np.empty(0, dtype=np.intp)
+        view = {key: value for key, value in compiled.items() if key not in ("views", "model")}
+        view.update({
+            "names": [compiled["names"][c] for c in classes],
+            "classes": classes, # Column of each view class in the full library / centroid model
+            "library": compiled, # The snapshot this view was cut from (holds the centroid model)
+            "matrix": compiled["matrix"][rows],
+            "sq_norms": compiled["sq_norms"][rows],
+            "starts": np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.intp) if len(classes) else np.empty(0, dtype=np.intp),
+            "labels": np.repeat(np.arange(len(classes)), counts),
+            "radius": compiled["radius"][classes],
+            "margins": compiled["margins"][np.ix_(classes, classes)],
+        })
+        return view
 
-        for name, samples in self.gestures.items():
+    def _compile(self):
+        """
+        Stacks every sample into one (N, d) matrix, grouped by gesture, and
+        derives the LOOCV distance distributions used to calibrate confidence:
+          genuine  - distance from each sample to its nearest same-gesture sample
+          imposter - distance from each sample to its nearest other-gesture sample
+        """
+        names, rows, starts = [], [], []
+        for name, samples in list(self.gestures.items()):
             # Normalize samples list format
-            if not isinstance(samples, list) or (len(samples) > 0 and not isinstance(samples[0], list)):
-                if len(samples) > 0 and isinstance(samples[0], (int, float)):
-                     samples = [samples]
-            
-            # Find closest sample for THIS gesture
-            local_min = float('inf')
-            for sample in samples:
-                dist = self._calculate_distance(current_feat, sample)
-                if dist < local_min:
-                    local_min = dist
-            
-            # Now compare local_min to global bests
-            if local_min < min_dist:
-                # Update runner-up
-                second_best_dist = min_dist
-                second_best_match = best_match
-                
-                # New best
-                min_dist = local_min
-                best_match = name
-            elif local_min < second_best_dist:
-                second_best_dist = local_min
-                second_best_match = name
-
-        if min_dist < self.match_threshold:
-            # Ambiguity Check
-            ambiguity_margin = 0.10 
-            
-            if second_best_match and (second_best_dist - min_dist) < ambiguity_margin:
-                logger.debug(f"Ambiguous: {best_match}({min_dist:.2f}) vs {second_best_match}({second_best_dist:.2f})")
+            if isinstance(samples, list) and samples and isinstance(samples[0], (int, float)):
+                samples = [samples]
+            samples = [smp for smp in samples if len(smp) == self.FEATURE_SIZE]
+            if not samples:
+                continue
+            names.append(name)
+            starts.append(len(rows))
+            rows.extend(samples)
+
+        matrix = np.array(rows, dtype=np.float64).reshape(len(rows), self.FEATURE_SIZE)
+        labels = np.repeat(np.arange(len(names)), np.diff(starts + [len(rows)])) if names else np.empty(0, dtype=int)
+        num_classes = len(names)
+        compiled = {
+            "names": names,
+            "matrix": matrix,
+            "starts": np.array(starts, dtype=np.intp),
+            "labels": labels,
+            "genuine": np.empty(0),
+            "imposter": np.empty(0),
+            "loocv": {"correct": 0, "total": 0},
+            "sq_norms": np.einsum('ij,ij->i', matrix, matrix),
+            "radius": np.full(num_classes, self.match_threshold),
+            "margins": np.full((num_classes, num_classes), self.ambiguity_margin),
+        }
+        if len(rows) < 2:
+            return compiled
+
+        # Pairwise distances (Gram form keeps memory at N x N)
+        sq = compiled["sq_norms"]
+        dist = np.sqrt(np.maximum(sq[:, None] + sq[None, :] - 2.0 * matrix @ matrix.T, 0.0))
+        np.fill_diagonal(dist, np.inf)
+        per_class = np.minimum.reduceat(dist, compiled["starts"], axis=1) # (N, classes)
+
+        rows_idx = np.arange(len(rows))
+        genuine = per_class[rows_idx, labels]
+        per_class[rows_idx, labels] = np.inf
+        imposter = per_class.min(axis=1)
+        per_class[rows_idx, labels] = genuine
+
+        predicted = per_class.argmin(axis=1)
+        compiled["loocv"] = {"correct": int(np.sum(predicted == labels)), "total": len(rows)}
+        compiled["genuine"] = np.sort(genuine[np.isfinite(genuine)])
+        compiled["imposter"] = np.sort(imposter[np.isfinite(imposter)])
+        self._learn_thresholds(compiled, per_class, genuine, imposter)
+        return compiled
+
+    def _learn_thresholds(self, compiled, per_class, genuine, imposter):
+        """
+        Per-gesture acceptance radius and pairwise ambiguity margins.
+          radius[c]     - a high quantile of c's intra-class NN distances, scaled up,
+                          but never past where other gestures' samples typically start
+                          nor past GESTURE_RADIUS_MAX_SCALE x the global threshold
+          margins[c, o] - a fraction of the smallest typical gap between c's samples'
+                          distance to c and their distance to o
+        Gestures with a single sample keep the global fallbacks.
+        """
+        labels, starts = compiled["labels"], compiled["starts"]
+        ends = list(starts[1:]) + [len(labels)]
+        for c, (lo, hi) in enumerate(zip(starts, ends)):
+            own = genuine[lo:hi]
+            if hi - lo < 2 or not np.all(np.isfinite(own)):
+                continue
+            radius = np.quantile(own, Config.GESTURE_RADIUS_QUANTILE) * Config.GESTURE_RADIUS_SCALE
+            others = imposter[lo:hi]
+            if np.all(np.isfinite(others)):
+                radius = min(radius, float(np.median(others)))
+            # Absolute ceiling: a loose gesture must not accept poses from nowhere near any library
+            radius = min(radius, Config.GESTURE_RADIUS_MAX_SCALE * self.match_threshold)
+            compiled["radius"][c] = max(radius, Config.GESTURE_RADIUS_MIN)
+
+            # How much closer c's own samples are to c than to each other gesture
+            gaps = per_class[lo:hi] - own[:, None]
+            low_gap = np.quantile(gaps, 1.0 - Config.GESTURE_RADIUS_QUANTILE, axis=0)
+            margins = np.clip(low_gap * Config.GESTURE_MARGIN_FRACTION, Config.GESTURE_MARGIN_MIN, self.ambiguity_margin)
+            margins[c] = 0.0
+            compiled["margins"][c] = margins
+
+    def _match_probability(self, distances, compiled):
+        """
+        P(a match at this distance is genuine), from the LOOCV distributions:
+        how often a real sample sits at least this far from its own gesture,
+        vs how often another gesture's sample comes this close.
+        """
+        genuine = compiled["genuine"]
+        imposter = compiled["imposter"]
+        if len(genuine) == 0 or len(imposter) == 0:
+            # Not enough samples to calibrate, fall back to the raw threshold
+            return np.clip(1.0 - distances / self.match_threshold, 0.0, 1.0)
+        p_genuine = (len(genuine) - np.searchsorted(genuine, distances, side='left') + 0.5) / (len(genuine) + 1.0)
+        p_imposter = (np.searchsorted(imposter, distances, side='right') + 0.5) / (len(imposter) + 1.0)
+        return p_genuine / (p_genuine + p_imposter)
+
+    # --- Compiled Model ---
+    def train_model(self):
+        """Fits the centroid model on the current library and writes it to model_file (the save path)."""
+        with self._train_lock:
+            compiled = self._get_compiled()
+            if not compiled["names"]:
                 return None
-                
-            logger.debug(f"Matched: {best_match} | Dist: {min_dist:.3f}")
-            return best_match
-            
-        return None
+            model = compiled.get("model")
+            if model is None:
+                model = CentroidClassifier().fit(compiled["matrix"], compiled["labels"], compiled["names"])
+                model.fingerprint = library_fingerprint(compiled["names"], compiled["matrix"])
+                compiled["model"] = model
+                logger.info(f"Trained centroid model on {len(compiled['matrix'])} samples")
+            model.save(self.model_file)
+            return model
+
+    def _get_model(self, compiled, fit=True):
+        """
+        The centroid model for a compiled library: loaded from model_file if it
+        matches. Otherwise (library edited, save still pending) it is fitted in
+        memory when `fit`, else None; only train_model() writes the file.
+        """
+        if compiled.get("model") is None:
+            fingerprint = library_fingerprint(compiled["names"], compiled["matrix"])
+            model = CentroidClassifier.load(self.model_file, fingerprint)
+            if model is None:
+                if not fit:
+                    return None
+                model = CentroidClassifier().fit(compiled["matrix"], compiled["labels"], compiled["names"])
+                model.fingerprint = fingerprint
+            compiled["model"] = model
+        return compiled["model"]
+
+    def _cross_validate_model(self, compiled):
+        """Stratified k-fold accuracy (%) of the centroid model."""
+        matrix, labels = compiled["matrix"], compiled["labels"]
+        # Fold = position of the sample within its gesture, so every fold sees every gesture
+        folds = np.arange(len(labels)) - compiled["starts"][labels]
+        folds %= Config.GESTURE_MODEL_CV_FOLDS
+        correct = 0
+        for fold in range(Config.GESTURE_MODEL_CV_FOLDS):
+            test = folds == fold
+            if not test.any() or test.all():
+                continue
+            train_classes = np.unique(labels[~test])
+            remap = np.full(len(compiled["names"]), -1)
+            remap[train_classes] = np.arange(len(train_classes))
+            model = CentroidClassifier().fit(matrix[~test], remap[labels[~test]],
+                                             [compiled["names"][c] for c in train_classes])
+            predicted = train_classes[model.predict(matrix[test])]
+            correct += int(np.sum(predicted == labels[test]))
+        return (correct / len(labels)) * 100.0
+
+    def _time_per_call(self, fn, matrix, limit=200):
+        """Mean microseconds per single-frame match (feature extraction excluded)."""
+        rows = matrix[:limit]
+        start = time.perf_counter()
+        for row in rows:
+            fn(row)
+        return (time.perf_counter() - start) / len(rows) * 1e6
+
+    def _decide_model(self, model, dists, prob, k, classes=None):
+        names = model.names if classes is None else [model.names[c] for c in classes]
+        radius = model.radius if classes is None else model.radius[classes]
+        order = np.argsort(dists)
+        best = order[0]
+        runner_up = dists[order[1]] if len(order) > 1 else np.inf
+
+        scores = []
+        for idx in order[:k]:
+            nearest_other = runner_up if idx == best else dists[best]
+            scores.append({
+                "gesture": names[idx],
+                "distance": float(dists[idx]),
+                "margin": _finite(nearest_other - dists[idx]),
+                "confidence": float(prob[idx]),
+            })
+
+        match = None
+        if dists[best] >= radius[best]:
+            logger.debug(f"Unknown: nearest {names[best]} at {dists[best]:.2f} (radius {radius[best]:.2f})")
+        elif prob[best] < Config.GESTURE_MODEL_MIN_POSTERIOR:
+            logger.debug(f"Ambiguous: {names[best]} p={prob[best]:.2f}")
+        else:
+            match = names[best]
+        return match, scores
+
+    def _class_distances(self, feats, compiled):
+        """(hands, gestures) distance from each input to the nearest sample of every gesture, one pass."""
+        # |f - m|^2 = |f|^2 + |m|^2 - 2 f.m : one matrix product for all hands x samples
+        sq = np.einsum('ij,ij->i', feats, feats)[:, None] + compiled["sq_norms"][None, :] \
+            - 2.0 * feats @ compiled["matrix"].T
+        sample_dist = np.sqrt(np.maximum(sq, 0.0))
+        return np.minimum.reduceat(sample_dist, compiled["starts"], axis=1)
+
+    def _build_scores(self, class_dist, k, compiled):
+        """
+        Top-k score dicts for each row of (hands, gestures) distances.
+        Returns (order, [scores per hand]); everything but the dicts is vectorized across hands.
+        """
+        names = compiled["names"]
+        rows = np.arange(len(class_dist))[:, None]
+        order = np.argsort(class_dist, axis=1)[:, :k]
+        top_dist = class_dist[rows, order]
+        prob = self._match_probability(top_dist, compiled)
+
+        # Margin: distance to the nearest OTHER gesture minus this one
+        nearest_other = np.repeat(top_dist[:, :1], top_dist.shape[1], axis=1)
+        nearest_other[:, 0] = top_dist[:, 1] if top_dist.shape[1] > 1 else np.inf
+        margin = nearest_other - top_dist
+        # Confident = close to this gesture AND not also close to another one
+        other_prob = np.repeat(prob[:, :1], prob.shape[1], axis=1)
+        other_prob[:, 0] = prob[:, 1] if prob.shape[1] > 1 else 0.0
+        confidence = prob * (1.0 - other_prob)
+
+        scores = [[{"gesture": names[idx], "distance": float(d), "margin": _finite(m), "confidence": float(c)}
+                   for idx, d, m, c in zip(order[h], top_dist[h], margin[h], confidence[h])]
+                  for h in range(len(class_dist))]
+        return order, scores
+
+    def score_gestures(self, landmarks, k=3):
+        """
+        Scores the input against every gesture in one vectorized pass.
+        Returns up to k dicts sorted by distance:
+          gesture, distance (to its nearest sample), margin (distance to the
+          nearest other gesture minus this one; None when there is no other
+          gesture), confidence (0..1, calibrated).
+        """
+        return self.classify(landmarks, k)[1]
+
+    def classify(self, landmarks, k=3, gestures=None):
+        """
+        Returns (gesture or None, top-k scores). The gesture is only set when
+        the best match is inside that gesture's learned radius and clears the
+        learned margin against the runner-up (KNN), or inside the model's
+        radius with enough posterior (centroid).
+        """
+        return self.classify_batch([landmarks], k, gestures)[0]
+
+    def classify_batch(self, hands, k=3, gestures=None):
+        """
+        classify() for several hands at once: features and distances for all
+        hands are computed in one vectorized pass. Returns [(gesture or None, scores)].
+        gestures (frozenset of names) limits the candidates, e.g. to the active
+        profile's subset; only those gestures' samples are scored.
+        """
+        compiled = self._get_view(gestures)
+        if not compiled["names"] or not hands:
+            return [(None, []) for _ in hands]
+
+        feats = self._normalize_batch(hands)
+        if self.classifier == "centroid":
+            model = self._get_model(compiled.get("library", compiled))
+            classes = compiled.get("classes")
+            dists = model.distances(feats, classes)
+            return [self._decide_model(model, row, prob, k, classes)
+                    for row, prob in zip(dists, model.posteriors(dists))]
+        class_dist = self._class_distances(feats, compiled)
+        orders, scores = self._build_scores(class_dist, max(k, 2), compiled)
+        return [self._decide_knn(order, hand_scores, k, compiled) for order, hand_scores in zip(orders, scores)]
+
+    def _decide_knn(self, order, scores, k, compiled):
+        top = scores[0]
+        best = order[0]
+        match = None
+        if top["distance"] < compiled["radius"][best]:
+            # Ambiguity Check
+            if len(order) > 1 and top["margin"] < compiled["margins"][best, order[1]]:
+                logger.debug(f"Ambiguous: {top['gesture']}({top['distance']:.2f}) vs "
+                             f"{scores[1]['gesture']}({scores[1]['distance']:.2f})")
+            else:
+                logger.debug(f"Matched: {top['gesture']} | Dist: {top['distance']:.3f} | Conf: {top['confidence']:.2f}")
+                match = top["gesture"]
+        return match, scores[:k]
+
+    def find_gesture(self, landmarks):
+        """
+        Compares input against all samples.
+        Returns name if match is found and is not ambiguous.
+        """
+        return self.classify(landmarks)[0]
+
+    # Edges for angle calculation
+    CONNECTIONS = np.array([
+        (0,1), (1,2), (2,3), (3,4),       # Thumb
+        (0,5), (5,6), (6,7), (7,8),       # Index
+        (0,9), (9,10), (10,11), (11,12),  # Middle
+        (0,13), (13,14), (14,15), (15,16),# Ring
+        (0,17), (17,18), (18,19), (19,20) # Pinky
+    ])
+    # Pairs of edge vectors whose angle is a feature:
+    # 1. Intra-finger angles (Curl), 2. Inter-finger spread between finger bases
+    ANGLE_PAIRS = np.array(
+        [(f * 4 + i, f * 4 + i + 1) for f in range(5) for i in range(3)] +
+        [(b, b + 4) for b in (0, 4, 8, 12)])
 
     def _normalize_landmarks(self, landmarks):
         """
         Converts 21 landmarks into a feature vector of angles.
         """
-        # Convert to numpy array (21, 3)
-        coords = []
-        for lm in landmarks:
-            if hasattr(lm, 'x'):
-                coords.append([lm.x, lm.y, lm.z])
-            else:
-                coords.append(lm) # Assuming dict or list
-        coords = np.array(coords)
-
-        # Edges for angle calculation
-        connections = [
-            (0,1), (1,2), (2,3), (3,4),       # Thumb
-            (0,5), (5,6), (6,7), (7,8),       # Index
-            (0,9), (9,10), (10,11), (11,12),  # Middle
-            (0,13), (13,14), (14,15), (15,16),# Ring
-            (0,17), (17,18), (18,19), (19,20) # Pinky
-        ]
-        
-        vectors = []
-        for start, end in connections:
-            v = coords[end] - coords[start]
-            norm = np.linalg.norm(v)
-            if norm == 0:
-                v_norm = v
-            else:
-                v_norm = v / norm
-            vectors.append(v_norm)
-        
-        angles = []
-        
-        # 1. Intra-finger angles (Curl)
-        finger_indices = [
-            [0,1,2,3], [4,5,6,7], [8,9,10,11], [12,13,14,15], [16,17,18,19] 
-        ]
-        
-        for f_vecs in finger_indices:
-            for i in range(len(f_vecs)-1):
-                v1 = vectors[f_vecs[i]]
-                v2 = vectors[f_vecs[i+1]]
-                dot = np.dot(v1, v2)
-                dot = np.clip(dot, -1.0, 1.0)
-                angle = np.arccos(dot)
-                angles.append(angle)
-                
-        # 2. Inter-finger spread
-        bases = [0, 4, 8, 12, 16]
-        for i in range(len(bases)-1):
-            v1 = vectors[bases[i]]
-            v2 = vectors[bases[i+1]]
-            dot = np.dot(v1, v2)
-            dot = np.clip(dot, -1.0, 1.0)
-            angle = np.arccos(dot)
-            angles.append(angle)
-
-        return np.array(angles)
+        return self._normalize_batch([landmarks])[0]
+
+    def _normalize_batch(self, hands):
+        """Angle features for several hands at once, (hands, FEATURE_SIZE)."""
+        # Convert to numpy array (hands, 21, 3)
+        coords = np.array([[[lm.x, lm.y, lm.z] if hasattr(lm, 'x') else lm for lm in hand] # Assuming dict or list
+                           for hand in hands], dtype=np.float64)
+
+        vectors = coords[:, self.CONNECTIONS[:, 1]] - coords[:, self.CONNECTIONS[:, 0]]
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        vectors = np.divide(vectors, norms, out=vectors.copy(), where=norms != 0)
+
+        v1 = vectors[:, self.ANGLE_PAIRS[:, 0]]
+        v2 = vectors[:, self.ANGLE_PAIRS[:, 1]]
+        dot = np.clip(np.einsum('hij,hij->hi', v1, v2), -1.0, 1.0)
+        return np.arccos(dot)
 
     def _calculate_distance(self, gesture1, gesture2):
         g1 = np.array(gesture1)
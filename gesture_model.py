@@ -0,0 +1,117 @@
+import hashlib
+import logging
+import os
+
+import numpy as np
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def library_fingerprint(names, matrix):
+    """Identifies the exact sample set a model was trained on."""
+    digest = hashlib.sha1("\0".join(names).encode("utf-8"))
+    digest.update(np.ascontiguousarray(matrix, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+class CentroidClassifier:
+    """
+    Nearest class mean under a shared covariance (LDA with Mahalanobis distance).
+
+    fit() pools the within-class covariance over all gestures, shrinks it
+    toward a scaled identity (stable with a handful of samples per class) and
+    stores its whitening transform, so prediction is one d x d product plus
+    one distance per class: O(d^2 + classes x d), independent of sample count.
+
+    Open-set rejection: each class gets a radius from its own training
+    samples' whitened distances; anything outside it is "unknown".
+    """
+    def __init__(self, shrinkage=None):
+        self.shrinkage = Config.GESTURE_MODEL_SHRINKAGE if shrinkage is None else shrinkage
+        self.names = []
+        self.whiten = None # (d, d)
+        self.means = None # (classes, d), already whitened
+        self.radius = None # (classes,)
+        self.fingerprint = None
+
+    def fit(self, matrix, labels, names):
+        d = matrix.shape[1]
+        means = np.stack([matrix[labels == c].mean(axis=0) for c in range(len(names))])
+        centered = matrix - means[labels]
+        cov = centered.T @ centered / max(len(matrix) - len(names), 1)
+
+        scale = np.trace(cov) / d
+        if scale <= 0:
+            scale = 1.0
+        cov = (1.0 - self.shrinkage) * cov + self.shrinkage * scale * np.eye(d)
+        # inv(cov) = W W^T  ->  Mahalanobis distance = ||(x - mean) @ W||
+        self.whiten = np.linalg.cholesky(np.linalg.inv(cov))
+        self.means = means @ self.whiten
+        self.names = list(names)
+
+        own = np.linalg.norm(matrix @ self.whiten - self.means[labels], axis=1)
+        # A whitened d-dim residual is typically ~sqrt(d) long, which bounds tiny classes
+        self.radius = np.full(len(names), np.sqrt(d) * Config.GESTURE_RADIUS_SCALE)
+        for c in range(len(names)):
+            dists = own[labels == c]
+            if len(dists) >= 2:
+                self.radius[c] = max(np.quantile(dists, Config.GESTURE_RADIUS_QUANTILE) * Config.GESTURE_RADIUS_SCALE,
+                                     np.sqrt(d))
+        return self
+
+    def distances(self, feats, classes=None):
+        """
+        Mahalanobis distance to every class mean: (d,) -> (classes,), (n, d) -> (n, classes).
+        classes (indices) restricts the columns to those classes.
+        """
+        means = self.means if classes is None else self.means[classes]
+        return np.linalg.norm((feats @ self.whiten)[..., None, :] - means, axis=-1)
+
+    def posteriors(self, dists):
+        """Class probabilities under the shared-covariance Gaussian model (equal priors)."""
+        logits = -0.5 * dists ** 2
+        logits -= logits.max(axis=-1, keepdims=True)
+        prob = np.exp(logits)
+        return prob / prob.sum(axis=-1, keepdims=True)
+
+    def predict(self, matrix):
+        """Batch prediction (class indices, no rejection), used for cross-validation."""
+        whitened = matrix @ self.whiten
+        sq = (whitened ** 2).sum(axis=1)[:, None] + (self.means ** 2).sum(axis=1)[None, :] \
+            - 2.0 * whitened @ self.means.T
+        return np.argmin(sq, axis=1)
+
+    # --- Persistence ---
+    def save(self, path):
+        try:
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez(f, names=np.array(self.names), whiten=self.whiten, means=self.means,
+                         radius=self.radius, fingerprint=np.array(self.fingerprint or ""))
+            os.replace(tmp_path, path)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to save gesture model: {e}")
+            return False
+
+    @classmethod
+    def load(cls, path, fingerprint):
+        """Returns the saved model if it was trained on the same library, else None."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                if str(data["fingerprint"]) != fingerprint:
+                    return None
+                model = cls()
+                model.names = [str(n) for n in data["names"]]
+                model.whiten = data["whiten"]
+                model.means = data["means"]
+                model.radius = data["radius"]
+                model.fingerprint = fingerprint
+                return model
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable gesture model {path}: {e}")
+            return None
@@ -0,0 +1,126 @@
+from collections import deque
+
+from config import Config
+
+
+class GestureStabilizer:
+    """
+    Confirms a gesture by a time-windowed vote instead of consecutive frames.
+
+    Every classification is pushed with its frame timestamp. A gesture is
+    confirmed once it holds at least `agreement` of the votes cast in the last
+    `window_ms`, and it has been in the window for `agreement * window_ms`.
+    Because it counts time rather than frames, the hold needed is the same at
+    15 and 60 FPS, and a single misclassified frame only costs one vote
+    instead of restarting the count.
+
+    Votes can carry the classifier's calibrated confidence: a confidently
+    matched pose needs a shorter hold, a borderline one a longer hold
+    (scaled by `speedup`, see Config.GESTURE_CONFIDENCE_SPEEDUP).
+    """
+    def __init__(self, window_ms=None, agreement=None, min_votes=None, speedup=None):
+        self.window_ms = Config.GESTURE_CONFIRM_WINDOW_MS if window_ms is None else window_ms
+        self.agreement = Config.GESTURE_CONFIRM_AGREEMENT if agreement is None else agreement
+        self.min_votes = Config.GESTURE_CONFIRM_MIN_VOTES if min_votes is None else min_votes
+        self.speedup = Config.GESTURE_CONFIDENCE_SPEEDUP if speedup is None else speedup
+        self.votes = deque() # (timestamp_ms, gesture or None, confidence)
+        self.pending = None # Leading candidate in the window
+        self.confirmed = None
+        self.progress = 0.0 # 0..1 towards confirming `pending`
+
+    def reset(self):
+        """Hand lost: forget the window."""
+        self.votes.clear()
+        self.pending = None
+        self.confirmed = None
+        self.progress = 0.0
+
+    def update(self, gesture, timestamp_ms, confidence=None):
+        """
+        Adds one classification (None = no match) with its confidence (0..1,
+        None = neutral). Returns the confirmed gesture or None.
+        """
+        votes = self.votes
+        if votes and timestamp_ms < votes[-1][0]:
+            # Clock went backwards (new stream / restarted worker)
+            votes.clear()
+        votes.append((timestamp_ms, gesture, 0.5 if confidence is None else confidence))
+        horizon = timestamp_ms - self.window_ms
+        while votes[0][0] < horizon:
+            votes.popleft()
+
+        counts = {}
+        first_seen = {}
+        conf_sum = {}
+        for ts, name, conf in votes:
+            if name is None:
+                continue
+            counts[name] = counts.get(name, 0) + 1
+            conf_sum[name] = conf_sum.get(name, 0.0) + conf
+            first_seen.setdefault(name, ts)
+
+        if not counts:
+            self.pending = None
+            self.confirmed = None
+            self.progress = 0.0
+            return None
+
+        leader = max(counts, key=counts.get)
+        share = counts[leader] / float(len(votes))
+        held_ms = timestamp_ms - first_seen[leader]
+        # Mean confidence 1.0 -> (1 - speedup) of the hold, 0.5 -> the full hold, 0.0 -> (1 + speedup)
+        mean_conf = conf_sum[leader] / counts[leader]
+        scale = 1.0 - self.speedup * (2.0 * mean_conf - 1.0)
+        needed_ms = min(self.agreement * self.window_ms * scale, self.window_ms)
+
+        self.pending = leader
+        self.progress = min(held_ms / needed_ms, 1.0) if needed_ms > 0 else 1.0
+        if share < self.agreement:
+            self.progress = min(self.progress, share / self.agreement)
+
+        if (share >= self.agreement and held_ms >= needed_ms and counts[leader] >= self.min_votes):
+            self.confirmed = leader
+        elif self.confirmed is not None and counts.get(self.confirmed, 0) / float(len(votes)) < self.agreement:
+            # The confirmed gesture lost its majority
+            self.confirmed = None
+        return self.confirmed
+
+
+def hand_keys(result):
+    """
+    Stable per-hand keys for one detection result: the handedness label
+    ("Left" / "Right"), falling back to the hand's index. Duplicates (two hands
+    labelled the same) get a suffix so they don't share state.
+    """
+    handedness = getattr(result, 'handedness', None) or []
+    keys = []
+    for i in range(len(result.hand_landmarks)):
+        key = handedness[i][0].category_name if i < len(handedness) and handedness[i] else f"Hand {i + 1}"
+        if key in keys:
+            key = f"{key} {i + 1}"
+        keys.append(key)
+    return keys
+
+
+class HandStabilizers:
+    """One GestureStabilizer per visible hand, keyed by hand_keys()."""
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.hands = {}
+
+    def get(self, key):
+        stabilizer = self.hands.get(key)
+        if stabilizer is None:
+            stabilizer = self.hands[key] = GestureStabilizer(**self.kwargs)
+        return stabilizer
+
+    def update(self, key, gesture, timestamp_ms, confidence=None):
+        return self.get(key).update(gesture, timestamp_ms, confidence)
+
+    def retain(self, keys):
+        """Forgets hands that left the frame."""
+        for key in [k for k in self.hands if k not in keys]:
+            del self.hands[key]
+
+    def reset(self):
+        self.hands.clear()
@@ -0,0 +1,135 @@
+import logging
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+from config import Config
+from inference_worker import Landmark
+
+logger = logging.getLogger(__name__)
+
+
+def frame_brightness(frame, step=8):
+    """Mean of the first channel on a strided subsample (same value range as cv2.mean(frame)[0])."""
+    return int(frame[::step, ::step, 0].mean())
+
+
+class HandROITracker:
+    """
+    Crops inference input to a padded box around the last known hand.
+
+    prepare() returns the RGB image to feed the landmarker plus the ROI used,
+    to_frame_coords() maps the landmarks back to full-frame normalized space,
+    and update() moves the ROI (or drops back to full frame when the hand is lost).
+    With enabled=False it only applies the inference downscale.
+
+    The ROI only moves when the hand nears its edge, so the landmarker sees a
+    stable view between frames (its own tracking relies on that).
+    Full-frame inference is downscaled to Config.INFERENCE_WIDTH, independent of
+    the capture resolution.
+    """
+    def __init__(self, enabled=True, padding=None, min_size=None, roi_size=None, inference_width=None,
+                 reuse_buffers=True):
+        self.enabled = enabled
+        # Reusing the resize/RGB buffers is only safe when inference finishes before the next prepare()
+        self.reuse_buffers = reuse_buffers
+        self._buffers = {}
+        self.padding = Config.ROI_PADDING if padding is None else padding
+        self.min_size = Config.ROI_MIN_SIZE if min_size is None else min_size
+        self.roi_size = roi_size or Config.ROI_INFERENCE_SIZE
+        self.inference_width = Config.INFERENCE_WIDTH if inference_width is None else inference_width
+        self.roi = None # (x0, y0, x1, y1) in pixels, None = full frame
+        self.stats = {"roi_frames": 0, "full_frames": 0, "lost": 0, "allocs": 0}
+
+    def reset(self):
+        self.roi = None
+
+    def _buffer(self, key, shape):
+        if not self.reuse_buffers:
+            self.stats["allocs"] += 1
+            return None # let OpenCV allocate
+        # Keyed by shape so alternating ROI / full-frame input doesn't thrash
+        buf = self._buffers.get((key, shape))
+        if buf is None:
+            if len(self._buffers) >= 8:
+                self._buffers.pop(next(iter(self._buffers)))
+            buf = np.empty(shape, dtype=np.uint8)
+            self._buffers[(key, shape)] = buf
+            self.stats["allocs"] += 1
+        return buf
+
+    def _to_rgb(self, image, width, height):
+        if (width, height) != (image.shape[1], image.shape[0]):
+            dst = self._buffer("resize", (height, width, 3))
+            image = cv2.resize(image, (width, height), dst=dst, interpolation=cv2.INTER_AREA)
+        dst = self._buffer("rgb", (height, width, 3))
+        return cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=dst)
+
+    def prepare(self, frame):
+        """Returns (rgb_input, roi) for this frame."""
+        if self.roi is not None:
+            x0, y0, x1, y1 = self.roi
+            crop = frame[y0:y1, x0:x1]
+            cw, ch = x1 - x0, y1 - y0
+            side = max(cw, ch)
+            if side > self.roi_size:
+                scale = self.roi_size / float(side)
+                cw, ch = max(1, int(cw * scale)), max(1, int(ch * scale))
+            self.stats["roi_frames"] += 1
+            return self._to_rgb(crop, cw, ch), self.roi
+
+        h, w = frame.shape[:2]
+        if self.inference_width and w > self.inference_width:
+            h, w = int(h * self.inference_width / float(w)), self.inference_width
+        self.stats["full_frames"] += 1
+        return self._to_rgb(frame, w, h), None
+
+    def to_frame_coords(self, result, roi, frame_shape):
+        """Maps ROI-relative normalized landmarks to full-frame normalized landmarks."""
+        if roi is None or not result.hand_landmarks:
+            return result
+        h, w = frame_shape[:2]
+        x0, y0, x1, y1 = roi
+        sx, sy = (x1 - x0) / float(w), (y1 - y0) / float(h)
+        ox, oy = x0 / float(w), y0 / float(h)
+        hands = [[Landmark(ox + lm.x * sx, oy + lm.y * sy, lm.z * sx) for lm in hand]
+                 for hand in result.hand_landmarks]
+        return SimpleNamespace(hand_landmarks=hands,
+                               handedness=getattr(result, 'handedness', []),
+                               hand_world_landmarks=getattr(result, 'hand_world_landmarks', []))
+
+    def update(self, result, frame_shape):
+        """Call with full-frame landmarks after each inference."""
+        if not self.enabled:
+            return
+        if not result.hand_landmarks:
+            if self.roi is not None:
+                self.stats["lost"] += 1
+            self.roi = None
+            return
+
+        h, w = frame_shape[:2]
+        hand = result.hand_landmarks[0]
+        xs = [lm.x * w for lm in hand]
+        ys = [lm.y * h for lm in hand]
+        bx0, by0, bx1, by1 = min(xs), min(ys), max(xs), max(ys)
+
+        # Keep the current ROI while the hand stays well inside it
+        if self.roi is not None:
+            x0, y0, x1, y1 = self.roi
+            margin = self.padding * 0.5 * max(bx1 - bx0, by1 - by0)
+            if bx0 - margin >= x0 and by0 - margin >= y0 and bx1 + margin <= x1 and by1 + margin <= y1:
+                return
+
+        side = max(bx1 - bx0, by1 - by0) * (1 + 2 * self.padding)
+        side = max(side, self.min_size * min(w, h))
+        if side >= 0.8 * min(w, h):
+            # Hand fills most of the frame, cropping gains nothing
+            self.roi = None
+            return
+
+        cx, cy = (bx0 + bx1) / 2.0, (by0 + by1) / 2.0
+        x0 = int(max(0, min(w - side, cx - side / 2)))
+        y0 = int(max(0, min(h - side, cy - side / 2)))
+        self.roi = (x0, y0, int(min(w, x0 + side)), int(min(h, y0 + side)))
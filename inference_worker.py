@@ -0,0 +1,350 @@
+import os
+import sys
+import time
+import logging
+import threading
+import multiprocessing
+from collections import deque, namedtuple
+from multiprocessing import shared_memory
+from types import SimpleNamespace
+
+import numpy as np
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Lightweight stand-in for MediaPipe's NormalizedLandmark (only .x/.y/.z are used downstream)
+Landmark = namedtuple('Landmark', ['x', 'y', 'z'])
+
+# One frame handed over by the worker. `frame` is a view into shared memory:
+# it stays valid until release() is called for its slot.
+FramePacket = namedtuple('FramePacket', ['slot', 'frame', 'result', 'timestamp_ms'])
+
+
+def create_landmarker(running_mode="VIDEO", result_callback=None):
+    """
+    Builds a MediaPipe HandLandmarker from Config.
+    running_mode: "VIDEO" (blocking detect_for_video) or "LIVE_STREAM"
+    (detect_async, results delivered to result_callback).
+    """
+    from mediapipe.tasks import python
+    from mediapipe.tasks.python import vision
+
+    try:
+        base_options = python.BaseOptions(model_asset_path=Config.MODEL_ASSET_PATH)
+        options = vision.HandLandmarkerOptions(
+            base_options=base_options,
+            num_hands=Config.NUM_HANDS,
+            min_hand_detection_confidence=Config.MIN_HAND_DETECTION_CONFIDENCE,
+            min_hand_presence_confidence=Config.MIN_HAND_PRESENCE_CONFIDENCE,
+            min_tracking_confidence=Config.MIN_TRACKING_CONFIDENCE,
+            running_mode=vision.RunningMode[running_mode],
+            result_callback=result_callback)
+        return vision.HandLandmarker.create_from_options(options)
+    except Exception as e:
+        logger.critical(f"Failed to initialize MediaPipe Landmarker: {e}")
+        return None
+
+
+class LiveStreamInference:
+    """
+    Non-blocking inference via HandLandmarker LIVE_STREAM mode.
+
+    submit() hands a frame to detect_async and returns immediately; MediaPipe
+    calls back on its own thread and silently skips frames while it is busy.
+    The capture loop picks up the newest finished (frame, result) with poll(),
+    so classification and actions stay on the caller's thread.
+
+    Stats: in_flight (submitted, no result yet), dropped (MediaPipe skipped it,
+    or a newer result replaced it before poll), skipped_busy (not submitted
+    because max_in_flight was reached).
+    """
+    def __init__(self, landmarker_factory=None, max_in_flight=None):
+        self.max_in_flight = max_in_flight or Config.ASYNC_MAX_IN_FLIGHT
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+        self.in_flight = {} # timestamp_ms -> BGR frame
+        self.completed = None
+        self.last_timestamp = -1
+        self.start_time = time.monotonic()
+        self.stats = {"submitted": 0, "completed": 0, "dropped": 0, "skipped_busy": 0, "in_flight": 0}
+
+        factory = landmarker_factory or (lambda cb: create_landmarker("LIVE_STREAM", cb))
+        self.landmarker = factory(self._on_result)
+
+    def next_timestamp(self):
+        # detect_async requires strictly increasing timestamps
+        ts = int((time.monotonic() - self.start_time) * 1000)
+        if ts <= self.last_timestamp:
+            ts = self.last_timestamp + 1
+        self.last_timestamp = ts
+        return ts
+
+    def submit(self, frame, mp_image):
+        """Queues a frame for inference. Returns False if too many are in flight."""
+        with self.lock:
+            if len(self.in_flight) >= self.max_in_flight:
+                self.stats["skipped_busy"] += 1
+                return False
+            ts = self.next_timestamp()
+            self.in_flight[ts] = frame
+            self.stats["submitted"] += 1
+            self.stats["in_flight"] = len(self.in_flight)
+        try:
+            self.landmarker.detect_async(mp_image, ts)
+        except Exception as e:
+            logger.error(f"Async inference error: {e}")
+            with self.lock:
+                self.in_flight.pop(ts, None)
+            return False
+        return True
+
+    def _on_result(self, result, output_image, timestamp_ms):
+        with self.lock:
+            frame = self.in_flight.pop(timestamp_ms, None)
+            # Older submissions will never get a result: MediaPipe dropped them
+            for ts in [t for t in self.in_flight if t < timestamp_ms]:
+                del self.in_flight[ts]
+                self.stats["dropped"] += 1
+            self.stats["in_flight"] = len(self.in_flight)
+            if frame is None:
+                return
+            if self.completed is not None:
+                self.stats["dropped"] += 1
+            self.completed = (frame, result, timestamp_ms)
+            self.stats["completed"] += 1
+            self.ready.set()
+
+    def poll(self, timeout=0):
+        """Returns the newest (frame, result, timestamp_ms) or None."""
+        if timeout and not self.ready.wait(timeout):
+            return None
+        with self.lock:
+            packet = self.completed
+            self.completed = None
+            self.ready.clear()
+        return packet
+
+    def close(self):
+        if self.landmarker:
+            self.landmarker.close()
+
+
+class InferenceProcess:
+    """
+    Runs capture + HandLandmarker in a separate process.
+
+    Frames are written into a shared-memory ring of fixed-size slots, and only
+    (slot, shape, landmarks) travel over the pipe. The server reads the frame in
+    place and hands the slot back with release(). The worker never overwrites a
+    slot the server still holds; if all slots are busy it drops the frame.
+    """
+    def __init__(self, camera_config, slots=None, max_width=None, max_height=None):
+        self.camera_config = dict(camera_config)
+        self.slots = slots or Config.SHM_RING_SLOTS
+        max_w = max_width or Config.SHM_MAX_WIDTH
+        max_h = max_height or Config.SHM_MAX_HEIGHT
+        self.slot_bytes = max_w * max_h * 3
+
+        self.shm = None
+        self.process = None
+        self.conn = None
+
+        self.stats = {"frames": 0, "stale_skipped": 0, "worker_dropped": 0}
+
+    def start(self):
+        self.shm = shared_memory.SharedMemory(create=True, size=self.slot_bytes * self.slots)
+        # Spawn (not fork): MediaPipe / OpenCV state is not fork-safe
+        ctx = multiprocessing.get_context("spawn")
+        parent_conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.shm.name, self.slots, self.slot_bytes,
+                  Config.CAMERA_INDEX, self.camera_config),
+            daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        logger.info(f"Inference worker started (pid {self.process.pid}, {self.slots} slots)")
+
+    def is_alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def get(self, timeout=1.0):
+        """
+        Returns the newest FramePacket, or None on timeout/error.
+        Older frames queued behind it are released immediately (we only care about now).
+        """
+        try:
+            if not self.conn.poll(timeout):
+                return None
+            msg = self.conn.recv()
+            while self.conn.poll():
+                newer = self.conn.recv()
+                if msg[0] == "frame":
+                    self._send("release", msg[1])
+                    self.stats["stale_skipped"] += 1
+                msg = newer
+        except (EOFError, OSError):
+            return None
+
+        kind = msg[0]
+        if kind == "error":
+            logger.error(f"Inference worker: {msg[1]}")
+            return None
+        if kind != "frame":
+            return None
+
+        _, slot, h, w, timestamp_ms, hands, handedness, worker_dropped = msg
+        frame = np.ndarray((h, w, 3), dtype=np.uint8, buffer=self.shm.buf, offset=slot * self.slot_bytes)
+        result = SimpleNamespace(
+            hand_landmarks=[[Landmark(*p) for p in hand] for hand in hands],
+            handedness=[[SimpleNamespace(category_name=name)] for name in handedness])
+        self.stats["frames"] += 1
+        self.stats["worker_dropped"] = worker_dropped
+        return FramePacket(slot, frame, result, timestamp_ms)
+
+    def release(self, packet):
+        """Hands the slot back to the worker. Do not touch packet.frame afterwards."""
+        self._send("release", packet.slot)
+
+    def reconfigure(self, camera_config):
+        self.camera_config = dict(camera_config)
+        self._send("config", self.camera_config)
+
+    def stop(self):
+        self._send("stop", None)
+        if self.process:
+            self.process.join(timeout=2.0)
+            if self.process.is_alive():
+                self.process.terminate()
+            self.process = None
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+        if self.shm:
+            try:
+                self.shm.close()
+            except BufferError:
+                # A FramePacket view is still alive somewhere; the mapping goes with the process
+                logger.warning("Shared memory still referenced, skipping close")
+            try:
+                self.shm.unlink()
+            except Exception as e:
+                logger.warning(f"Shared memory cleanup failed: {e}")
+            self.shm = None
+
+    def _send(self, cmd, arg):
+        try:
+            if self.conn:
+                self.conn.send((cmd, arg))
+        except (BrokenPipeError, OSError):
+            pass
+
+
+# --- Worker Process ---
+def in_worker_process():
+    """
+    True inside a spawned worker. Spawn re-imports the launching script
+    (server.py / desktop_app.py) in the child, which must then skip building
+    the app (engines, stores, launcher, input backend): it only needs
+    capture and the landmarker. While the script is being re-imported,
+    parent_process() is not set up yet, but the script runs as "__mp_main__".
+    """
+    main = sys.modules.get("__mp_main__")
+    return multiprocessing.parent_process() is not None or getattr(main, "__name__", None) == "__mp_main__"
+
+
+def _open_capture(cv2, index, conf):
+    cap = cv2.VideoCapture(index)
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, conf['width'])
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, conf['height'])
+    cap.set(cv2.CAP_PROP_FPS, conf['fps'])
+    return cap
+
+
+def _worker_main(conn, shm_name, slots, slot_bytes, camera_index, camera_config):
+    os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
+    import cv2
+    import mediapipe as mp
+    from hand_roi import HandROITracker
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    landmarker = create_landmarker()
+    if not landmarker:
+        conn.send(("error", "Failed to initialize MediaPipe Landmarker"))
+        shm.close()
+        return
+
+    cap = _open_capture(cv2, camera_index, camera_config)
+    roi_tracker = HandROITracker(enabled=Config.ROI_TRACKING and Config.NUM_HANDS == 1)
+    free_slots = deque(range(slots))
+    dropped = 0
+    # detect_for_video needs strictly increasing timestamps; wall-clock time can step backwards
+    start_time = time.monotonic()
+    last_timestamp = -1
+
+    try:
+        while True:
+            # Commands from the server (non-blocking)
+            while conn.poll():
+                cmd, arg = conn.recv()
+                if cmd == "release":
+                    free_slots.append(arg)
+                elif cmd == "config":
+                    camera_config = arg
+                    cap.release()
+                    cap = _open_capture(cv2, camera_index, camera_config)
+                    roi_tracker.reset()
+                elif cmd == "stop":
+                    return
+
+            success, frame = cap.read()
+            if not success:
+                conn.send(("error", "Failed to read camera frame. Retrying..."))
+                time.sleep(1)
+                cap.release()
+                cap = _open_capture(cv2, camera_index, camera_config)
+                continue
+
+            # Server still holds every slot -> drop rather than block capture
+            if not free_slots:
+                dropped += 1
+                continue
+
+            h, w = frame.shape[:2]
+            if h * w * 3 > slot_bytes:
+                scale = (slot_bytes / float(h * w * 3)) ** 0.5
+                frame = cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+                h, w = frame.shape[:2]
+
+            slot = free_slots.popleft()
+            shared = np.ndarray((h, w, 3), dtype=np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+            cv2.flip(frame, 1, dst=shared)
+
+            rgb_frame, roi = roi_tracker.prepare(shared)
+            mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame)
+            timestamp = max(int((time.monotonic() - start_time) * 1000), last_timestamp + 1)
+            last_timestamp = timestamp
+            del shared
+
+            try:
+                result = landmarker.detect_for_video(mp_image, timestamp)
+            except Exception as e:
+                conn.send(("error", f"Inference error: {e}"))
+                free_slots.append(slot)
+                continue
+
+            result = roi_tracker.to_frame_coords(result, roi, (h, w))
+            roi_tracker.update(result, (h, w))
+
+            hands = [[(lm.x, lm.y, lm.z) for lm in hand] for hand in result.hand_landmarks]
+            handedness = [cats[0].category_name for cats in (result.handedness or [])]
+            conn.send(("frame", slot, h, w, timestamp, hands, handedness, dropped))
+    except (EOFError, BrokenPipeError, KeyboardInterrupt):
+        pass
+    finally:
+        cap.release()
+        landmarker.close()
+        shm.close()
@@ -0,0 +1,416 @@
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCREEN = (1920, 1080)
+
+# Low-level events every backend understands:
+#   ("key_down", key) ("key_up", key)          key names as in pyautogui ("ctrl", "c", "volumeup")
+#   ("button_down", button) ("button_up", button)  "left" / "right" / "middle"
+#   ("move", x, y)                              screen pixels
+#   ("scroll", clicks)                          > 0 = up
+#   ("text", text, interval)                    interval = seconds between characters
+
+
+class InputBackend:
+    """
+    Keyboard / mouse injection behind one interface.
+
+    High-level calls (press, hotkey, click, move_to...) are turned into a list
+    of low-level events and handed to _inject() in one go, so a hotkey is a
+    single injection rather than one call (and one pause) per key. batch()
+    collects everything sent inside it into one injection too.
+
+    Every injection is timed per kind ("hotkey", "move"...): see latency().
+    """
+    name = "base"
+
+    def __init__(self):
+        self.lock = threading.Lock() # Frame path and cursor driver share the device
+        self._local = threading.local() # Per-thread batch buffer
+        self.stats = {}
+
+    @classmethod
+    def available(cls):
+        return True
+
+    def size(self):
+        return DEFAULT_SCREEN
+
+    def _inject(self, kind, events):
+        raise NotImplementedError
+
+    # --- Sending ---
+    def send(self, kind, events):
+        buffer = getattr(self._local, "batch", None)
+        if buffer is not None:
+            buffer.extend(events)
+            return
+        self._timed(kind, events)
+
+    def _timed(self, kind, events):
+        start = time.perf_counter()
+        with self.lock:
+            self._inject(kind, events)
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        entry = self.stats.get(kind)
+        if entry is None:
+            entry = self.stats[kind] = {"count": 0, "events": 0, "total_ms": 0.0, "max_ms": 0.0}
+        entry["count"] += 1
+        entry["events"] += len(events)
+        entry["total_ms"] += elapsed_ms
+        entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+
+    @contextmanager
+    def batch(self):
+        """Everything sent from this thread inside the block goes out as one injection."""
+        if getattr(self._local, "batch", None) is not None:
+            yield # Nested: the outer batch flushes
+            return
+        self._local.batch = []
+        try:
+            yield
+        finally:
+            events, self._local.batch = self._local.batch, None
+            if events:
+                self._timed("batch", events)
+
+    def latency(self):
+        """Per-kind injection cost: mean/max per injection and mean per low-level event."""
+        rows = []
+        for kind, s in self.stats.items():
+            if s["count"]:
+                rows.append({"kind": kind, "count": s["count"], "events": s["events"],
+                             "mean_ms": round(s["total_ms"] / s["count"], 3),
+                             "per_event_us": round(s["total_ms"] * 1000.0 / max(s["events"], 1), 1),
+                             "max_ms": round(s["max_ms"], 3)})
+        return rows
+
+    def reset_stats(self):
+        self.stats = {}
+
+    # --- High-level API (pyautogui-like) ---
+    def press(self, key):
+        self.send("press", [("key_down", key), ("key_up", key)])
+
+    def hotkey(self, *keys):
+        self.send("hotkey", [("key_down", k) for k in keys] + [("key_up", k) for k in reversed(keys)])
+
+    def click(self, button='left', clicks=1):
+        self.send("click", [("button_down", button), ("button_up", button)] * clicks)
+
+    def double_click(self, button='left'):
+        self.click(button, clicks=2)
+
+    def mouse_down(self, button='left'):
+        self.send("button", [("button_down", button)])
+
+    def mouse_up(self, button='left'):
+        self.send("button", [("button_up", button)])
+
+    def move_to(self, x, y):
+        self.send("move", [("move", int(x), int(y))])
+
+    def scroll(self, clicks):
+        self.send("scroll", [("scroll", int(clicks))])
+
+    def write(self, text, interval=0.0):
+        if text:
+            self.send("text", [("text", text, interval)])
+
+    def replay(self, recorded):
+        """Re-sends a stream captured by RecordingBackend: [(t, kind, events), ...]."""
+        for _, kind, events in recorded:
+            self.send(kind, list(events))
+
+
+class RecordingBackend(InputBackend):
+    """Null backend: injects nothing, records (t, kind, events). For tests and benchmarks."""
+    name = "null"
+
+    def __init__(self, screen=DEFAULT_SCREEN):
+        super().__init__()
+        self._screen = screen
+        self.events = []
+
+    def size(self):
+        return self._screen
+
+    def _inject(self, kind, events):
+        self.events.append((time.perf_counter(), kind, tuple(events)))
+
+    def clear(self):
+        with self.lock:
+            self.events = []
+
+
+class PyAutoGUIBackend(InputBackend):
+    """pyautogui, without its per-call PAUSE (0.1s by default) between the events of one injection."""
+    name = "pyautogui"
+
+    def __init__(self):
+        super().__init__()
+        import pyautogui
+        pyautogui.FAILSAFE = False # Prevent fail-safe corner triggers which can be annoying with hand tracking
+        self.pyautogui = pyautogui
+
+    @classmethod
+    def available(cls):
+        try:
+            import pyautogui # noqa: F401
+            return True
+        except Exception:
+            return False
+
+    def size(self):
+        return tuple(self.pyautogui.size())
+
+    def _inject(self, kind, events):
+        gui = self.pyautogui
+        for event in events:
+            op = event[0]
+            if op == "key_down":
+                gui.keyDown(event[1], _pause=False)
+            elif op == "key_up":
+                gui.keyUp(event[1], _pause=False)
+            elif op == "button_down":
+                gui.mouseDown(button=event[1], _pause=False)
+            elif op == "button_up":
+                gui.mouseUp(button=event[1], _pause=False)
+            elif op == "move":
+                gui.moveTo(event[1], event[2], _pause=False)
+            elif op == "scroll":
+                gui.scroll(event[1], _pause=False)
+            elif op == "text":
+                gui.write(event[1], interval=event[2], _pause=False)
+
+
+# pyautogui key name -> X keysym (xdotool)
+XDOTOOL_KEYS = {
+    "ctrl": "ctrl", "shift": "shift", "alt": "alt", "win": "super",
+    "esc": "Escape", "enter": "Return", "space": "space", "backspace": "BackSpace", "tab": "Tab",
+    "pageup": "Prior", "pagedown": "Next", "up": "Up", "down": "Down", "left": "Left", "right": "Right",
+    "printscreen": "Print", "+": "plus", "-": "minus", ".": "period",
+    "playpause": "XF86AudioPlay", "stop": "XF86AudioStop", "nexttrack": "XF86AudioNext",
+    "prevtrack": "XF86AudioPrev", "volumemute": "XF86AudioMute",
+    "volumeup": "XF86AudioRaiseVolume", "volumedown": "XF86AudioLowerVolume",
+}
+XDOTOOL_BUTTONS = {"left": "1", "middle": "2", "right": "3"}
+
+
+class XdotoolBackend(InputBackend):
+    """
+    X11 via xdotool: a whole injection is one chained xdotool command, but
+    still one process spawn per injection (every cursor move included), so
+    it is only used when asked for ("xdotool" / "native"), never by "auto".
+    """
+    name = "xdotool"
+
+    def __init__(self):
+        super().__init__()
+        self.binary = shutil.which("xdotool")
+        self._screen = None
+
+    @classmethod
+    def available(cls):
+        return platform.system() == "Linux" and bool(os.environ.get("DISPLAY")) and shutil.which("xdotool") is not None
+
+    def size(self):
+        if self._screen is None:
+            try:
+                out = subprocess.run([self.binary, "getdisplaygeometry"], capture_output=True, text=True, timeout=2)
+                w, h = out.stdout.split()
+                self._screen = (int(w), int(h))
+            except Exception:
+                self._screen = DEFAULT_SCREEN
+        return self._screen
+
+    @staticmethod
+    def _key(key):
+        if key in XDOTOOL_KEYS:
+            return XDOTOOL_KEYS[key]
+        if len(key) > 1 and key[0] == "f" and key[1:].isdigit():
+            return key.upper()
+        return key
+
+    def _inject(self, kind, events):
+        args = []
+        for event in events:
+            op = event[0]
+            if op == "key_down":
+                args += ["keydown", self._key(event[1])]
+            elif op == "key_up":
+                args += ["keyup", self._key(event[1])]
+            elif op == "button_down":
+                args += ["mousedown", XDOTOOL_BUTTONS.get(event[1], "1")]
+            elif op == "button_up":
+                args += ["mouseup", XDOTOOL_BUTTONS.get(event[1], "1")]
+            elif op == "move":
+                args += ["mousemove", str(event[1]), str(event[2])]
+            elif op == "scroll" and event[1]:
+                args += ["click", "--repeat", str(abs(event[1])), "4" if event[1] > 0 else "5"]
+            elif op == "text":
+                # `type` swallows the rest of the command line, so it ends this invocation
+                args += ["type", "--delay", str(int(event[2] * 1000)), "--", event[1]]
+                self._run(args)
+                args = []
+        self._run(args)
+
+    def _run(self, args):
+        if args:
+            subprocess.run([self.binary] + args, check=False, timeout=10)
+
+
+# pyautogui key name -> evdev KEY_* (uinput)
+UINPUT_KEYS = {
+    "ctrl": "KEY_LEFTCTRL", "shift": "KEY_LEFTSHIFT", "alt": "KEY_LEFTALT", "win": "KEY_LEFTMETA",
+    "esc": "KEY_ESC", "enter": "KEY_ENTER", "space": "KEY_SPACE", "backspace": "KEY_BACKSPACE", "tab": "KEY_TAB",
+    "pageup": "KEY_PAGEUP", "pagedown": "KEY_PAGEDOWN", "up": "KEY_UP", "down": "KEY_DOWN",
+    "left": "KEY_LEFT", "right": "KEY_RIGHT", "printscreen": "KEY_SYSRQ",
+    "+": "KEY_EQUAL", "=": "KEY_EQUAL", "-": "KEY_MINUS", ".": "KEY_DOT", ",": "KEY_COMMA", "/": "KEY_SLASH",
+    ";": "KEY_SEMICOLON", "'": "KEY_APOSTROPHE", "[": "KEY_LEFTBRACE", "]": "KEY_RIGHTBRACE",
+    "\\": "KEY_BACKSLASH", "`": "KEY_GRAVE", "\n": "KEY_ENTER", " ": "KEY_SPACE",
+    "playpause": "KEY_PLAYPAUSE", "stop": "KEY_STOPCD", "nexttrack": "KEY_NEXTSONG",
+    "prevtrack": "KEY_PREVIOUSSONG", "volumemute": "KEY_MUTE",
+    "volumeup": "KEY_VOLUMEUP", "volumedown": "KEY_VOLUMEDOWN",
+}
+# Characters typed with shift on a US layout -> unshifted key
+UINPUT_SHIFTED = {"!": "1", "@": "2", "#": "3", "$": "4", "%": "5", "^": "6", "&": "7", "*": "8",
+                  "(": "9", ")": "0", "_": "-", "+": "=", "{": "[", "}": "]", "|": "\\", ":": ";",
+                  '"': "'", "<": ",", ">": ".", "?": "/", "~": "`"}
+UINPUT_BUTTONS = {"left": "BTN_LEFT", "middle": "BTN_MIDDLE", "right": "BTN_RIGHT"}
+
+
+class UinputBackend(InputBackend):
+    """
+    Linux kernel uinput (python-evdev): a virtual keyboard + absolute pointer.
+    A whole injection is written to the device and flushed with one SYN per
+    step, with no process spawn or X round trip. Works under X11 and Wayland;
+    needs write access to /dev/uinput.
+    """
+    name = "uinput"
+
+    def __init__(self, screen=None):
+        super().__init__()
+        from evdev import AbsInfo, UInput, ecodes
+        self.ecodes = ecodes
+        if screen is None:
+            screen = XdotoolBackend().size() if XdotoolBackend.available() else DEFAULT_SCREEN
+        self._screen = screen
+        w, h = screen
+        keys = {getattr(ecodes, name) for name in UINPUT_KEYS.values()}
+        keys |= {getattr(ecodes, f"KEY_{c}") for c in "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"}
+        keys |= {getattr(ecodes, f"KEY_F{i}") for i in range(1, 13)}
+        keys |= {getattr(ecodes, name) for name in UINPUT_BUTTONS.values()}
+        self.device = UInput({
+            ecodes.EV_KEY: sorted(keys),
+            ecodes.EV_ABS: [(ecodes.ABS_X, AbsInfo(0, 0, w - 1, 0, 0, 0)),
+                            (ecodes.ABS_Y, AbsInfo(0, 0, h - 1, 0, 0, 0))],
+            ecodes.EV_REL: [ecodes.REL_WHEEL],
+        }, name="gesture-control-input")
+
+    @classmethod
+    def available(cls):
+        if platform.system() != "Linux" or not os.access("/dev/uinput", os.W_OK):
+            return False
+        try:
+            import evdev # noqa: F401
+            return True
+        except Exception:
+            return False
+
+    def size(self):
+        return self._screen
+
+    def _code(self, key):
+        if key in UINPUT_KEYS:
+            return getattr(self.ecodes, UINPUT_KEYS[key])
+        if key in UINPUT_BUTTONS:
+            return getattr(self.ecodes, UINPUT_BUTTONS[key])
+        name = f"KEY_{key.upper()}"
+        return getattr(self.ecodes, name, None)
+
+    def _key(self, code, down):
+        if code is not None:
+            self.device.write(self.ecodes.EV_KEY, code, 1 if down else 0)
+            self.device.syn()
+
+    def _inject(self, kind, events):
+        e = self.ecodes
+        for event in events:
+            op = event[0]
+            if op in ("key_down", "key_up", "button_down", "button_up"):
+                self._key(self._code(event[1]), op.endswith("down"))
+            elif op == "move":
+                self.device.write(e.EV_ABS, e.ABS_X, event[1])
+                self.device.write(e.EV_ABS, e.ABS_Y, event[2])
+                self.device.syn()
+            elif op == "scroll":
+                self.device.write(e.EV_REL, e.REL_WHEEL, event[1])
+                self.device.syn()
+            elif op == "text":
+                self._type(event[1], event[2])
+
+    def _type(self, text, interval):
+        shift = self._code("shift")
+        for ch in text:
+            shifted = ch.isupper() or ch in UINPUT_SHIFTED
+            code = self._code(UINPUT_SHIFTED.get(ch, ch.lower()))
+            if code is None:
+                continue # No key for it on a US layout
+            if shifted:
+                self._key(shift, True)
+            self._key(code, True)
+            self._key(code, False)
+            if shifted:
+                self._key(shift, False)
+            if interval > 0:
+                time.sleep(interval)
+
+
+BACKENDS = {
+    "pyautogui": PyAutoGUIBackend,
+    "xdotool": XdotoolBackend,
+    "uinput": UinputBackend,
+    "null": RecordingBackend,
+}
+
+
+def create_backend(name=None):
+    """
+    Builds the configured backend (Config.INPUT_BACKEND):
+    pyautogui / xdotool / uinput / null, "native" = uinput or xdotool,
+    "auto" = uinput where available, else pyautogui (in-process; xdotool's
+    per-injection spawn would cost more at cursor rates).
+    """
+    name = name or Config.INPUT_BACKEND
+    if name == "auto":
+        candidates = ["uinput", "pyautogui"]
+    elif name == "native":
+        candidates = ["uinput", "xdotool"]
+    else:
+        candidates = [name]
+    for candidate in candidates:
+        cls = BACKENDS.get(candidate)
+        if cls is None or not cls.available():
+            continue
+        try:
+            backend = cls()
+            logger.info(f"Input backend: {backend.name}")
+            return backend
+        except Exception as e:
+            logger.warning(f"Input backend {candidate} unavailable: {e}")
+    if name != "pyautogui" and PyAutoGUIBackend.available():
+        logger.warning(f"Input backend '{name}' not available, falling back to pyautogui")
+        return PyAutoGUIBackend()
+    logger.warning("No input backend available, actions will only be recorded")
+    return RecordingBackend()
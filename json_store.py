@@ -0,0 +1,170 @@
+import atexit
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class JsonStore:
+    """
+    A JSON file mirrored by an in-memory object.
+
+    - save() is coalesced: edits within `delay` seconds are written once, in
+      the background, as temp file + fsync + rename (a crash never leaves a
+      half-written file). flush() writes immediately; pending writes are
+      flushed at exit.
+    - A watcher thread polls the file's mtime/size every
+      Config.STORE_POLL_INTERVAL_S and hands external edits to `on_reload`
+      (our own writes are recognized and skipped). `on_write` runs after each
+      successful write, on the writing thread (derived files, e.g. a model).
+    - A file that fails to parse is never overwritten silently: load()
+      returns None, and a copy is kept next to it as <name>.broken before
+      anything is written over it.
+    """
+    def __init__(self, path, snapshot, on_reload=None, delay=None, on_write=None):
+        self.path = path
+        self.snapshot = snapshot # () -> object to write, taken at write time (latest state)
+        self.on_reload = on_reload
+        self.on_write = on_write
+        self.delay = Config.STORE_WRITE_DELAY_S if delay is None else delay
+        self._lock = threading.Lock()
+        self._timer = None
+        self._dirty = False
+        self._signature = None # (mtime_ns, size) of the version we last read or wrote
+        self._broken_signature = None # Unparseable version already reported
+        self._watcher = None
+        self.stats = {"saves": 0, "writes": 0, "reloads": 0, "parse_errors": 0}
+        atexit.register(self.flush)
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    # --- Reading ---
+    def load(self):
+        """Parsed file content, or None if it is missing or broken (the error is logged)."""
+        signature = self._stat()
+        if signature is None:
+            return None
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except Exception as e:
+            self.stats["parse_errors"] += 1
+            if signature != self._broken_signature:
+                logger.error(f"Could not parse {self.path}: {e}. Keeping the current settings; fix the file to reload.")
+                self._broken_signature = signature
+                self._backup_broken()
+            return None
+        self._signature = signature
+        self._broken_signature = None
+        return data
+
+    def _backup_broken(self):
+        try:
+            shutil.copy2(self.path, self.path + ".broken")
+            logger.warning(f"Saved a copy of the unreadable file as {self.path}.broken")
+        except OSError as e:
+            logger.error(f"Could not back up {self.path}: {e}")
+
+    def poll(self):
+        """Reloads if the file changed on disk since we last read or wrote it. Returns True on reload."""
+        signature = self._stat()
+        if signature is None or signature == self._signature or signature == self._broken_signature:
+            return False
+        with self._lock:
+            if self._dirty:
+                return False # Our pending write wins; it lands within `delay`
+            # Re-check under the lock: the change may be our own write that just finished
+            if self._stat() == self._signature:
+                return False
+            data = self.load()
+        if data is None:
+            return False
+        self.stats["reloads"] += 1
+        logger.info(f"{self.path} changed on disk, reloading")
+        if self.on_reload:
+            self.on_reload(data)
+        return True
+
+    def watch(self, interval=None):
+        """Starts the mtime watcher thread (idempotent)."""
+        if self._watcher is not None:
+            return
+        interval = Config.STORE_POLL_INTERVAL_S if interval is None else interval
+        if interval <= 0:
+            return
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.poll()
+                except Exception as e:
+                    logger.error(f"Watching {self.path} failed: {e}")
+        self._watcher = threading.Thread(target=run, name=f"watch-{os.path.basename(self.path)}", daemon=True)
+        self._watcher.start()
+
+    # --- Writing ---
+    def save(self):
+        """Marks the content dirty; one write happens `delay` seconds after the first unsaved edit."""
+        with self._lock:
+            self.stats["saves"] += 1
+            self._dirty = True
+            if self.delay > 0:
+                self._arm(self.delay)
+                return
+        self.flush()
+
+    def _arm(self, delay):
+        """Schedules a flush (call with the lock held)."""
+        if self._timer is None:
+            self._timer = threading.Timer(delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Writes now if there are unsaved edits. Returns False if the write failed."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return True
+            self._dirty = False
+            try:
+                self._write(self.snapshot())
+            except Exception as e:
+                self._dirty = True
+                retry = max(self.delay, 1.0)
+                self._arm(retry) # Retry on its own, not only when something else saves
+                logger.error(f"Failed to write {self.path}: {e} (retrying in {retry:g}s)")
+                return False
+        if self.on_write:
+            try:
+                self.on_write()
+            except Exception as e:
+                logger.error(f"After writing {self.path}: {e}")
+        return True
+
+    def _write(self, data):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._signature = self._stat()
+        self.stats["writes"] += 1
@@ -0,0 +1,297 @@
+import logging
+import os
+import platform
+import shlex
+import shutil
+import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def _summary(samples_ms):
+    if not samples_ms:
+        return {"count": 0}
+    ordered = sorted(samples_ms)
+    pick = lambda q: round(ordered[min(int(q * len(ordered)), len(ordered) - 1)], 2)
+    return {"count": len(ordered), "mean_ms": round(sum(ordered) / len(ordered), 2),
+            "p50_ms": pick(0.5), "p95_ms": pick(0.95), "max_ms": round(ordered[-1], 2)}
+
+
+class Launcher:
+    """
+    Starts apps / protocols / URLs by name without waiting for them.
+
+    launch() returns False when the launch is known to have failed, so
+    callers can fall back to another step; latency() reports how long the
+    launcher took to act on it (submit -> app process spawned).
+    """
+    name = "base"
+
+    def __init__(self):
+        self.stats = {"launched": 0, "failed": 0, "restarts": 0}
+        self._latency_ms = deque(maxlen=200)
+
+    def start(self):
+        """Warms the launcher up (called in the background at startup)."""
+
+    def launch(self, target):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def latency(self):
+        return _summary(list(self._latency_ms))
+
+
+class StubLauncher(Launcher):
+    """Launches nothing, records (t, target). For tests and benchmarks."""
+    name = "stub"
+
+    def __init__(self):
+        super().__init__()
+        self.launched = []
+
+    def launch(self, target):
+        self.launched.append((time.perf_counter(), target))
+        self.stats["launched"] += 1
+        self._latency_ms.append(0.0)
+        return True
+
+
+class DirectLauncher(Launcher):
+    """
+    Windows: os.startfile (ShellExecute, in-process: no interpreter start),
+    falling back to a one-off PowerShell Start-Process for targets the shell
+    can't resolve. Needs no helper process.
+    """
+    name = "direct"
+
+    def launch(self, target):
+        start = time.perf_counter()
+        try:
+            os.startfile(target)
+        except OSError:
+            try:
+                safe = target.replace("'", "''") # Escape for PS
+                subprocess.Popen(["powershell", "-Command", f"Start-Process '{safe}' -WindowStyle Normal"], shell=True)
+            except Exception as e:
+                logger.warning(f"Launch {target} failed: {e}")
+                self.stats["failed"] += 1
+                return False
+        self.stats["launched"] += 1
+        self._latency_ms.append((time.perf_counter() - start) * 1000.0)
+        return True
+
+
+class PipeLauncher(Launcher):
+    """
+    A long-lived interpreter (shell / PowerShell) kept warm and fed one line
+    per launch over stdin, so a launch costs a pipe write instead of an
+    interpreter cold start. Each line echoes "OK <id>" / "ERR <id>" once the
+    app has been spawned; a reader thread turns those into latency samples.
+    launch() waits up to Config.LAUNCH_ACK_TIMEOUT_S for the ack and returns
+    False on ERR; without an ack in time it assumes the hand-off worked (a
+    second launch would risk opening the app twice).
+    The helper is restarted if it dies.
+    """
+    argv = None
+    creationflags = 0
+
+    def __init__(self):
+        super().__init__()
+        self._proc = None
+        self._lock = threading.Lock()
+        self._pending = {} # id -> [submit time, ack event, ok]
+        self._seq = 0
+
+    def _line(self, target, token):
+        raise NotImplementedError
+
+    def start(self):
+        with self._lock:
+            self._ensure_running()
+
+    def _ensure_running(self):
+        if self._proc is not None and self._proc.poll() is None:
+            return
+        if self._proc is not None:
+            self.stats["restarts"] += 1
+        self._proc = subprocess.Popen(self.argv, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                      stderr=subprocess.DEVNULL, text=True, bufsize=1,
+                                      creationflags=self.creationflags)
+        threading.Thread(target=self._read_acks, args=(self._proc,), name=f"{self.name}-acks", daemon=True).start()
+        logger.info(f"Launcher helper started: {self.name} (pid {self._proc.pid})")
+
+    def launch(self, target):
+        entry = self._submit(target)
+        if entry is None:
+            return False
+        if not entry[1].wait(Config.LAUNCH_ACK_TIMEOUT_S):
+            logger.debug(f"Launcher {self.name}: no ack for {target} yet, assuming it started")
+            return True
+        return entry[2]
+
+    def _submit(self, target):
+        """Writes the launch line; returns its pending entry, or None if the helper can't take it."""
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    self._ensure_running()
+                    self._seq += 1
+                    entry = self._pending[self._seq] = [time.perf_counter(), threading.Event(), False]
+                    self._proc.stdin.write(self._line(target, self._seq) + "\n")
+                    self._proc.stdin.flush()
+                    return entry
+                except (OSError, ValueError, subprocess.SubprocessError) as e:
+                    # Helper died under us: make sure it is gone so the retry starts a fresh one
+                    self._pending.pop(self._seq, None)
+                    logger.warning(f"Launcher {self.name} failed for {target} (attempt {attempt + 1}): {e}")
+                    if self._proc is not None:
+                        try:
+                            self._proc.kill()
+                            self._proc.wait(timeout=1)
+                        except Exception:
+                            self._proc = None
+        self.stats["failed"] += 1
+        return None
+
+    def _read_acks(self, proc):
+        for line in proc.stdout:
+            parts = line.split()
+            if len(parts) != 2 or parts[0] not in ("OK", "ERR") or not parts[1].isdigit():
+                continue
+            with self._lock:
+                entry = self._pending.pop(int(parts[1]), None)
+            if entry is None:
+                continue
+            if parts[0] == "OK":
+                self.stats["launched"] += 1
+                self._latency_ms.append((time.perf_counter() - entry[0]) * 1000.0)
+            else:
+                self.stats["failed"] += 1
+            entry[2] = parts[0] == "OK"
+            entry[1].set()
+
+    def close(self):
+        with self._lock:
+            if self._proc is not None and self._proc.poll() is None:
+                try:
+                    self._proc.stdin.close()
+                    self._proc.wait(timeout=2)
+                except Exception:
+                    self._proc.kill()
+            self._proc = None
+
+
+class PowerShellLauncher(PipeLauncher):
+    """
+    Windows, opt-in (LAUNCHER = "powershell"): one hidden PowerShell reading
+    Start-Process lines from stdin. Unlike "direct" it depends on PowerShell
+    executing and acking "-Command -" input line by line.
+    """
+    name = "powershell"
+    argv = ["powershell", "-NoLogo", "-NoProfile", "-NonInteractive", "-ExecutionPolicy", "Bypass", "-Command", "-"]
+    creationflags = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+
+    def _line(self, target, token):
+        safe = target.replace("'", "''") # Escape for PS
+        return (f"try {{ Start-Process '{safe}' -WindowStyle Normal -ErrorAction Stop; "
+                f"[Console]::Out.WriteLine('OK {token}') }} catch {{ [Console]::Out.WriteLine('ERR {token}') }}; "
+                f"[Console]::Out.Flush()")
+
+
+class ShellLauncher(PipeLauncher):
+    """Linux / POSIX: one /bin/sh reading lines; executables run detached, anything else via xdg-open."""
+    name = "shell"
+    argv = ["/bin/sh", "-s"]
+
+    def _line(self, target, token):
+        q = shlex.quote(target)
+        return (f"if command -v {q} >/dev/null 2>&1; then (setsid {q} >/dev/null 2>&1 &); echo OK {token}; "
+                f"elif command -v xdg-open >/dev/null 2>&1; then (setsid xdg-open {q} >/dev/null 2>&1 &); echo OK {token}; "
+                f"else echo ERR {token}; fi")
+
+
+def create_launcher(name=None):
+    """Config.LAUNCHER: auto (direct on Windows, shell elsewhere) / direct / powershell / shell / stub."""
+    name = name or Config.LAUNCHER
+    if name == "auto":
+        name = "direct" if platform.system() == "Windows" else "shell"
+    if name == "direct" and platform.system() == "Windows":
+        return DirectLauncher()
+    if name == "powershell" and shutil.which("powershell"):
+        return PowerShellLauncher()
+    if name == "shell" and shutil.which("sh"):
+        return ShellLauncher()
+    if name != "stub":
+        logger.warning(f"Launcher '{name}' not available, launches will only be recorded")
+    return StubLauncher()
+
+
+class LaunchExecutor:
+    """
+    Runs blocking launch work (Popen, webbrowser, the launcher helper) off
+    the gesture path. Bounded: at most `max_pending` jobs queued or running;
+    anything beyond is dropped (and counted) rather than piling up behind a
+    hung launch. Per-job queue and run times are kept for latency().
+    """
+    def __init__(self, workers=None, max_pending=None):
+        self._pool = ThreadPoolExecutor(max_workers=workers or Config.LAUNCH_WORKERS, thread_name_prefix="launch")
+        self._slots = threading.BoundedSemaphore(max_pending or Config.LAUNCH_MAX_PENDING)
+        self._lock = threading.Lock()
+        self.stats = {}
+
+    def submit(self, name, fn, *args, **kwargs):
+        """Queues fn(*args, **kwargs). Returns False if the queue is full."""
+        if not self._slots.acquire(blocking=False):
+            logger.warning(f"Launch queue full, dropping {name}")
+            self._record(name, dropped=True)
+            return False
+        queued = time.perf_counter()
+
+        def run():
+            started = time.perf_counter()
+            ok = True
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                ok = False
+                logger.error(f"Launch {name} failed: {e}")
+            finally:
+                self._slots.release()
+                self._record(name, queue_ms=(started - queued) * 1000.0,
+                             run_ms=(time.perf_counter() - started) * 1000.0, ok=ok)
+        self._pool.submit(run)
+        return True
+
+    def _record(self, name, queue_ms=0.0, run_ms=0.0, ok=True, dropped=False):
+        with self._lock:
+            entry = self.stats.get(name)
+            if entry is None:
+                entry = self.stats[name] = {"count": 0, "dropped": 0, "errors": 0,
+                                            "queue_ms": 0.0, "run_ms": 0.0, "max_ms": 0.0}
+            if dropped:
+                entry["dropped"] += 1
+                return
+            entry["count"] += 1
+            entry["errors"] += 0 if ok else 1
+            entry["queue_ms"] += queue_ms
+            entry["run_ms"] += run_ms
+            entry["max_ms"] = max(entry["max_ms"], queue_ms + run_ms)
+
+    def latency(self):
+        with self._lock:
+            return [{"name": name, "count": s["count"], "dropped": s["dropped"], "errors": s["errors"],
+                     "queue_ms": round(s["queue_ms"] / s["count"], 2) if s["count"] else 0.0,
+                     "run_ms": round(s["run_ms"] / s["count"], 2) if s["count"] else 0.0,
+                     "max_ms": round(s["max_ms"], 2)} for name, s in self.stats.items()]
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
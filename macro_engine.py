@@ -0,0 +1,240 @@
+import logging
+import queue
+import re
+import threading
+import time
+from collections import deque, namedtuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Steps run through _input_step; consecutive batchable ones (see _batchable) are sent as one batch
+INPUT_KINDS = {"key", "hotkey", "text", "click", "scroll", "move", "action"}
+STEP_SPLIT_RE = re.compile(r'(?<!\\)[;\n]')
+
+MacroStep = namedtuple('MacroStep', ['kind', 'args', 'text'])
+# groups: lists of steps; an input group runs as one injection, every other group holds a single step
+Macro = namedtuple('Macro', ['source', 'groups', 'steps'])
+
+
+class MacroError(ValueError):
+    pass
+
+
+def parse_macro(source, resolve_action=None):
+    """
+    Compiles "macro:" text into a Macro. Steps are separated by ';' or newlines
+    ('\\;' for a literal semicolon):
+
+        hotkey ctrl+t; type youtube.com; key enter; wait 1500; cmd open notepad;
+        move 0.5 0.5; click right; scroll -5; copy
+
+    key / hotkey / type / click / scroll / move inject input, wait pauses
+    (ms, or "1.5s"), cmd runs a custom command, and any other word is a
+    built-in action name (resolved by `resolve_action`, checked here).
+    Raises MacroError on anything it can't run.
+    """
+    steps = []
+    for raw in STEP_SPLIT_RE.split(source):
+        raw = raw.strip().replace('\\;', ';')
+        if not raw:
+            continue
+        word, _, rest = raw.partition(' ')
+        word = word.lower()
+        rest = rest.strip()
+        if word in ("key", "press"):
+            if not rest:
+                raise MacroError(f"'{raw}': missing key")
+            steps.append(MacroStep("key", (rest.lower(),), raw))
+        elif word == "hotkey":
+            keys = tuple(k.strip().lower() for k in rest.split('+') if k.strip())
+            if not keys:
+                raise MacroError(f"'{raw}': missing keys")
+            steps.append(MacroStep("hotkey", keys, raw))
+        elif word == "type":
+            steps.append(MacroStep("text", (rest,), raw))
+        elif word == "wait":
+            steps.append(MacroStep("wait", (_seconds(rest, raw),), raw))
+        elif word == "cmd":
+            if not rest:
+                raise MacroError(f"'{raw}': missing command")
+            steps.append(MacroStep("cmd", (rest,), raw))
+        elif word == "move":
+            try:
+                x, y = (float(v) for v in rest.split())
+            except ValueError:
+                raise MacroError(f"'{raw}': expected 'move <x> <y>'")
+            steps.append(MacroStep("move", (x, y), raw))
+        elif word == "click":
+            button = rest.lower() or "left"
+            if button not in ("left", "right", "middle", "double"):
+                raise MacroError(f"'{raw}': unknown button")
+            steps.append(MacroStep("click", (button,), raw))
+        elif word == "scroll":
+            try:
+                steps.append(MacroStep("scroll", (int(rest),), raw))
+            except ValueError:
+                raise MacroError(f"'{raw}': expected 'scroll <clicks>'")
+        else:
+            binding = resolve_action(raw) if resolve_action else None
+            if binding is None or binding.spec.needs_landmarks:
+                raise MacroError(f"'{raw}': unknown step or action")
+            steps.append(MacroStep("action", (binding,), raw))
+    if not steps:
+        raise MacroError("empty macro")
+
+    groups = []
+    for step in steps:
+        if _batchable(step) and groups and _batchable(groups[-1][0]):
+            groups[-1].append(step)
+        else:
+            groups.append([step])
+    return Macro(source, groups, len(steps))
+
+
+def _batchable(step):
+    """
+    Only steps that inject through owner.input can share a batch: an action
+    that locks the screen or launches an app would otherwise run before the
+    input queued ahead of it.
+    """
+    if step.kind == "action":
+        return step.args[0].spec.input_only
+    return step.kind in INPUT_KINDS
+
+
+def _seconds(text, raw):
+    text = text.lower().strip()
+    try:
+        if text.endswith("ms"):
+            return float(text[:-2]) / 1000.0
+        if text.endswith("s"):
+            return float(text[:-1])
+        return float(text) / 1000.0
+    except ValueError:
+        raise MacroError(f"'{raw}': expected 'wait <ms>' or 'wait <seconds>s'")
+
+
+class MacroRunner:
+    """
+    Runs compiled macros on one scheduler thread, in order.
+
+    Each input group goes out as a single injection (InputBackend.batch),
+    waits sleep on an event so cancel() interrupts them immediately, and
+    every group's duration is recorded (last_runs / timing()). Submissions
+    beyond Config.MACRO_MAX_QUEUED are dropped.
+    """
+    def __init__(self, owner, max_queued=None):
+        self.owner = owner
+        self._queue = queue.Queue(maxsize=max_queued or Config.MACRO_MAX_QUEUED)
+        self._interrupt = threading.Event()
+        self._generation = 0 # Bumped by cancel(); jobs from an older generation stop
+        self._thread = None
+        self._lock = threading.Lock()
+        self.running = None # Source of the macro being run
+        self.last_runs = deque(maxlen=20)
+        self.stats = {"runs": 0, "completed": 0, "cancelled": 0, "dropped": 0, "errors": 0}
+
+    def submit(self, macro):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="macro-runner", daemon=True)
+                self._thread.start()
+            generation = self._generation
+        try:
+            self._queue.put_nowait((macro, generation))
+            return True
+        except queue.Full:
+            self.stats["dropped"] += 1
+            logger.warning(f"Macro queue full, dropping: {macro.source}")
+            return False
+
+    def cancel(self):
+        """Stops the running macro and drops the queued ones."""
+        with self._lock:
+            self._generation += 1
+        self._interrupt.set()
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+    def _run(self):
+        while True:
+            macro, generation = self._queue.get()
+            if generation != self._generation:
+                continue
+            self.running = macro.source
+            try:
+                self._execute(macro, generation)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Macro failed: {e}")
+            finally:
+                self.running = None
+
+    def _cancelled(self, generation):
+        return generation != self._generation
+
+    def _execute(self, macro, generation):
+        self.stats["runs"] += 1
+        owner = self.owner
+        timings = []
+        start = time.perf_counter()
+        cancelled = False
+        for group in macro.groups:
+            if self._cancelled(generation):
+                cancelled = True
+                break
+            group_start = time.perf_counter()
+            first = group[0]
+            if first.kind == "wait":
+                self._interrupt.clear()
+                if self._cancelled(generation):
+                    cancelled = True
+                    break
+                self._interrupt.wait(first.args[0])
+            elif first.kind == "cmd":
+                owner.commands.run(first.args[0])
+            elif not _batchable(first):
+                self._input_step(first)
+            else:
+                with owner.input.batch():
+                    for step in group:
+                        self._input_step(step)
+            timings.append({"step": "; ".join(s.text for s in group), "batched": len(group),
+                            "ms": round((time.perf_counter() - group_start) * 1000.0, 3)})
+        cancelled = cancelled or self._cancelled(generation)
+        self.stats["cancelled" if cancelled else "completed"] += 1
+        self.last_runs.append({"macro": macro.source, "cancelled": cancelled, "steps": timings,
+                               "total_ms": round((time.perf_counter() - start) * 1000.0, 3)})
+
+    def _input_step(self, step):
+        backend = self.owner.input
+        kind, args = step.kind, step.args
+        if kind == "key":
+            backend.press(args[0])
+        elif kind == "hotkey":
+            backend.hotkey(*args)
+        elif kind == "text":
+            backend.write(args[0], interval=Config.MACRO_TYPE_INTERVAL)
+        elif kind == "click":
+            if args[0] == "double":
+                backend.double_click()
+            else:
+                backend.click(args[0])
+        elif kind == "scroll":
+            backend.scroll(args[0])
+        elif kind == "move":
+            x, y = args
+            # 0-1 = fraction of the screen, anything larger = pixels
+            if 0.0 <= x <= 1.0 and 0.0 <= y <= 1.0:
+                x, y = x * (self.owner.screen_w - 1), y * (self.owner.screen_h - 1)
+            backend.move_to(x, y)
+        elif kind == "action":
+            self.owner.registry.run(args[0])
+
+    def timing(self):
+        return {"running": self.running, "stats": self.stats, "last_runs": list(self.last_runs)}
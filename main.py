@@ -6,28 +6,31 @@ import cv2
 import mediapipe as mp
 import time
 from gesture_engine import GestureEngine
+from gesture_stabilizer import HandStabilizers, hand_keys
+from motion_engine import MotionEngine
 from action_map import ActionMap
 from draw_utils import draw_styled_landmarks, draw_ui
-
-# Imports for MediaPipe Tasks
-from mediapipe.tasks import python
-from mediapipe.tasks.python import vision
+from config import Config
+from inference_worker import LiveStreamInference, create_landmarker
 
 def main():
-    # Setup MediaPipe HandLandmarker
-    base_options = python.BaseOptions(model_asset_path='hand_landmarker.task')
-    options = vision.HandLandmarkerOptions(
-        base_options=base_options,
-        num_hands=1,
-        min_hand_detection_confidence=0.5,
-        min_hand_presence_confidence=0.5,
-        min_tracking_confidence=0.5,
-        running_mode=vision.RunningMode.VIDEO)
+    # Setup MediaPipe HandLandmarker (VIDEO = blocking, LIVE_STREAM = async)
+    live = None
+    if Config.INFERENCE_MODE == "LIVE_STREAM":
+        live = LiveStreamInference()
+        landmarker = live.landmarker
+    else:
+        landmarker = create_landmarker()
+    if landmarker is None:
+        # Reason already logged by create_landmarker (missing model file, bad options, ...)
+        print(f"Failed to initialize MediaPipe Landmarker (model: {Config.MODEL_ASSET_PATH}), exiting")
+        return
     
-    with vision.HandLandmarker.create_from_options(options) as landmarker:
+    with landmarker:
         
         # Initialize Engines
         engine = GestureEngine()
+        motion_engine = MotionEngine()
         action_map = ActionMap()
 
         # Webcam Setup
@@ -44,10 +47,9 @@ def main():
         print("Started Hand Gesture Control (UI Updated)")
         print("Press 'q' to Quit in the window")
         
-        # Stability / Noise Reduction
+        # Stability / Noise Reduction (time-windowed vote, see Config.GESTURE_CONFIRM_*)
+        stabilizers = HandStabilizers() # One per visible hand
         pending_gesture = None
-        stability_count = 0
-        REQUIRED_STABILITY = 3 # Frames to hold before triggering
         stability_progress = 0.0
         
         start_time = time.time()
@@ -68,41 +70,59 @@ def main():
             frame_timestamp_ms = int((time.time() - start_time) * 1000)
             
             # Detect
-            detection_result = landmarker.detect_for_video(mp_image, frame_timestamp_ms)
+            if live:
+                # Async: keep capturing while inference runs, use the newest finished result
+                live.submit(frame, mp_image)
+                packet = live.poll()
+                if packet is None:
+                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                        break
+                    continue
+                frame, detection_result, frame_timestamp_ms = packet
+            else:
+                detection_result = landmarker.detect_for_video(mp_image, frame_timestamp_ms)
             
             # Logic vars
             current_gesture = None
             
             if detection_result.hand_landmarks:
                 hand_landmarks = detection_result.hand_landmarks[0]
+                keys = hand_keys(detection_result)
+                stabilizers.retain(keys)
                 
+                motion = motion_engine.update(hand_landmarks, frame_timestamp_ms)
+
                 # Logic per mode
-                if mode == "DETECT":
-                    candidate_gesture = engine.find_gesture(hand_landmarks)
-                    
-                    if candidate_gesture:
-                        if candidate_gesture == pending_gesture:
-                            stability_count += 1
-                        else:
-                            pending_gesture = candidate_gesture
-                            stability_count = 0
-                        
-                        # Calculate progress for UI (0.0 to 1.0)
-                        stability_progress = min(stability_count / REQUIRED_STABILITY, 1.0)
+                if mode == "DETECT" and motion:
+                    # Dynamic gesture (swipe...), fires without the stability vote
+                    current_gesture = motion[0]
+                    stabilizers.reset()
+                    if time.time() - last_action_time > COOLDOWN:
+                        action_triggered = action_map.execute(current_gesture, landmarks=hand_landmarks)
+                        if action_triggered:
+                            last_action_time = time.time()
+                            last_action_name = action_triggered
+
+                elif mode == "DETECT":
+                    # All hands in one batched pass, confirmed per hand
+                    results = engine.classify_batch(detection_result.hand_landmarks)
+                    for key, landmarks, (candidate_gesture, scores) in zip(keys, detection_result.hand_landmarks, results):
+                        confidence = scores[0]['confidence'] if candidate_gesture else None
+                        confirmed = stabilizers.update(key, candidate_gesture, frame_timestamp_ms, confidence)
+                        if key == keys[0]:
+                            current_gesture = confirmed
                         
-                        if stability_count >= REQUIRED_STABILITY:
-                            current_gesture = candidate_gesture
-                            
+                        if confirmed:
                             # Execute Action with Cooldown
                             if time.time() - last_action_time > COOLDOWN:
-                                action_triggered = action_map.execute(current_gesture, landmarks=hand_landmarks)
+                                action_triggered = action_map.execute(action_map.resolve_gesture(confirmed, key),
+                                                                      landmarks=landmarks)
                                 if action_triggered:
                                     last_action_time = time.time()
                                     last_action_name = action_triggered
-                    else:
-                        pending_gesture = None
-                        stability_count = 0
-                        stability_progress = 0.0
+                    
+                    primary = stabilizers.get(keys[0])
+                    pending_gesture, stability_progress = primary.pending, primary.progress
                 
                 elif mode == "SELECT_ACTION":
                     # Hand landmarks are not key here, just drawing UI
@@ -112,8 +132,9 @@ def main():
                     # Just ready to save
                     pass
             else:
+                 stabilizers.reset()
+                 motion_engine.reset()
                  pending_gesture = None
-                 stability_count = 0
                  stability_progress = 0.0
 
             # Clear last action after 3 seconds for UI cleanliness
@@ -0,0 +1,219 @@
+import json
+import logging
+import os
+
+import numpy as np
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Palm centre = mean of wrist + finger bases, steadier than any single landmark
+PALM_POINTS = [0, 5, 9, 13, 17]
+
+
+class MotionEngine:
+    """
+    Recognizes dynamic gestures (swipes, circles...) from the palm trajectory.
+
+    Every frame pushes the palm centre, hand size and timestamp into a
+    fixed-size ring buffer (O(1), no reallocation). Matching resamples the
+    last few window lengths (Config.MOTION_WINDOWS_MS) to a fixed number of
+    points, gates on travel in hand sizes, then compares the shape (scaled to
+    unit extent) of all windows against all recorded templates in one
+    (windows x templates) distance pass.
+    Cost per frame is bounded by the ring size, not by how long the hand
+    has been visible.
+
+    Templates are recorded with start_recording() / stop_recording() and
+    stored in Config.MOTIONS_FILE as {name: [[[x, y], ...], ...]}.
+    """
+    def __init__(self, motions_file=None, capacity=None, points=None):
+        self.motions_file = motions_file or Config.MOTIONS_FILE
+        self.capacity = capacity or Config.MOTION_BUFFER_SIZE
+        self.points = points or Config.MOTION_TEMPLATE_POINTS
+        self.windows_ms = np.array(Config.MOTION_WINDOWS_MS, dtype=np.float64)
+
+        # Ring written twice (i and i + capacity) so the newest n entries are always one contiguous slice
+        self._xy = np.zeros((2 * self.capacity, 2))
+        self._scale = np.zeros(2 * self.capacity)
+        self._ts = np.zeros(2 * self.capacity)
+        self._head = 0
+        self._count = 0
+        self._armed = True # False after a match, until the hand comes to rest
+
+        self.motions = self.load_motions()
+        self._templates = None # (T, points, 2), rebuilt when motions change
+        self._template_names = []
+
+        self.recording = None # Name being recorded
+        self._recorded = []
+        self.stats = {"frames": 0, "matches": 0, "gated": 0}
+
+    # --- Persistence ---
+    def load_motions(self):
+        if os.path.exists(self.motions_file):
+            try:
+                with open(self.motions_file, 'r') as f:
+                    data = json.load(f)
+                    logger.info(f"Loaded {len(data)} motions: {list(data.keys())}")
+                    return data
+            except Exception as e:
+                logger.error(f"Failed to load motions: {e}")
+        return {}
+
+    def _save_motions(self):
+        try:
+            with open(self.motions_file, 'w') as f:
+                json.dump(self.motions, f, indent=4)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to save motions: {e}")
+            return False
+
+    def delete_motion(self, name):
+        if name not in self.motions:
+            return False
+        del self.motions[name]
+        self._templates = None
+        return self._save_motions()
+
+    def _compiled_templates(self):
+        if self._templates is None:
+            names, rows = [], []
+            for name, templates in self.motions.items():
+                for template in templates:
+                    if len(template) == self.points:
+                        names.append(name)
+                        rows.append(template)
+            self._template_names = names
+            self._templates = self._unit_extent(np.array(rows, dtype=np.float64).reshape(len(rows), self.points, 2))
+        return self._templates
+
+    @staticmethod
+    def _unit_extent(paths):
+        """Scales (..., points, 2) paths so their farthest point from the start is at distance 1."""
+        extent = np.linalg.norm(paths, axis=-1).max(axis=-1)
+        return paths / np.maximum(extent, 1e-6)[..., None, None]
+
+    # --- Ring Buffer ---
+    def reset(self):
+        """Hand lost: start a fresh trajectory."""
+        self._count = 0
+        self._armed = True
+
+    def push(self, landmarks, timestamp_ms):
+        palm = [landmarks[i] for i in PALM_POINTS]
+        x = sum(p.x for p in palm) / len(palm)
+        y = sum(p.y for p in palm) / len(palm)
+        wrist, middle = landmarks[0], landmarks[9]
+        scale = max(((middle.x - wrist.x) ** 2 + (middle.y - wrist.y) ** 2) ** 0.5, 1e-3)
+
+        if self._count and timestamp_ms <= self._ts[self._head - 1 + self.capacity]:
+            return # Same or older frame (e.g. async result delivered twice)
+        for i in (self._head, self._head + self.capacity):
+            self._xy[i] = (x, y)
+            self._scale[i] = scale
+            self._ts[i] = timestamp_ms
+        self._head = (self._head + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+        self.stats["frames"] += 1
+
+        if self.recording is not None:
+            self._recorded.append((timestamp_ms, x, y, scale))
+
+    def _recent(self):
+        """Newest `count` entries, oldest first, as views into the ring."""
+        end = self._head + self.capacity
+        start = end - self._count
+        return self._ts[start:end], self._xy[start:end], self._scale[start:end]
+
+    def _normalize(self, ts, xy, scale, t0, t1):
+        """Resamples one trajectory between t0 and t1 to `points` points, start at origin, hand-size units."""
+        grid = np.linspace(t0, t1, self.points)
+        path = np.stack([np.interp(grid, ts, xy[:, 0]), np.interp(grid, ts, xy[:, 1])], axis=-1)
+        return (path - path[0]) / np.median(scale)
+
+    # --- Matching ---
+    def update(self, landmarks, timestamp_ms):
+        """Pushes one frame and returns (motion name, distance) if a template matched, else None."""
+        self.push(landmarks, timestamp_ms)
+        templates = self._compiled_templates()
+        if self.recording is not None or not len(templates) or self._count < 2:
+            return None
+
+        ts, xy, scale = self._recent()
+        now = ts[-1]
+        # Only windows the buffer fully covers
+        windows = self.windows_ms[self.windows_ms <= now - ts[0]]
+        if not len(windows):
+            return None
+
+        # (W, points) sample times -> (W, points, 2) paths, all windows at once
+        grid = now - windows[:, None] * (1.0 - np.linspace(0.0, 1.0, self.points))[None, :]
+        paths = np.stack([np.interp(grid, ts, xy[:, 0]), np.interp(grid, ts, xy[:, 1])], axis=-1)
+        paths = (paths - paths[:, :1]) / np.median(scale)
+
+        # Hand barely moved in any window -> not a motion (cheap reject before matching)
+        travel = np.linalg.norm(paths[:, -1], axis=1)
+        moving = travel >= Config.MOTION_MIN_TRAVEL
+        if not moving.any():
+            self.stats["gated"] += 1
+            self._armed = True
+            return None
+        if not self._armed:
+            return None # Tail of the motion that just fired
+        paths = self._unit_extent(paths[moving])
+
+        # Mean point-to-point distance between shapes, (W, T)
+        dist = np.linalg.norm(paths[:, None, :, :] - templates[None, :, :, :], axis=-1).mean(axis=-1)
+        w, t = np.unravel_index(np.argmin(dist), dist.shape)
+        best = dist[w, t]
+        if best >= Config.MOTION_MATCH_THRESHOLD:
+            return None
+
+        name = self._template_names[t]
+        logger.debug(f"Motion matched: {name} | Dist: {best:.3f} | Window: {windows[moving][w]:.0f}ms")
+        self.stats["matches"] += 1
+        self._armed = False
+        return name, float(best)
+
+    # --- Recording ---
+    def start_recording(self, name):
+        """Starts capturing a template; frames are taken from update()/push()."""
+        self.recording = name
+        self._recorded = []
+        logger.info(f"Recording motion '{name}'")
+
+    def stop_recording(self):
+        """Finishes the current recording and stores it. Returns True if a template was saved."""
+        name, samples = self.recording, self._recorded
+        self.recording = None
+        self._recorded = []
+        if name is None or len(samples) < 2:
+            return False
+        data = self._trim_idle(np.array(samples, dtype=np.float64))
+        return self.save_motion(name, data[:, 0], data[:, 1:3], data[:, 3])
+
+    def _trim_idle(self, data):
+        """Drops the still frames before the hand starts moving and after it stops."""
+        steps = np.linalg.norm(np.diff(data[:, 1:3], axis=0), axis=1)
+        travelled = np.concatenate([[0.0], np.cumsum(steps)])
+        total = travelled[-1]
+        if total <= 0:
+            return data
+        first = max(int(np.searchsorted(travelled, 0.05 * total)) - 1, 0)
+        last = min(int(np.searchsorted(travelled, 0.95 * total)) + 1, len(data) - 1)
+        return data[first:last + 1] if last > first else data
+
+    def save_motion(self, name, timestamps_ms, xy, scale):
+        """Adds a template from a raw trajectory (palm x/y in normalized image coords)."""
+        timestamps_ms = np.asarray(timestamps_ms, dtype=np.float64)
+        if timestamps_ms[-1] <= timestamps_ms[0]:
+            return False
+        template = self._normalize(timestamps_ms, np.asarray(xy, dtype=np.float64), np.asarray(scale),
+                                   timestamps_ms[0], timestamps_ms[-1])
+        self.motions.setdefault(name, []).append(np.round(template, 4).tolist())
+        self._templates = None
+        logger.info(f"Motion '{name}' template saved. Total templates: {len(self.motions[name])}")
+        return self._save_motions()
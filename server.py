@@ -9,12 +9,17 @@ from flask import Flask, render_template, Response, jsonify, request, send_from_
 from flask_cors import CORS
 from urllib.parse import quote
 from werkzeug.utils import secure_filename
-from pypdf import PdfReader, PdfWriter
 
 from config import Config
 from gesture_engine import GestureEngine
+from gesture_stabilizer import HandStabilizers, hand_keys
+from motion_engine import MotionEngine
 from action_map import ActionMap
+from app_context import ForegroundPoller, create_window_provider
 from draw_utils import draw_styled_landmarks
+from inference_worker import InferenceProcess, LiveStreamInference, create_landmarker, in_worker_process
+from hand_roi import HandROITracker, frame_brightness
+from frame_buffers import FrameBufferPool
 from augmentation_utils import augment_image, generate_bulk_augmentations, generate_augmentation_sprite
 
 # --- Configure Logging ---
@@ -45,20 +50,29 @@ class AppState:
         
         # Gesture Logic
         self.current_gesture = None
+        self.gesture_scores = [] # Top-k scored candidates for the current frame
         self.last_action_name = ""
         self.last_action_time = 0
         self.cooldown = Config.ACTION_COOLDOWN
-        self.last_triggered_gesture = None # Track for single-trigger logic
+        self.last_triggered = {} # hand key (or "combo") -> last one-shot gesture, for single-trigger logic
+        self.stabilizers = HandStabilizers() # Per-hand gesture confirmation
+        self.hands = [] # Per-hand status for the current frame
+        self.last_motion = None # Last dynamic gesture matched (name)
         
         # Engines
         self.engine = GestureEngine()
+        self.motion_engine = MotionEngine()
         self.action_map = ActionMap()
+        # Focused app -> active profile; only polls while profiles exist
+        self.context = ForegroundPoller(create_window_provider(), on_change=self.action_map.set_window,
+                                        enabled=lambda: bool(self.action_map.profiles.profiles))
         self.lanmarker = None
         self.start_time = time.time()
         
         # Stats
         self.fps = 0
         self.stability_score = 0
+        self.pipeline_stats = {"mode": "inline"}
         self.theme = "DEFAULT"
         self.desktop_window = None # Reference to pywebview window
         
@@ -79,30 +93,289 @@ class AppState:
         }
         self.camera_needs_update = False
 
-state = AppState()
+# Not in the inference worker: it re-imports this module when spawned (see in_worker_process)
+state = None if in_worker_process() else AppState()
 
 # --- Background Thread: Camera & Processing ---
 camera_thread_started = False
 
 def init_landmarker():
-    from mediapipe.tasks import python
-    from mediapipe.tasks.python import vision
-    
+    return create_landmarker()
+
+def dispatch_gesture(gesture_key, trigger_key, landmarks, active=None):
+    """
+    Runs the action mapped to a confirmed gesture (call with state.lock held).
+    gesture_key is the mapping key (plain, "Left:fist" or a two-hand combo),
+    trigger_key identifies who triggered it for the single-trigger rule (hand or "combo"),
+    active is the frame's ActiveProfile snapshot (default: the current one).
+    """
+    # Continuous Action Check
+    if state.action_map.is_continuous(gesture_key, active):
+        try:
+            state.action_map.execute(gesture_key, landmarks=landmarks, active=active)
+            state.last_action_name = "Tracking" 
+            state.last_action_time = time.time()
+        except Exception as e:
+            logger.error(f"Action execution error: {e}")
+        return
+
+    # One-Shot
+    cooldown = state.action_map.cooldown(gesture_key, active)
+    if time.time() - state.last_action_time <= (state.cooldown if cooldown is None else max(cooldown, state.cooldown)):
+        return
+
+    # Single Trigger Logic: Only trigger if different from what this hand last fired
+    last = state.last_triggered.get(trigger_key)
+    if gesture_key == last:
+        # Still holding the same gesture, do nothing
+        return
+
+    logger.info(f"Triggering: {gesture_key} ({trigger_key})")
+    action = state.action_map.execute(gesture_key, landmarks, active)
+    if action:
+        logger.info(f"Action Executed: {action}")
+        state.last_action_name = action
+        state.last_action_time = time.time()
+        
+        # Pop-up on Action (User Request)
+        # Only for new One-Shot triggers (excludes continuous tracking/volume)
+        if state.desktop_window:
+            try:
+                state.desktop_window.restore()
+                state.desktop_window.maximize()
+                state.desktop_window.focus()
+            except: pass
+        
+        state.last_triggered[trigger_key] = gesture_key
+
+def detect_gestures(hands, keys, timestamp_ms):
+    """
+    DETECT mode for every visible hand: one batched classification, per-hand
+    stability, then dispatch. Two confirmed hands fire a mapped combo
+    ("fist + open_palm") instead of their individual gestures.
+    """
+    # One profile snapshot for the whole frame: a switch mid-frame can't mix subset and bindings
+    active = state.action_map.active
+    results = state.engine.classify_batch(hands, k=Config.GESTURE_SCORES_TOP_K, gestures=active.gestures)
+
+    confirmed = {}
+    state.hands = []
+    for key, (candidate, scores) in zip(keys, results):
+        confidence = scores[0]["confidence"] if candidate else None
+        # Only confirm if stable over the vote window (confident matches confirm sooner)
+        gesture = state.stabilizers.update(key, candidate, timestamp_ms, confidence)
+        if gesture:
+            confirmed[key] = gesture
+        stabilizer = state.stabilizers.get(key)
+        state.hands.append({"hand": key, "gesture": gesture, "pending": stabilizer.pending,
+                            "progress": round(stabilizer.progress, 2), "scores": scores})
+
+    state.gesture_scores = results[0][1]
+    state.current_gesture = confirmed.get(keys[0])
+
+    if len(confirmed) >= 2:
+        combo = state.action_map.combo_name(confirmed.values())
+        if combo in active.mapping:
+            state.current_gesture = combo
+            dispatch_gesture(combo, "combo", hands[0], active)
+            return
+
+    for key, landmarks in zip(keys, hands):
+        if key in confirmed:
+            dispatch_gesture(state.action_map.resolve_gesture(confirmed[key], key, active), key, landmarks, active)
+    # Hand visible, but no gesture confirmed -> Do NOT reset trigger.
+
+def process_detection(frame, result, timestamp_ms):
+    """
+    Per-frame gesture logic for one inference result: drawing, stabilization,
+    action dispatch and training metrics. Returns the annotated frame.
+    Shared by the in-process camera loop and the inference worker path.
+    timestamp_ms is the capture time of the frame (drives gesture confirmation).
+    """
+    # Update State safely
+    with state.lock:
+        state.latest_landmarks = None
+        
+        if result.hand_landmarks:
+            # First hand drives the mouse, motion gestures and training metrics
+            state.latest_landmarks = result.hand_landmarks[0]
+            keys = hand_keys(result)
+            state.stabilizers.retain(keys)
+            for key in [k for k in state.last_triggered if k not in keys and k != "combo"]:
+                del state.last_triggered[key] # Reset when that hand is lost
+            
+            # Draw
+            # Ensure draw_utils is robust or refactored? 
+            # Assuming draw_styled_landmarks is safe.
+            try:
+                frame = draw_styled_landmarks(frame, result, state.theme)
+            except Exception as e:
+                logger.error(f"Drawing error: {e}")
+            
+            # Palm trajectory is tracked in every mode (motion templates are recorded from it)
+            motion = state.motion_engine.update(state.latest_landmarks, timestamp_ms)
+
+            # Logic
+            state.gesture_scores = []
+            state.hands = []
+            if state.mode == "DETECT" and motion:
+                # Dynamic gesture (swipe...): already integrated over time, no stability vote needed
+                motion_name = motion[0]
+                state.last_motion = motion_name
+                state.stabilizers.reset()
+                if time.time() - state.last_action_time > state.cooldown:
+                    logger.info(f"Triggering motion: {motion_name}")
+                    action = state.action_map.execute(motion_name, state.latest_landmarks)
+                    if action:
+                        state.last_action_name = action
+                        state.last_action_time = time.time()
+                        state.last_triggered[keys[0]] = motion_name
+            elif state.mode == "DETECT":
+                detect_gestures(result.hand_landmarks, keys, timestamp_ms)
+            elif state.mode == "RECORD":
+                # Just ready to save
+                pass
+            elif state.mode == "MOUSE":
+                # Virtual Mouse Mode
+                state.action_map._action_smart_mouse(state.latest_landmarks)
+                state.last_action_name = "Virtual Mouse Active"
+            
+            elif state.mode == "IDLE":
+                # Do nothing
+                state.last_action_name = "Paused"
+        else:
+            state.current_gesture = None
+            state.gesture_scores = []
+            state.hands = []
+            state.last_triggered = {} # Reset when hand lost
+            state.stabilizers.reset()
+            state.motion_engine.reset()
+
+        # Clear status text
+        if time.time() - state.last_action_time > 3.0:
+             # Don't clear if in Mouse mode to show status
+            if state.mode != "MOUSE":
+                state.last_action_name = ""
+        
+        # --- Training Metrics & Hand Analysis ---
+        if state.latest_landmarks:
+            # 1. Brightness
+            state.training_metrics["brightness"] = frame_brightness(frame)
+            
+            # 2. Hand Size (Approx distance)
+            pts = state.latest_landmarks
+            x_coords = [p.x for p in pts]
+            y_coords = [p.y for p in pts]
+            size = (max(x_coords) - min(x_coords)) * (max(y_coords) - min(y_coords))
+            state.training_metrics["size"] = size
+            
+            # Update Session Range (Reset if hand just appeared? No, keep for session)
+            if size < state.training_metrics["size_range"][0]: state.training_metrics["size_range"][0] = size
+            if size > state.training_metrics["size_range"][1]: state.training_metrics["size_range"][1] = size
+            
+            # 3. Hand Angle (Rotation)
+            # Vector from wrist (0) to middle finger base (9)
+            p0 = pts[0]
+            p9 = pts[9]
+            import math
+            angle = math.degrees(math.atan2(p9.y - p0.y, p9.x - p0.x))
+            # Normalize to 0-1 range for simplicity in UI? Or just raw.
+            state.training_metrics["angle"] = angle
+            
+            # Update Angle Range (Extreme tracking)
+            if angle < state.training_metrics["angle_range"][0]: state.training_metrics["angle_range"][0] = angle
+            if angle > state.training_metrics["angle_range"][1]: state.training_metrics["angle_range"][1] = angle
+        else:
+            # No landmarks, but still check brightness
+            state.training_metrics["brightness"] = frame_brightness(frame)
+
+        # Stats
+        primary = state.hands[0] if state.hands else None
+        state.stability_score = primary["progress"] if primary else 0
+
+    return frame
+
+def publish_frame(frame):
+    """JPEG-encodes the frame for /video_feed (call OUTSIDE the lock)."""
     try:
-        base_options = python.BaseOptions(model_asset_path=Config.MODEL_ASSET_PATH)
-        options = vision.HandLandmarkerOptions(
-            base_options=base_options,
-            num_hands=Config.NUM_HANDS,
-            min_hand_detection_confidence=Config.MIN_HAND_DETECTION_CONFIDENCE,
-            min_hand_presence_confidence=Config.MIN_HAND_PRESENCE_CONFIDENCE,
-            min_tracking_confidence=Config.MIN_TRACKING_CONFIDENCE,
-            running_mode=vision.RunningMode.VIDEO)
-        return vision.HandLandmarker.create_from_options(options)
+        ret, buffer = cv2.imencode('.jpg', frame)
+        if ret:
+            # imencode returns a fresh array every call, so publish a view instead of copying it again
+            encoded_frame = memoryview(buffer.reshape(-1))
+            with state.lock:
+                state.latest_frame_jpg = encoded_frame
     except Exception as e:
-        logger.critical(f"Failed to initialize MediaPipe Landmarker: {e}")
-        return None
+        logger.error(f"Encoding error: {e}")
+
+def update_fps(loop_start):
+    loop_end = time.time()
+    dt = loop_end - loop_start
+    if dt > 0:
+        with state.lock:
+            state.fps = int(1.0 / dt)
+    return loop_end
+
+def worker_camera_loop(max_frames=None):
+    """
+    Camera loop variant where capture + inference run in a separate process
+    (Config.INFERENCE_PROCESS). Frames arrive as shared-memory views, so only
+    classification, drawing and encoding run here.
+    """
+    worker = InferenceProcess(state.camera_config)
+    worker.start()
+    with state.lock:
+        state.pipeline_stats = {"mode": "process"}
+
+    frames_processed = 0
+    loop_start = time.time()
+    try:
+        while max_frames is None or frames_processed < max_frames:
+            if not state.camera_active:
+                time.sleep(0.1)
+                continue
 
-def camera_loop():
+            if state.camera_needs_update:
+                with state.lock:
+                    conf = state.camera_config
+                    state.camera_needs_update = False
+                worker.reconfigure(conf)
+                logger.info(f"Camera reconfigured: {conf}")
+
+            packet = worker.get(timeout=1.0)
+            if packet is None:
+                if not worker.is_alive():
+                    logger.critical("Inference worker exited. Restarting...")
+                    worker.stop()
+                    time.sleep(1)
+                    worker = InferenceProcess(state.camera_config)
+                    worker.start()
+                continue
+
+            frames_processed += 1
+            try:
+                frame = process_detection(packet.frame, packet.result, packet.timestamp_ms)
+                publish_frame(frame)
+            finally:
+                # frame is a view into the slot, drop it before handing the slot back
+                frame = None
+                worker.release(packet)
+                packet = None
+
+            loop_start = update_fps(loop_start)
+            with state.lock:
+                state.pipeline_stats = dict(worker.stats, mode="process")
+    finally:
+        worker.stop()
+
+def camera_loop(landmarker=None, capture_factory=cv2.VideoCapture, max_frames=None,
+                live_landmarker_factory=None):
+    """
+    Capture -> inference -> classification -> action loop.
+    landmarker / capture_factory can be swapped for stand-ins (benchmarks, replay),
+    and max_frames bounds the loop instead of running forever.
+    With Config.INFERENCE_MODE == "LIVE_STREAM" inference runs asynchronously;
+    live_landmarker_factory(callback) can replace the MediaPipe landmarker there.
+    """
     global camera_thread_started
     if camera_thread_started:
         logger.warning("Camera loop already running! Skipping duplicate start.")
@@ -110,17 +383,24 @@ def camera_loop():
     camera_thread_started = True
 
     logger.info("Starting Camera Loop...")
+    state.context.start()
+
+    if Config.INFERENCE_PROCESS and landmarker is None:
+        worker_camera_loop(max_frames)
+        camera_thread_started = False
+        return
     
-    state.landmarker = init_landmarker()
+    live = None
+    if Config.INFERENCE_MODE == "LIVE_STREAM" and landmarker is None:
+        live = LiveStreamInference(live_landmarker_factory)
+        state.landmarker = live.landmarker
+    else:
+        state.landmarker = landmarker or init_landmarker()
     if not state.landmarker:
+        camera_thread_started = False
         return
 
-    # Stabilization
-    pending_gesture = None
-    stability_count = 0
-    REQUIRED_STABILITY = Config.GESTURE_STABILITY_FRAMES
-
-    cap = cv2.VideoCapture(Config.CAMERA_INDEX)
+    cap = capture_factory(Config.CAMERA_INDEX)
     cap.set(cv2.CAP_PROP_FRAME_WIDTH, Config.CAMERA_WIDTH)
     cap.set(cv2.CAP_PROP_FRAME_HEIGHT, Config.CAMERA_HEIGHT)
     cap.set(cv2.CAP_PROP_FPS, Config.FPS)
@@ -128,8 +408,15 @@ def camera_loop():
     if not cap.isOpened():
         logger.critical(f"Could not open camera index {Config.CAMERA_INDEX}")
     
+    # Cropping only makes sense while we follow a single hand
+    roi_tracker = HandROITracker(enabled=Config.ROI_TRACKING and Config.NUM_HANDS == 1,
+                                 reuse_buffers=live is None)
+    # LIVE_STREAM holds frames until their result arrives, so it needs extra slots
+    buffer_pool = FrameBufferPool(Config.FRAME_BUFFER_SLOTS + (Config.ASYNC_MAX_IN_FLIGHT + 1 if live else 0))
+
+    frames_processed = 0
     loop_start = time.time()
-    while True:
+    while max_frames is None or frames_processed < max_frames:
         if not state.camera_active:
             time.sleep(0.1)
             continue
@@ -143,192 +430,69 @@ def camera_loop():
             
             cap.release()
             time.sleep(0.5) # Brief pause
-            cap = cv2.VideoCapture(Config.CAMERA_INDEX)
+            cap = capture_factory(Config.CAMERA_INDEX)
             cap.set(cv2.CAP_PROP_FRAME_WIDTH, conf['width'])
             cap.set(cv2.CAP_PROP_FRAME_HEIGHT, conf['height'])
             cap.set(cv2.CAP_PROP_FPS, conf['fps'])
+            roi_tracker.reset()
+            buffer_pool.reset()
             logger.info(f"Camera reconfigured: {conf}")
             
-        success, frame = cap.read()
+        # Captured into a preallocated slot and mirrored in place
+        success, frame = buffer_pool.read(cap)
         if not success:
             logger.warning("Failed to read camera frame. Retrying...")
             time.sleep(1)
             # Try to reconnect
             cap.release()
-            cap = cv2.VideoCapture(Config.CAMERA_INDEX)
+            cap = capture_factory(Config.CAMERA_INDEX)
             continue
 
-        # Flip
-        frame = cv2.flip(frame, 1)
-        
-        # Process
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        frames_processed += 1
+
+        # Process (cropped around the last hand / downscaled for inference)
+        rgb_frame, roi = roi_tracker.prepare(frame)
         mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame)
-        timestamp = int((time.time() - state.start_time) * 1000)
-        
-        try:
-            result = state.landmarker.detect_for_video(mp_image, timestamp)
-        except Exception as e:
-            logger.error(f"Inference error: {e}")
-            continue
+
+        if live:
+            # Async: submit and move on, handle whichever result finished last
+            live.submit((frame, roi), mp_image)
+            packet = live.poll()
+            if packet is None:
+                continue
+            (frame, roi), result, timestamp = packet
+        else:
+            timestamp = int((time.time() - state.start_time) * 1000)
+            try:
+                result = state.landmarker.detect_for_video(mp_image, timestamp)
+            except Exception as e:
+                logger.error(f"Inference error: {e}")
+                continue
+
+        result = roi_tracker.to_frame_coords(result, roi, frame.shape)
+        roi_tracker.update(result, frame.shape)
         
-        # Update State safely
+        frame = process_detection(frame, result, timestamp)
+        publish_frame(frame)
+        loop_start = update_fps(loop_start)
+
+        stats = dict(live.stats, mode="live_stream") if live else {"mode": "inline"}
+        stats["roi"] = dict(roi_tracker.stats)
+        # + 1: the JPEG buffer from imencode is the one allocation left per frame
+        stats["buffers"] = {"frames": buffer_pool.stats["frames"],
+                            "allocs_per_frame": round(buffer_pool.allocs_per_frame(roi_tracker.stats["allocs"]) + 1, 3)}
         with state.lock:
-            state.latest_landmarks = None
-            
-            if result.hand_landmarks:
-                state.latest_landmarks = result.hand_landmarks[0]
-                
-                # Draw
-                # Ensure draw_utils is robust or refactored? 
-                # Assuming draw_styled_landmarks is safe.
-                try:
-                    frame = draw_styled_landmarks(frame, result, state.theme)
-                except Exception as e:
-                    logger.error(f"Drawing error: {e}")
-                
-                # Logic
-                if state.mode == "DETECT":
-                    candidate = state.engine.find_gesture(state.latest_landmarks)
-                    
-                    if candidate == pending_gesture:
-                        stability_count += 1
-                    else:
-                        pending_gesture = candidate
-                        stability_count = 0
-                    
-                    # Only confirm if stable
-                    if stability_count >= REQUIRED_STABILITY:
-                         confirmed_gesture = pending_gesture
-                    else:
-                         confirmed_gesture = None
-
-                    state.current_gesture = confirmed_gesture
-                    
-                    if confirmed_gesture:
-                        # Continuous Action Check
-                        if state.action_map.is_continuous(confirmed_gesture):
-                            try:
-                                state.action_map.execute(confirmed_gesture, landmarks=state.latest_landmarks)
-                                state.last_action_name = "Tracking" 
-                                state.last_action_time = time.time()
-                            except Exception as e:
-                                logger.error(f"Action execution error: {e}")
-                        else:
-                            # One-Shot
-                            if time.time() - state.last_action_time > state.cooldown:
-                                # Check if action is continuous (scrolling, volume, etc)
-                                is_cont = state.action_map.is_continuous(confirmed_gesture)
-                                
-                                # Single Trigger Logic: Only trigger if different from last OR if continuous
-                                if confirmed_gesture != state.last_triggered_gesture or is_cont:
-                                    logger.info(f"Triggering: {confirmed_gesture} (Cont: {is_cont})")
-                                    action = state.action_map.execute(confirmed_gesture, state.latest_landmarks)
-                                    if action:
-                                        logger.info(f"Action Executed: {action}")
-                                        state.last_action_name = action
-                                        state.last_action_time = time.time()
-                                        
-                                        # Pop-up on Action (User Request)
-                                        # Only for new One-Shot triggers (excludes continuous tracking/volume)
-                                        if confirmed_gesture != state.last_triggered_gesture:
-                                             if state.desktop_window:
-                                                 try:
-                                                     state.desktop_window.restore()
-                                                     state.desktop_window.maximize()
-                                                     state.desktop_window.focus()
-                                                 except: pass
-                                        
-                                        state.last_triggered_gesture = confirmed_gesture
-                                else:
-                                    # Still holding the same gesture, do nothing
-                                    pass
-                    else:
-                        # Hand visible, but no gesture confirmed -> Do NOT reset trigger.
-                        pass
-        
-
-
-                        
-                elif state.mode == "RECORD":
-                    # Just ready to save
-                    pass
-                elif state.mode == "MOUSE":
-                    # Virtual Mouse Mode
-                    state.action_map._action_smart_mouse(state.latest_landmarks)
-                    state.last_action_name = "Virtual Mouse Active"
-                
-                elif state.mode == "IDLE":
-                    # Do nothing
-                    state.last_action_name = "Paused"
-            else:
-                state.current_gesture = None
-                state.last_triggered_gesture = None # Reset when hand lost
-                pending_gesture = None
-                stability_count = 0
-
-            # Clear status text
-            if time.time() - state.last_action_time > 3.0:
-                 # Don't clear if in Mouse mode to show status
-                if state.mode != "MOUSE":
-                    state.last_action_name = ""
-            
-            # --- Training Metrics & Hand Analysis ---
-            if state.latest_landmarks:
-                # 1. Brightness
-                state.training_metrics["brightness"] = int(cv2.mean(frame)[0])
-                
-                # 2. Hand Size (Approx distance)
-                pts = state.latest_landmarks
-                x_coords = [p.x for p in pts]
-                y_coords = [p.y for p in pts]
-                size = (max(x_coords) - min(x_coords)) * (max(y_coords) - min(y_coords))
-                state.training_metrics["size"] = size
-                
-                # Update Session Range (Reset if hand just appeared? No, keep for session)
-                if size < state.training_metrics["size_range"][0]: state.training_metrics["size_range"][0] = size
-                if size > state.training_metrics["size_range"][1]: state.training_metrics["size_range"][1] = size
-                
-                # 3. Hand Angle (Rotation)
-                # Vector from wrist (0) to middle finger base (9)
-                p0 = pts[0]
-                p9 = pts[9]
-                import math
-                angle = math.degrees(math.atan2(p9.y - p0.y, p9.x - p0.x))
-                # Normalize to 0-1 range for simplicity in UI? Or just raw.
-                state.training_metrics["angle"] = angle
-                
-                # Update Angle Range (Extreme tracking)
-                if angle < state.training_metrics["angle_range"][0]: state.training_metrics["angle_range"][0] = angle
-                if angle > state.training_metrics["angle_range"][1]: state.training_metrics["angle_range"][1] = angle
-            else:
-                # No landmarks, but still check brightness
-                state.training_metrics["brightness"] = int(cv2.mean(frame)[0])
-
-            # Stats
-            state.stability_score = stability_count
+            state.pipeline_stats = stats
 
-        # Encode for streaming (OUTSIDE LOCK for concurrency)
-        try:
-            ret, buffer = cv2.imencode('.jpg', frame)
-            if ret:
-                encoded_frame = buffer.tobytes()
-                with state.lock:
-                    state.latest_frame_jpg = encoded_frame
-        except Exception as e:
-            logger.error(f"Encoding error: {e}")
-        
-        # FPS Calculation
-        loop_end = time.time()
-        dt = loop_end - loop_start
-        if dt > 0:
-            with state.lock:
-                state.fps = int(1.0 / dt)
-        loop_start = loop_end
-        
         if Config.FPS < 60:
              time.sleep(0.001) # Minimal sleep only if we really need to yield, but for 60FPS+ we want to run hot.
 
+    # Only reached for bounded runs (max_frames)
+    cap.release()
+    if live:
+        live.close()
+    camera_thread_started = False
+
 
 # --- Flask Routes ---
 @app.route('/')
@@ -359,6 +523,13 @@ def get_status():
         return jsonify({
             "mode": state.mode,
             "detected_gesture": state.current_gesture,
+            "last_motion": state.last_motion,
+            "motion_recording": state.motion_engine.recording,
+            "hands": [dict(h, scores=[{"gesture": sc["gesture"], "confidence": round(sc["confidence"], 3)}
+                                      for sc in h["scores"]]) for h in state.hands],
+            "gesture_scores": [{"gesture": sc["gesture"], "distance": round(sc["distance"], 3),
+                                "margin": None if sc["margin"] is None else round(sc["margin"], 3), "confidence": round(sc["confidence"], 3)}
+                               for sc in state.gesture_scores],
             "last_action": state.last_action_name,
             "is_hand_visible": state.latest_landmarks is not None,
             "fps": state.fps,
@@ -367,7 +538,9 @@ def get_status():
             "training_metrics": state.training_metrics,
             "training_metrics": state.training_metrics,
             "camera_config": state.camera_config,
-            "voice_auto_active": state.action_map.voice_engine.auto_mode_active
+            "pipeline": state.pipeline_stats,
+            "voice_auto_active": state.action_map.voice_auto_active(),
+            "profile": state.action_map.active_profile
         })
 
 @app.route('/api/mode', methods=['POST'])
@@ -376,6 +549,8 @@ def set_mode():
     new_mode = data.get("mode")
     if new_mode in ["DETECT", "RECORD", "MOUSE", "IDLE"]:
         with state.lock:
+            if state.mode == "MOUSE" and new_mode != "MOUSE" and state.action_map.cursor_driver is not None:
+                state.action_map.cursor_driver.reset() # Stop gliding toward the last target
             state.mode = new_mode
             if new_mode == "RECORD":
                 # Reset Exploration Ranges
@@ -409,6 +584,26 @@ def update_settings():
         return jsonify({"status": "success"})
     return jsonify({"error": "Missing parameters"}), 400
 
+@app.route('/api/settings/cursor', methods=['GET', 'POST'])
+def cursor_settings():
+    cursor_filter = state.action_map.cursor_filter
+    driver = state.action_map.cursor_driver
+    if request.method == 'POST':
+        data = request.json or {}
+        with state.lock:
+            cursor_filter.configure(**{k: data.get(k) for k in ("min_cutoff", "beta", "d_cutoff", "lead_ms", "max_lead")})
+            if driver is not None:
+                for key in ("delay", "max_extrapolation_ms"):
+                    if data.get(key) is not None:
+                        setattr(driver, key, float(data[key]))
+    settings = {"min_cutoff": cursor_filter.min_cutoff, "beta": cursor_filter.beta,
+                "d_cutoff": cursor_filter.d_cutoff, "lead_ms": cursor_filter.lead_ms,
+                "max_lead": cursor_filter.max_lead}
+    if driver is not None:
+        settings.update({"driver_hz": driver.rate_hz, "delay": driver.delay,
+                         "max_extrapolation_ms": driver.max_extrapolation_ms, "driver_stats": driver.stats})
+    return jsonify(settings)
+
 @app.route('/api/gestures', methods=['GET'])
 def get_gestures():
     result = []
@@ -422,6 +617,13 @@ def get_gestures():
 def training_stats():
     return jsonify(state.engine.get_training_stats())
 
+@app.route('/api/training/train', methods=['POST'])
+def train_model():
+    """Retrains the centroid model now (it is otherwise retrained when the library is saved)."""
+    if state.engine.train_model() is None:
+        return jsonify({"error": "No gesture samples to train on"}), 400
+    return jsonify({"status": "success", "stats": state.engine.get_training_stats()})
+
 @app.route('/api/gestures', methods=['GET', 'POST'])
 def save_gesture_sample():
     data = request.json
@@ -455,6 +657,38 @@ def save_gesture_sample():
     else:
         return jsonify({"error": "No hand detected"}), 404
 
+@app.route('/api/motions', methods=['GET'])
+def get_motions():
+    return jsonify([{"name": name, "templates": len(templates)}
+                    for name, templates in state.motion_engine.motions.items()])
+
+@app.route('/api/motions/record', methods=['POST'])
+def record_motion():
+    data = request.json
+    name = data.get("name")
+    if not name:
+        return jsonify({"error": "Name required"}), 400
+    with state.lock:
+        state.motion_engine.start_recording(name)
+    return jsonify({"status": "success", "message": f"Recording motion {name}"})
+
+@app.route('/api/motions/stop', methods=['POST'])
+def stop_motion_recording():
+    with state.lock:
+        name = state.motion_engine.recording
+        saved = state.motion_engine.stop_recording()
+    if saved:
+        return jsonify({"status": "success", "message": f"Template added to {name}"})
+    return jsonify({"error": "No motion captured (was the hand visible?)"}), 400
+
+@app.route('/api/motions/<name>', methods=['DELETE'])
+def delete_motion(name):
+    with state.lock:
+        deleted = state.motion_engine.delete_motion(name)
+    if deleted:
+        return jsonify({"status": "success"})
+    return jsonify({"error": "Motion not found"}), 404
+
 @app.route('/api/gestures/<name>/images', methods=['GET'])
 def get_gesture_images(name):
     try:
@@ -682,6 +916,70 @@ def serve_sample(filename):
 def get_actions():
     return jsonify(state.action_map.get_available_actions())
 
+@app.route('/api/actions/timing', methods=['GET'])
+def get_action_timing():
+    return jsonify(state.action_map.registry.timing())
+
+@app.route('/api/input', methods=['GET'])
+def get_input_backend():
+    backend = state.action_map.input
+    return jsonify({"backend": backend.name, "latency": backend.latency()})
+
+@app.route('/api/commands', methods=['GET'])
+def get_command_plans():
+    """Dry run of every cmd: mapping: what each gesture would launch."""
+    action_map = state.action_map
+    plans = []
+    for gesture, action in action_map.active_mapping.items():
+        if isinstance(action, str) and action.startswith("cmd:"):
+            plans.append(dict(action_map.commands.dry_run(action[4:]), gesture=gesture))
+    return jsonify(plans)
+
+@app.route('/api/commands/resolve', methods=['POST'])
+def resolve_command():
+    data = request.json or {}
+    command = data.get("command")
+    if not command:
+        return jsonify({"error": "No command provided"}), 400
+    return jsonify(state.action_map.commands.dry_run(command))
+
+@app.route('/api/commands/invalidate', methods=['POST'])
+def invalidate_commands():
+    """Re-resolve launch plans (e.g. after installing an app)."""
+    action_map = state.action_map
+    action_map.commands.invalidate()
+    action_map.commands.compile(action_map.mapping, *(p.mapping for p in action_map.profiles.profiles.values()))
+    return jsonify({"status": "success", "plans": len(action_map.commands.plans)})
+
+@app.route('/api/launcher', methods=['GET'])
+def get_launcher_stats():
+    action_map = state.action_map
+    return jsonify({"launcher": action_map.launcher.name, "stats": action_map.launcher.stats,
+                    "latency": action_map.launcher.latency(), "queue": action_map.background.latency()})
+
+@app.route('/api/macros', methods=['GET'])
+def get_macro_timing():
+    return jsonify(state.action_map.macros.timing())
+
+@app.route('/api/macros/validate', methods=['POST'])
+def validate_macro():
+    """Compiles macro text without running it: the steps and how they are batched."""
+    data = request.json or {}
+    source = data.get("macro", "")
+    if source.startswith("macro:"):
+        source = source[6:]
+    try:
+        macro = state.action_map._compile_macro(source)
+    except ValueError as e:
+        return jsonify({"valid": False, "error": str(e)}), 400
+    return jsonify({"valid": True, "steps": macro.steps,
+                    "groups": [[step.text for step in group] for group in macro.groups]})
+
+@app.route('/api/macros/cancel', methods=['POST'])
+def cancel_macros():
+    state.action_map.macros.cancel()
+    return jsonify({"status": "success"})
+
 @app.route('/api/map', methods=['GET'])
 def get_mapping():
     return jsonify(state.action_map.mapping)
@@ -698,6 +996,42 @@ def map_gesture():
         return jsonify({"status": "success"})
     return jsonify({"error": "Invalid data"}), 400
 
+@app.route('/api/map/bulk', methods=['POST'])
+def map_gestures_bulk():
+    """{"mappings": {gesture: action or null}} -> one recompile and one file write."""
+    changes = (request.json or {}).get("mappings")
+    if not isinstance(changes, dict) or not all(isinstance(g, str) and g for g in changes):
+        return jsonify({"error": "Invalid data"}), 400
+    state.action_map.update_mapping(changes)
+    logger.info(f"Mapped {len(changes)} gestures")
+    return jsonify({"status": "success", "mapping": state.action_map.mapping})
+
+@app.route('/api/profiles', methods=['GET'])
+def get_profiles():
+    action_map = state.action_map
+    window = action_map.window
+    return jsonify({"profiles": action_map.profiles.to_json(), "active": action_map.active_profile,
+                    "window": {"title": window.title, "process": window.process},
+                    "provider": state.context.provider.name, "poller": state.context.stats})
+
+@app.route('/api/profiles', methods=['POST'])
+def save_profile():
+    """{"name": ..., "profile": {"match": [...], "mapping": {...}, "gestures": [...]}}; profile null deletes."""
+    data = request.json or {}
+    name = data.get("name")
+    profile = data.get("profile")
+    if not name or not (profile is None or isinstance(profile, dict)):
+        return jsonify({"error": "Invalid data"}), 400
+    state.action_map.profiles.put(name, profile)
+    logger.info(f"Profile {'removed' if profile is None else 'saved'}: {name}")
+    return jsonify({"status": "success", "active": state.action_map.active_profile})
+
+@app.route('/api/storage', methods=['GET'])
+def get_storage():
+    """Write coalescing / hot reload counters for the config files."""
+    stores = [state.action_map.store, state.engine.store, state.action_map.profiles.store]
+    return jsonify([{"file": s.path, **s.stats} for s in stores])
+
 @app.route('/api/exec', methods=['POST'])
 def exec_action():
     data = request.json
@@ -726,8 +1060,9 @@ def process_split_pdf():
             os.makedirs("temp_uploads", exist_ok=True)
             file.save(temp_path)
             
-            reader = PdfReader(temp_path)
-            writer = PdfWriter()
+            pypdf = state.action_map.registry.load_plugin("pypdf") # Imported on first split, not at startup
+            reader = pypdf.PdfReader(temp_path)
+            writer = pypdf.PdfWriter()
             total_pages = len(reader.pages)
             
             if start_page < 1 or end_page > total_pages or start_page > end_page:
@@ -776,6 +1111,14 @@ def toggle_voice_auto():
         
     return jsonify({"status": "success", "enabled": engine.auto_mode_active})
 
+@app.route('/api/voice/latency', methods=['GET'])
+def get_voice_latency():
+    """Per-stage voice pipeline latency (without creating the voice engine just to ask)."""
+    engine = state.action_map._voice_engine
+    if engine is None:
+        return jsonify({"active": False})
+    return jsonify(dict(engine.latency(), active=True))
+
 if __name__ == '__main__':
     print("--- SERVER STARTUP ---") # Visible console debug
     logger.info("--- SERVER STARTUP REQUEST ---")
@@ -0,0 +1,83 @@
+import logging
+
+import numpy as np
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class VoiceActivityGate:
+    """
+    Cheap speech check on a captured segment's PCM before it is sent for
+    recognition (a recognition is a network round-trip; coughs, clicks and
+    fan noise only come back as "not understood").
+
+    The segment is cut into Config.VOICE_VAD_FRAME_MS frames. A frame counts
+    as speech when it is
+      - loud: VOICE_VAD_ENERGY_DB above the segment's noise floor (and above
+        VOICE_VAD_MIN_DBFS),
+      - tonal: spectral flatness below VOICE_VAD_MAX_FLATNESS (broadband
+        noise and coughs are flat, voiced speech has harmonics),
+      - not hiss: zero-crossing rate below VOICE_VAD_MAX_ZCR.
+    Segments with less than VOICE_VAD_MIN_SPEECH_MS of speech are dropped;
+    the rest are trimmed to the speech plus VOICE_VAD_PAD_MS on each side
+    (shorter upload, faster recognition).
+    """
+    def __init__(self):
+        self.stats = {"segments": 0, "passed": 0, "dropped_silence": 0, "dropped_noise": 0,
+                      "in_ms": 0.0, "out_ms": 0.0}
+
+    def frame_features(self, samples, rate):
+        """Per-frame (energy dBFS, zero-crossing rate, spectral flatness) for float samples in [-1, 1]."""
+        frame_len = max(int(rate * Config.VOICE_VAD_FRAME_MS / 1000), 16)
+        count = len(samples) // frame_len
+        frames = samples[:count * frame_len].reshape(count, frame_len)
+
+        energy_db = 10.0 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frame_len - 1)
+        power = np.abs(np.fft.rfft(frames * np.hanning(frame_len), axis=1)) ** 2 + 1e-12
+        flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+        return energy_db, zcr, flatness, frame_len
+
+    def speech_frames(self, samples, rate):
+        """Boolean speech mask per frame, and the frame length in samples."""
+        energy_db, zcr, flatness, frame_len = self.frame_features(samples, rate)
+        if not len(energy_db):
+            return np.zeros(0, dtype=bool), frame_len
+        floor = np.percentile(energy_db, 10)
+        loud = energy_db > max(floor + Config.VOICE_VAD_ENERGY_DB, Config.VOICE_VAD_MIN_DBFS)
+        speech = loud & (flatness < Config.VOICE_VAD_MAX_FLATNESS) & (zcr < Config.VOICE_VAD_MAX_ZCR)
+        return speech, frame_len
+
+    def __call__(self, audio):
+        """Trimmed AudioData, or None if the segment holds no speech. Non-PCM input passes through."""
+        if not hasattr(audio, "get_raw_data"):
+            return audio
+        self.stats["segments"] += 1
+        rate = audio.sample_rate
+        raw = audio.get_raw_data(convert_width=2)
+        pcm = np.frombuffer(raw, dtype=np.int16)
+        self.stats["in_ms"] += len(pcm) / rate * 1000.0
+
+        speech, frame_len = self.speech_frames(pcm.astype(np.float32) / 32768.0, rate)
+        frame_ms = frame_len / rate * 1000.0
+        speech_ms = np.count_nonzero(speech) * frame_ms
+        if speech_ms < Config.VOICE_VAD_MIN_SPEECH_MS:
+            # Nothing loud at all = silence; loud but flat / hissy = noise
+            self.stats["dropped_noise" if speech_ms > 0 or self._has_energy(pcm) else "dropped_silence"] += 1
+            logger.debug(f"VAD: dropped segment ({speech_ms:.0f}ms speech)")
+            return None
+
+        idx = np.flatnonzero(speech)
+        pad = int(Config.VOICE_VAD_PAD_MS / frame_ms)
+        start = max(idx[0] - pad, 0) * frame_len
+        end = min((idx[-1] + 1 + pad) * frame_len, len(pcm))
+        self.stats["passed"] += 1
+        self.stats["out_ms"] += float(end - start) / rate * 1000.0
+        return type(audio)(pcm[start:end].tobytes(), rate, 2)
+
+    @staticmethod
+    def _has_energy(pcm):
+        return len(pcm) > 0 and 20.0 * np.log10(np.sqrt(np.mean((pcm / 32768.0) ** 2)) + 1e-10) > Config.VOICE_VAD_MIN_DBFS
@@ -0,0 +1,158 @@
+import logging
+import re
+from collections import namedtuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"[a-z0-9']+")
+SLOT_RE = re.compile(r"^<([a-z_]+)>$")
+
+# Spoken phrase -> ActionMap action. "<name>" is a slot: it takes the rest of
+# the utterance and is substituted into the action as {name}.
+DEFAULT_GRAMMAR = {
+    # Presentation
+    "next slide": "ppt_next",
+    "previous slide": "ppt_prev",
+    "start presentation": "ppt_start",
+    "stop presentation": "ppt_stop",
+    "end presentation": "ppt_stop",
+    # Browser
+    "new tab": "browser_new_tab",
+    "close tab": "browser_close_tab",
+    "reopen tab": "browser_reopen_tab",
+    "next tab": "browser_next_tab",
+    "previous tab": "browser_prev_tab",
+    "refresh page": "browser_refresh",
+    "reload page": "browser_refresh",
+    "go to address bar": "browser_focus_address",
+    # Editing
+    "copy that": "copy",
+    "paste that": "paste",
+    "cut that": "cut",
+    "undo that": "undo",
+    "redo that": "redo",
+    "select all": "select_all",
+    "save file": "save",
+    # Media
+    "volume up": "volume_up",
+    "volume down": "volume_down",
+    "mute": "volume_mute",
+    "play music": "media_play_pause",
+    "pause music": "media_play_pause",
+    "next song": "media_next",
+    "previous song": "media_prev",
+    # Navigation / windows
+    "scroll up": "scroll_up",
+    "scroll down": "scroll_down",
+    "page up": "page_up",
+    "page down": "page_down",
+    "minimize window": "minimize_window",
+    "maximize window": "maximize_window",
+    "close window": "close_current_window",
+    "switch window": "alt_tab",
+    "show desktop": "show_desktop",
+    "take screenshot": "screenshot",
+    "lock screen": "lock_screen",
+    "open task manager": "task_manager",
+    "open file explorer": "file_explorer",
+    # Apps (through the cmd: router)
+    "open <app>": "cmd:open {app}",
+    "launch <app>": "cmd:open {app}",
+    "close <app>": "cmd:close {app}",
+}
+
+# slots: (name, value) pairs in phrase order
+CommandMatch = namedtuple('CommandMatch', ['phrase', 'action', 'slots'])
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+class _Node:
+    __slots__ = ("children", "terminal", "slot")
+
+    def __init__(self):
+        self.children = {}
+        self.terminal = None # (phrase, action) when a phrase ends here
+        self.slot = None # (name, phrase, action): the rest of the utterance fills <name>
+
+
+class CommandGrammar:
+    """
+    Voice command phrases compiled into a token trie once, at load time.
+
+    match() walks the utterance's tokens through the trie: O(utterance
+    length), independent of how many phrases there are. Literal words win
+    over a slot; when a literal path dead-ends, the deepest slot passed on
+    the way takes the remaining words ("close tab" vs "close <app>").
+    A slot may only end a phrase. The whole utterance must match.
+    """
+    def __init__(self, grammar=None):
+        self.root = _Node()
+        self.phrases = 0
+        grammar = dict(DEFAULT_GRAMMAR if grammar is None else grammar)
+        for phrase, action in grammar.items():
+            self.add(phrase, action)
+
+    def add(self, phrase, action):
+        words = phrase.lower().split()
+        if not words:
+            raise ValueError("empty phrase")
+        node = self.root
+        for i, word in enumerate(words):
+            slot = SLOT_RE.match(word)
+            if slot:
+                if i != len(words) - 1:
+                    raise ValueError(f"'{phrase}': a <slot> must be the last word")
+                if i == 0:
+                    raise ValueError(f"'{phrase}': a phrase can't be just a slot")
+                node.slot = (slot.group(1), phrase, action)
+                self.phrases += 1
+                return
+            tokens = tokenize(word)
+            if len(tokens) != 1:
+                raise ValueError(f"'{phrase}': '{word}' is not a single word")
+            node = node.children.setdefault(tokens[0], _Node())
+        node.terminal = (phrase, action)
+        self.phrases += 1
+
+    def match(self, text):
+        """CommandMatch for a whole utterance, or None."""
+        tokens = tokenize(text)
+        node = self.root
+        fallback = None # (slot, index of its first word)
+        for i, token in enumerate(tokens):
+            if node.slot is not None:
+                fallback = (node.slot, i)
+            node = node.children.get(token)
+            if node is None:
+                break
+        else:
+            if node.terminal is not None:
+                phrase, action = node.terminal
+                return CommandMatch(phrase, action, ())
+        if fallback is None:
+            return None
+        (name, phrase, action), start = fallback
+        value = " ".join(tokens[start:])
+        return CommandMatch(phrase, action.replace("{" + name + "}", value), ((name, value),))
+
+
+def load_grammar():
+    """Built-in phrases plus Config.VOICE_COMMANDS (which can add, override or, with None, remove phrases)."""
+    grammar = dict(DEFAULT_GRAMMAR)
+    for phrase, action in Config.VOICE_COMMANDS.items():
+        if action is None:
+            grammar.pop(phrase, None)
+        else:
+            grammar[phrase] = action
+    compiled = CommandGrammar({})
+    for phrase, action in grammar.items():
+        try:
+            compiled.add(phrase, action)
+        except ValueError as e:
+            logger.warning(f"Voice command skipped: {e}")
+    return compiled
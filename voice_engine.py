@@ -1,18 +1,123 @@
 
 import speech_recognition as sr
 import threading
-import pyautogui
 import logging
 import platform
 import time
-
-# Disable FailSafe
-pyautogui.FAILSAFE = False
+from collections import deque
+from config import Config
+from input_backend import create_backend
+from voice_pipeline import VoicePipeline, create_recognizer
+from voice_activity import VoiceActivityGate
+from voice_commands import load_grammar
+from launcher import _summary
 
 logger = logging.getLogger(__name__)
 
+
+class SharedMicrophone:
+    """
+    One warm microphone stream for auto mode and one-shot voice typing.
+
+    The device is looked up once (find_device) and cached; the stream is
+    opened and calibrated once and then kept open, so a one-shot capture
+    starts by draining stale buffered audio instead of enumerating devices
+    and opening PyAudio again. Only one listener reads at a time (`lock`).
+    Any device error closes the stream and drops the cached device, so the
+    next capture rediscovers it (headset unplugged / default device changed).
+    """
+    _UNSET = object()
+
+    def __init__(self, recognizer, find_device):
+        self.recognizer = recognizer
+        self.find_device = find_device
+        self.lock = threading.Lock() # Held while listening: one reader per stream
+        self._open_lock = threading.Lock()
+        self._device = self._UNSET
+        self._mic = None
+        self._start_ms = deque(maxlen=100)
+        self.stats = {"discoveries": 0, "opens": 0, "device_errors": 0, "open_ms": None}
+
+    def device(self):
+        if self._device is self._UNSET:
+            self.stats["discoveries"] += 1
+            self._device = self.find_device()
+        return self._device
+
+    def open(self):
+        """The open, calibrated source (opened on first use)."""
+        with self._open_lock:
+            if self._mic is not None:
+                return self._mic
+            start = time.perf_counter()
+            mic = sr.Microphone(device_index=self.device())
+            mic.__enter__()
+            if mic.stream is None:
+                mic.__exit__(None, None, None)
+                self._device = self._UNSET
+                raise OSError("could not open the microphone")
+            try:
+                self.recognizer.adjust_for_ambient_noise(mic, duration=Config.VOICE_CALIBRATION_S)
+            except Exception:
+                mic.__exit__(None, None, None)
+                raise
+            self._mic = mic
+            self.stats["opens"] += 1
+            self.stats["open_ms"] = round((time.perf_counter() - start) * 1000.0, 1)
+            logger.info(f"Microphone Initialized & Ready ({self.stats['open_ms']}ms)")
+            return mic
+
+    def warm(self):
+        try:
+            self.open()
+        except Exception as e:
+            logger.error(f"Microphone warm-up failed: {e}")
+
+    def close(self):
+        with self._open_lock:
+            if self._mic is not None:
+                try:
+                    self._mic.__exit__(None, None, None)
+                except Exception:
+                    pass
+                self._mic = None
+
+    def invalidate(self):
+        """Device changed / failed: reopen and rediscover on the next capture."""
+        self.stats["device_errors"] += 1
+        self.close()
+        self._device = self._UNSET
+
+    def _drain(self, source):
+        """Skips audio buffered while nobody was listening (it would be captured as stale speech)."""
+        stream = source.stream.pyaudio_stream
+        available = stream.get_read_available()
+        if available > 0:
+            stream.read(available, exception_on_overflow=False)
+
+    def listen(self, timeout, phrase_time_limit, requested=None):
+        """recognizer.listen on the shared stream. Raises sr.WaitTimeoutError on silence."""
+        with self.lock:
+            try:
+                source = self.open()
+                self._drain(source)
+            except (OSError, IOError):
+                self.invalidate()
+                raise
+            if requested is not None:
+                self._start_ms.append((time.perf_counter() - requested) * 1000.0)
+            try:
+                return self.recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
+            except (OSError, IOError):
+                self.invalidate()
+                raise
+
+    def latency(self):
+        """Trigger -> capture start for one-shot listens."""
+        return dict(self.stats, start=_summary(list(self._start_ms)))
+
 class VoiceEngine:
-    def __init__(self):
+    def __init__(self, input_backend=None, recognizer=None, perform_action=None):
         self.recognizer = sr.Recognizer()
         
         # SPEED OPTIMIZATION:
@@ -36,6 +141,21 @@ class VoiceEngine:
         self.auto_thread = None
         self.stop_event = threading.Event()
 
+        # Typing goes through the app's input backend (shared with gestures)
+        self.input = input_backend or create_backend()
+        # Spoken commands -> ActionMap actions (phrase trie compiled once, see voice_commands.py)
+        self.perform_action = perform_action
+        self.commands = load_grammar() if perform_action and Config.VOICE_COMMANDS_ENABLED else None
+        self.stats = {"commands": 0, "typed": 0}
+        # Capture only listens; recognition and typing run behind it (see voice_pipeline.py)
+        # Silence / noise is dropped before it costs a recognition round-trip
+        self.vad = VoiceActivityGate() if Config.VOICE_VAD else None
+        self.pipeline = VoicePipeline(recognizer or create_recognizer(), self._handle_text, gate=self.vad)
+        # One warm stream for auto and one-shot capture; opened now so the first trigger doesn't pay for it
+        self.mic = SharedMicrophone(self.recognizer, self.find_best_microphone)
+        if Config.VOICE_KEEP_MIC_OPEN:
+            threading.Thread(target=self.mic.warm, name="voice-mic-warmup", daemon=True).start()
+
     def get_active_window_title(self):
         """Returns the title of the active window (Windows only)."""
         if platform.system() != "Windows":
@@ -89,95 +209,103 @@ class VoiceEngine:
 
     def _auto_loop(self):
         """
-        OPTIMIZED LOOP: Keeps microphone open persistently.
+        OPTIMIZED LOOP: Listens on the shared, persistently open microphone.
         """
-        mic_index = self.find_best_microphone()
-        
         try:
-            # Persistent context manager
-            with sr.Microphone(device_index=mic_index) as source:
-                logger.info("Microphone Initialized & Ready.")
-                
-                # Fast calibration
-                self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
-
-                while not self.stop_event.is_set():
-                    if not self.auto_mode_active:
-                        break
-
-                    try:
-                        # Listen (Blocking with short timeouts to allow breaking loop)
-                        # phrase_time_limit=10 means max phrase is 10s
-                        # timeout here is "time to wait for START of speech"
-                        audio = None
-                        try:
-                            # Listen!
-                            audio = self.recognizer.listen(source, timeout=1.0, phrase_time_limit=10)
-                        except sr.WaitTimeoutError:
-                            # This is normal, just silence. Loop again.
-                            continue
-
-                        if audio:
-                            # Process in background thread to avoid blocking listening?
-                            # No, for speech-to-text, we usually want sequential typing.
-                            self._process_audio(audio)
-                        
-                    except Exception as e:
-                        logger.error(f"Loop Listening Error: {e}")
-                        time.sleep(0.1)
-
+            self.mic.open()
         except Exception as e:
             logger.critical(f"Microphone Init Failed: {e}")
             self.auto_mode_active = False
+            return
 
-    def _process_audio(self, audio):
-        """Recognize and Type with Command Parsing"""
-        try:
-            # 'en-IN' for User Preference
-            text = self.recognizer.recognize_google(audio, language='en-IN')
-            if text:
-                logger.info(f"Recognized: {text}")
-                
-                # Command Parsing
-                lower_text = text.lower().strip()
-                
-                # Command: ENTER / OPEN (at end of phrase)
-                if lower_text.endswith(" enter") or lower_text.endswith(" open"):
-                    # Strip the command word (last word)
-                    # "search for cats enter" -> "search for cats"
-                    words = text.split()
-                    content = " ".join(words[:-1]) 
-                    
-                    if content:
-                        pyautogui.write(content)
-                    
-                    logger.info("Command: ENTER")
-                    pyautogui.press('enter')
+        while not self.stop_event.is_set():
+            if not self.auto_mode_active:
+                break
+
+            try:
+                # Listen (Blocking with short timeouts to allow breaking loop)
+                # phrase_time_limit=10 means max phrase is 10s
+                # timeout here is "time to wait for START of speech"
+                audio = None
+                try:
+                    # Listen!
+                    audio = self.mic.listen(timeout=1.0, phrase_time_limit=10)
+                except sr.WaitTimeoutError:
+                    # This is normal, just silence. Loop again.
+                    continue
+
+                if audio:
+                    # Hand off and keep listening; the pipeline types results in order
+                    self.pipeline.submit(audio)
                 
-                # Command: Just "Enter"
-                elif lower_text == "enter" or lower_text == "open":
-                    logger.info("Command: ENTER (Direct)")
-                    pyautogui.press('enter')
-                    
-                else:
-                    # Normal Typing
-                    pyautogui.write(text + " ", interval=0)
-                    
-        except sr.UnknownValueError:
-            pass # Silence/Noise
-        except sr.RequestError:
-            pass # Network issue
+            except Exception as e:
+                # Device errors drop the cached mic; the next listen reopens it
+                logger.error(f"Loop Listening Error: {e}")
+                time.sleep(0.1)
+
+        if not Config.VOICE_KEEP_MIC_OPEN:
+            self.mic.close()
+
+    def _handle_text(self, text):
+        """Type recognized text, with command parsing (runs on the pipeline's handler thread)"""
+        logger.info(f"Recognized: {text}")
+
+        # Voice Commands (whole utterance matches a phrase)
+        match = self.commands.match(text) if self.commands else None
+        if match:
+            logger.info(f"Voice command: {match.phrase} -> {match.action}")
+            self.stats["commands"] += 1
+            self.perform_action(match.action)
+            return
+        self.stats["typed"] += 1
+        
+        # Command Parsing
+        lower_text = text.lower().strip()
+        
+        # Command: ENTER / OPEN (at end of phrase)
+        if lower_text.endswith(" enter") or lower_text.endswith(" open"):
+            # Strip the command word (last word)
+            # "search for cats enter" -> "search for cats"
+            words = text.split()
+            content = " ".join(words[:-1]) 
+            
+            with self.input.batch():
+                if content:
+                    self.input.write(content)
+                logger.info("Command: ENTER")
+                self.input.press('enter')
+        
+        # Command: Just "Enter"
+        elif lower_text == "enter" or lower_text == "open":
+            logger.info("Command: ENTER (Direct)")
+            self.input.press('enter')
+            
+        else:
+            # Normal Typing
+            self.input.write(text + " ")
+
+    def latency(self):
+        """Per-stage voice latency (queue, recognize, order, handle, total) and counters."""
+        return {"recognizer": self.pipeline.recognizer.name, "stats": dict(self.pipeline.stats, **self.stats),
+                "stages": self.pipeline.latency(), "vad": self.vad.stats if self.vad else None,
+                "microphone": self.mic.latency()}
 
     def listen_and_type(self, auto=False):
-        """Legacy One-Shot Method (Used by Gesture Action)"""
+        """One-Shot Method (Used by Gesture Action), on the shared warm microphone"""
+        if self.auto_mode_active:
+            return # Auto mode is already listening and typing everything
+        requested = time.perf_counter()
         if self.is_listening: return
         with self.lock: self.is_listening = True
         try:
-            mic_index = self.find_best_microphone()
-            with sr.Microphone(device_index=mic_index) as source:
-                audio = self.recognizer.listen(source, timeout=3, phrase_time_limit=10)
-                self._process_audio(audio)
-        except: pass
+            audio = self.mic.listen(timeout=3, phrase_time_limit=10, requested=requested)
+            self.pipeline.submit(audio)
+        except sr.WaitTimeoutError:
+            pass
+        except Exception as e:
+            logger.error(f"Voice capture failed: {e}")
         finally:
             with self.lock: self.is_listening = False
+            if not Config.VOICE_KEEP_MIC_OPEN:
+                self.mic.close()
 
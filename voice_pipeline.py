@@ -0,0 +1,186 @@
+import logging
+import queue
+import threading
+import time
+from collections import deque
+
+from config import Config
+from launcher import _summary
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("queue_ms", "gate_ms", "recognize_ms", "order_ms", "handle_ms", "total_ms")
+
+
+# --- Recognizer backends ---
+class Recognizer:
+    """Speech -> text. recognize() returns the text, or None for silence / noise."""
+    name = "base"
+
+    def recognize(self, audio):
+        raise NotImplementedError
+
+
+class GoogleRecognizer(Recognizer):
+    """speech_recognition's Google Web Speech client (one HTTP round-trip per segment)."""
+    name = "google"
+
+    def __init__(self, language=None):
+        import speech_recognition as sr
+        self._sr = sr
+        self._recognizer = sr.Recognizer()
+        self.language = language or Config.VOICE_LANGUAGE
+
+    def recognize(self, audio):
+        try:
+            return self._recognizer.recognize_google(audio, language=self.language) or None
+        except self._sr.UnknownValueError:
+            return None # Silence/Noise
+        except self._sr.RequestError as e:
+            raise RuntimeError(f"recognition request failed: {e}")
+
+
+class StubRecognizer(Recognizer):
+    """
+    Local stand-in: returns `transcripts` in order (None once exhausted), or
+    the audio's own `transcript` attribute, after `delay_s` to mimic a
+    network round-trip. For tests and benchmarks.
+    """
+    name = "stub"
+
+    def __init__(self, transcripts=(), delay_s=0.0):
+        self.transcripts = deque(transcripts)
+        self.delay_s = delay_s
+        self._lock = threading.Lock()
+
+    def recognize(self, audio):
+        if self.delay_s:
+            time.sleep(self.delay_s)
+        with self._lock:
+            if self.transcripts:
+                return self.transcripts.popleft()
+        return getattr(audio, "transcript", None)
+
+
+def create_recognizer(name=None):
+    """Config.VOICE_RECOGNIZER: google / stub."""
+    name = name or Config.VOICE_RECOGNIZER
+    if name == "google":
+        try:
+            return GoogleRecognizer()
+        except ImportError as e:
+            logger.warning(f"Google recognizer not available ({e}), using the stub")
+    elif name != "stub":
+        logger.warning(f"Unknown recognizer '{name}', using the stub")
+    return StubRecognizer()
+
+
+class VoicePipeline:
+    """
+    capture -> recognize -> handle, so the microphone keeps listening while
+    earlier phrases are recognized and typed.
+
+    submit() (capture thread) puts a segment on a bounded queue; recognizer
+    workers take segments as they come (several can be in flight, each
+    recognition is a network round-trip); one handler thread receives the
+    texts strictly in capture order and runs handle_text (typing / commands).
+    Segments beyond Config.VOICE_MAX_QUEUED are dropped, oldest first.
+    An optional gate(audio) -> audio or None runs before recognition
+    (VoiceActivityGate: segments without speech never reach the recognizer).
+    Per-stage latency is kept for latency(): queue wait, gate, recognition,
+    waiting for earlier segments, handling, and submit -> handled.
+    """
+    def __init__(self, recognizer, handle_text, workers=None, max_queued=None, gate=None):
+        self.recognizer = recognizer
+        self.handle_text = handle_text
+        self.gate = gate
+        self.workers = workers or Config.VOICE_WORKERS
+        self._segments = queue.Queue(maxsize=max_queued or Config.VOICE_MAX_QUEUED)
+        self._results = queue.Queue()
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._threads = []
+        self._latency = {stage: deque(maxlen=200) for stage in STAGES}
+        self.stats = {"segments": 0, "gated": 0, "recognized": 0, "empty": 0, "dropped": 0, "errors": 0}
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            self._threads = [threading.Thread(target=self._recognize_loop, name=f"voice-recognize-{i}", daemon=True)
+                             for i in range(self.workers)]
+            self._threads.append(threading.Thread(target=self._handle_loop, name="voice-handle", daemon=True))
+            for t in self._threads:
+                t.start()
+
+    def submit(self, audio):
+        """Queues one captured segment (never blocks the capture thread)."""
+        self.start()
+        with self._lock:
+            seq = self._seq
+            self._seq += 1
+        self.stats["segments"] += 1
+        item = (seq, audio, time.perf_counter())
+        while True:
+            try:
+                self._segments.put_nowait(item)
+                return seq
+            except queue.Full:
+                try:
+                    old_seq = self._segments.get_nowait()[0]
+                except queue.Empty:
+                    continue
+                # Keep the order intact for the handler: the dropped segment resolves to nothing
+                self.stats["dropped"] += 1
+                self._results.put((old_seq, None, None))
+                logger.warning("Voice queue full, dropping the oldest segment")
+
+    # --- Stages ---
+    def _recognize_loop(self):
+        while True:
+            seq, audio, submitted = self._segments.get()
+            started = time.perf_counter()
+            text = None
+            try:
+                if self.gate is not None:
+                    audio = self.gate(audio)
+                gated = time.perf_counter()
+                if audio is None:
+                    self.stats["gated"] += 1
+                else:
+                    text = self.recognizer.recognize(audio)
+                    self.stats["recognized" if text else "empty"] += 1
+            except Exception as e:
+                gated = started
+                self.stats["errors"] += 1
+                logger.error(f"Recognition failed: {e}")
+            self._results.put((seq, text, (submitted, started, gated, time.perf_counter())))
+
+    def _handle_loop(self):
+        pending = {}
+        next_seq = 0
+        while True:
+            seq, text, times = self._results.get()
+            pending[seq] = (text, times, time.perf_counter())
+            while next_seq in pending:
+                text, times, arrived = pending.pop(next_seq)
+                next_seq += 1
+                if not text:
+                    continue
+                started = time.perf_counter()
+                try:
+                    self.handle_text(text)
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    logger.error(f"Handling '{text}' failed: {e}")
+                done = time.perf_counter()
+                submitted, gate_start, gated, recognized = times
+                self._record(queue_ms=gate_start - submitted, gate_ms=gated - gate_start, recognize_ms=recognized - gated,
+                             order_ms=started - arrived, handle_ms=done - started, total_ms=done - submitted)
+
+    def _record(self, **seconds):
+        for stage, value in seconds.items():
+            self._latency[stage].append(value * 1000.0)
+
+    def latency(self):
+        return {stage: _summary(list(samples)) for stage, samples in self._latency.items()}